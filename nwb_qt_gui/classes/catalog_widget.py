@@ -0,0 +1,188 @@
+"""
+Catalog of the NWB files under a directory tree
+
+Rows are read from the summary index, so listing, filtering and sorting
+never open the files. Indexing of new and changed files runs in background.
+Double-clicking a row opens the file on the explorer.
+"""
+from PySide2 import QtCore
+from PySide2.QtWidgets import (QWidget, QPushButton, QLineEdit, QLabel, QTableView,
+                               QProgressBar, QGridLayout, QVBoxLayout, QFileDialog,
+                               QAbstractItemView, QStyle)
+from nwb_qt_gui.classes.h5_tree import _format_bytes
+from nwb_qt_gui.utils.catalog import CatalogIndexThread, catalog_columns, catalog_row
+from nwb_qt_gui.utils.configs import catalog_max_workers
+import os
+
+
+class CatalogModel(QtCore.QAbstractTableModel):
+    def __init__(self):
+        """Table of catalog rows, one per file."""
+        super().__init__()
+        self.paths = []
+        self.rows = []
+        self.row_of_path = {}
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        return len(catalog_columns)
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        value = self.rows[index.row()][index.column()]
+        if role == QtCore.Qt.DisplayRole:
+            if catalog_columns[index.column()] == 'Size':
+                return _format_bytes(value)
+            return value
+        if role == QtCore.Qt.UserRole:
+            # Sort key
+            return value
+        if role == QtCore.Qt.ToolTipRole:
+            return self.paths[index.row()]
+        return None
+
+    def headerData(self, section, orientation, role=QtCore.Qt.DisplayRole):
+        if orientation == QtCore.Qt.Horizontal and role == QtCore.Qt.DisplayRole:
+            return catalog_columns[section]
+        return None
+
+    def set_files(self, metadata):
+        """Replaces all rows, given {path: file summary}."""
+        self.beginResetModel()
+        self.paths = sorted(metadata)
+        self.rows = [catalog_row(path, metadata[path]) for path in self.paths]
+        self.row_of_path = {path: n for n, path in enumerate(self.paths)}
+        self.endResetModel()
+
+    def update_file(self, path, metadata):
+        """Updates the row of a file, adding it if new."""
+        row = catalog_row(path, metadata)
+        if path in self.row_of_path:
+            n = self.row_of_path[path]
+            self.rows[n] = row
+            self.dataChanged.emit(self.index(n, 0), self.index(n, len(catalog_columns) - 1))
+        else:
+            n = len(self.rows)
+            self.beginInsertRows(QtCore.QModelIndex(), n, n)
+            self.paths.append(path)
+            self.rows.append(row)
+            self.row_of_path[path] = n
+            self.endInsertRows()
+
+
+class CatalogWidget(QWidget):
+    def __init__(self, parent=None):
+        """Catalog tab: directory selection, indexing progress, filter and table of files."""
+        super().__init__()
+        self.parent = parent
+        self.index = parent.summary_index
+        self.root = None
+        self.thread = None
+
+        self.lin_dir = QLineEdit('')
+        self.lin_dir.setReadOnly(True)
+        self.btn_dir = QPushButton()
+        self.btn_dir.setIcon(self.style().standardIcon(QStyle.SP_DialogOpenButton))
+        self.btn_dir.setToolTip("Choose directory to catalog.")
+        self.btn_dir.clicked.connect(self.choose_directory)
+        self.btn_rescan = QPushButton('Rescan')
+        self.btn_rescan.setIcon(self.style().standardIcon(QStyle.SP_BrowserReload))
+        self.btn_rescan.setToolTip("Index new and modified files.")
+        self.btn_rescan.clicked.connect(self.rescan)
+        self.lin_filter = QLineEdit('')
+        self.lin_filter.setPlaceholderText('Filter...')
+        self.progress = QProgressBar()
+        self.progress.setVisible(False)
+        self.lbl_count = QLabel('')
+
+        self.model = CatalogModel()
+        self.proxy = QtCore.QSortFilterProxyModel()
+        self.proxy.setSourceModel(self.model)
+        self.proxy.setSortRole(QtCore.Qt.UserRole)
+        self.proxy.setFilterKeyColumn(-1)
+        self.proxy.setFilterCaseSensitivity(QtCore.Qt.CaseInsensitive)
+        self.lin_filter.textChanged.connect(self.proxy.setFilterFixedString)
+        self.lin_filter.textChanged.connect(self.update_count)
+        self.table = QTableView()
+        self.table.setModel(self.proxy)
+        self.table.setSortingEnabled(True)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.verticalHeader().setVisible(False)
+        self.table.doubleClicked.connect(self.open_file)
+
+        grid = QGridLayout()
+        grid.setColumnStretch(1, 1)
+        grid.addWidget(QLabel('Directory:'), 0, 0, 1, 1)
+        grid.addWidget(self.lin_dir, 0, 1, 1, 1)
+        grid.addWidget(self.btn_dir, 0, 2, 1, 1)
+        grid.addWidget(self.btn_rescan, 0, 3, 1, 1)
+        grid.addWidget(self.lin_filter, 1, 0, 1, 2)
+        grid.addWidget(self.lbl_count, 1, 2, 1, 2)
+        layout = QVBoxLayout()
+        layout.addLayout(grid)
+        layout.addWidget(self.progress)
+        layout.addWidget(self.table)
+        self.setLayout(layout)
+
+    def choose_directory(self):
+        root = QFileDialog.getExistingDirectory(self, 'Catalog directory')
+        if root != '':
+            self.set_directory(root)
+
+    def set_directory(self, root):
+        """Lists indexed files under root at once, then indexes new and modified files."""
+        self.root = os.path.abspath(root)
+        self.lin_dir.setText(self.root)
+        self.model.set_files(self.index.metadata_under(self.root))
+        self.table.resizeColumnsToContents()
+        self.update_count()
+        self.rescan()
+
+    def rescan(self):
+        if self.root is None:
+            return
+        self.stop()
+        self.thread = CatalogIndexThread(index=self.index, root=self.root, max_workers=catalog_max_workers)
+        self.thread.progress.connect(self.show_progress)
+        self.thread.indexed.connect(self.update_file)
+        self.thread.failed.connect(lambda path, error: self.parent.write_to_logger(
+            'WARNING: could not index ' + path + ': ' + error))
+        self.thread.finished.connect(self.finish_rescan)
+        self.btn_rescan.setEnabled(False)
+        self.thread.start()
+
+    def stop(self):
+        if self.thread is not None:
+            self.thread.requestInterruption()
+            self.thread.wait()
+            self.thread = None
+
+    def show_progress(self, done, total):
+        self.progress.setVisible(done < total)
+        self.progress.setMaximum(total)
+        self.progress.setValue(done)
+
+    def update_file(self, path):
+        metadata = self.index.get_metadata(path)
+        if metadata is not None:
+            self.model.update_file(path, metadata)
+            self.update_count()
+
+    def finish_rescan(self):
+        """Reloads rows, dropping files removed from disk."""
+        self.progress.setVisible(False)
+        self.btn_rescan.setEnabled(True)
+        self.model.set_files(self.index.metadata_under(self.root))
+        self.update_count()
+
+    def update_count(self):
+        self.lbl_count.setText('{} of {} files'.format(self.proxy.rowCount(), self.model.rowCount()))
+
+    def open_file(self, index):
+        path = self.model.paths[self.proxy.mapToSource(index).row()]
+        self.parent.open_nwb_explorer(filename=path)
+        self.parent.tabs.setCurrentIndex(self.parent.tabs.indexOf(self.parent.explorer_tab))
@@ -0,0 +1,186 @@
+"""
+Dialog running the chunk shape and codec advisor on a sample of source data
+
+The chosen settings are stored, by series name, in the storage options of
+the metadata, see utils.chunk_advisor.
+"""
+from PySide2 import QtCore
+from PySide2.QtWidgets import (QDialog, QPushButton, QLineEdit, QLabel, QComboBox,
+                               QTableWidget, QTableWidgetItem, QProgressBar, QGridLayout,
+                               QVBoxLayout, QHBoxLayout, QFileDialog, QAbstractItemView,
+                               QStyle)
+from nwb_qt_gui.utils.chunk_advisor import (open_source, run_benchmarks, score,
+                                            to_storage_options, objectives)
+
+
+class AdvisorThread(QtCore.QThread):
+    progress = QtCore.Signal(int, int)
+    done = QtCore.Signal(object)
+    failed = QtCore.Signal(str)
+
+    def __init__(self, path, dataset_path):
+        """Reads samples of the source and benchmarks them in background."""
+        super().__init__()
+        self.path = path
+        self.dataset_path = dataset_path
+
+    def run(self):
+        try:
+            with open_source(self.path, dataset_path=self.dataset_path) as data:
+                if data.ndim not in (1, 2, 3):
+                    raise ValueError('expected 1 to 3 dimensions (time, ...), got shape ' + str(data.shape))
+                results = run_benchmarks(data, progress=self.progress.emit,
+                                         cancelled=self.isInterruptionRequested)
+        except (OSError, KeyError, ValueError, TypeError) as error:
+            self.failed.emit(str(error))
+        else:
+            self.done.emit(results)
+
+
+class ChunkAdvisorDialog(QDialog):
+    columns = ['chunks', 'codec', 'ratio', 'sample', 'write MB/s', 'time-major read (ms/MB)',
+               'channel-major read (ms/MB)', 'score']
+
+    def __init__(self, parent=None):
+        """Benchmarks chunk shapes and codecs, and stores the chosen ones in parent.storage_options."""
+        super().__init__(parent)
+        self.parent = parent
+        self.thread = None
+        self.results = []
+        self.setWindowTitle('Chunk and codec advisor')
+        self.resize(900, 500)
+
+        self.lin_source = QLineEdit('')
+        self.lin_source.setToolTip("HDF5/NWB file or .npy file with (time, ...) data.")
+        btn_source = QPushButton()
+        btn_source.setIcon(self.style().standardIcon(QStyle.SP_DialogOpenButton))
+        btn_source.clicked.connect(self.choose_source)
+        self.lin_dataset = QLineEdit('')
+        self.lin_dataset.setToolTip("Path of the dataset inside the HDF5/NWB file,\n"
+                                    "e.g. /acquisition/ElectricalSeries/data")
+        self.lin_name = QLineEdit('ElectricalSeries')
+        self.lin_name.setToolTip("Name of the series these settings apply to.")
+        self.cbox_objective = QComboBox()
+        self.cbox_objective.addItems(list(objectives))
+        self.cbox_objective.currentTextChanged.connect(self.show_results)
+        self.btn_run = QPushButton('Run')
+        self.btn_run.clicked.connect(self.run)
+        self.btn_cancel = QPushButton('Cancel')
+        self.btn_cancel.setEnabled(False)
+        self.btn_cancel.clicked.connect(self.cancel)
+        self.progress = QProgressBar()
+        self.lbl_status = QLabel('')
+
+        self.table = QTableWidget(0, len(self.columns))
+        self.table.setHorizontalHeaderLabels(self.columns)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.verticalHeader().setVisible(False)
+
+        self.btn_use = QPushButton('Use selected')
+        self.btn_use.setEnabled(False)
+        self.btn_use.clicked.connect(self.use_selected)
+        btn_close = QPushButton('Close')
+        btn_close.clicked.connect(self.reject)
+
+        grid = QGridLayout()
+        grid.setColumnStretch(1, 1)
+        grid.addWidget(QLabel('Source:'), 0, 0, 1, 1)
+        grid.addWidget(self.lin_source, 0, 1, 1, 2)
+        grid.addWidget(btn_source, 0, 3, 1, 1)
+        grid.addWidget(QLabel('Dataset:'), 1, 0, 1, 1)
+        grid.addWidget(self.lin_dataset, 1, 1, 1, 3)
+        grid.addWidget(QLabel('Series name:'), 2, 0, 1, 1)
+        grid.addWidget(self.lin_name, 2, 1, 1, 3)
+        grid.addWidget(QLabel('Optimize for:'), 3, 0, 1, 1)
+        grid.addWidget(self.cbox_objective, 3, 1, 1, 1)
+        grid.addWidget(self.btn_run, 3, 2, 1, 1)
+        grid.addWidget(self.btn_cancel, 3, 3, 1, 1)
+        buttons = QHBoxLayout()
+        buttons.addWidget(self.lbl_status)
+        buttons.addStretch()
+        buttons.addWidget(self.btn_use)
+        buttons.addWidget(btn_close)
+        layout = QVBoxLayout()
+        layout.addLayout(grid)
+        layout.addWidget(self.progress)
+        layout.addWidget(self.table)
+        layout.addLayout(buttons)
+        self.setLayout(layout)
+
+    def choose_source(self):
+        filename, ftype = QFileDialog.getOpenFileName(
+            parent=self,
+            caption='Source data',
+            directory='',
+            filter="(*.nwb *.h5 *.hdf5 *.npy);;(*)"
+        )
+        if filename != '':
+            self.lin_source.setText(filename)
+
+    def run(self):
+        if not self.lin_source.text():
+            return
+        self.table.setRowCount(0)
+        self.btn_use.setEnabled(False)
+        self.btn_run.setEnabled(False)
+        self.btn_cancel.setEnabled(True)
+        self.lbl_status.setText('Reading samples and benchmarking...')
+        self.thread = AdvisorThread(path=self.lin_source.text(), dataset_path=self.lin_dataset.text() or None)
+        self.thread.progress.connect(lambda done, total: (self.progress.setMaximum(total),
+                                                          self.progress.setValue(done)))
+        self.thread.done.connect(self.set_results)
+        self.thread.failed.connect(lambda error: self.lbl_status.setText('Failed: ' + error))
+        self.thread.finished.connect(self.finish)
+        self.thread.start()
+
+    def cancel(self):
+        if self.thread is not None:
+            self.thread.requestInterruption()
+
+    def finish(self):
+        self.btn_run.setEnabled(True)
+        self.btn_cancel.setEnabled(False)
+
+    def set_results(self, results):
+        self.results = results
+        self.show_results()
+
+    def show_results(self):
+        """Lists results by score for the selected objective, best (recommended) first."""
+        if not self.results:
+            return
+        self.results = score(self.results, objective=self.cbox_objective.currentText())
+        self.table.setRowCount(len(self.results))
+        for n, r in enumerate(self.results):
+            codec = r['compression'] or 'none'
+            if r['compression_opts'] is not None:
+                codec += '(' + str(r['compression_opts']) + ')'
+            if r['shuffle']:
+                codec += ' + shuffle'
+            values = ['x'.join(str(c) for c in r['chunks']), codec, '{:.2f}'.format(r['ratio']),
+                      'x'.join(str(c) for c in r['sample']), '{:.1f}'.format(r['write_MBps'] or 0),
+                      '{:.2f}'.format(1000 * r['time_major_read']),
+                      '{:.2f}'.format(1000 * r['channel_major_read']), '{:.2f}'.format(r['score'])]
+            for col, value in enumerate(values):
+                self.table.setItem(n, col, QTableWidgetItem(value))
+        self.table.resizeColumnsToContents()
+        self.table.selectRow(0)
+        self.btn_use.setEnabled(True)
+        self.lbl_status.setText('Recommended: first row')
+
+    def use_selected(self):
+        rows = self.table.selectionModel().selectedRows()
+        if not rows or not self.lin_name.text():
+            return
+        options = to_storage_options(self.results[rows[0].row()])
+        self.parent.storage_options[self.lin_name.text()] = options
+        self.parent.write_to_logger('Storage options of ' + self.lin_name.text() + ': ' + str(options))
+        self.accept()
+
+    def reject(self):
+        if self.thread is not None:
+            self.thread.requestInterruption()
+            self.thread.wait()
+        super().reject()
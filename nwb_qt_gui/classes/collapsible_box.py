@@ -2,12 +2,18 @@ from PySide2 import QtCore, QtWidgets
 
 
 class CollapsibleBox(QtWidgets.QGroupBox):
+    # Emitted once the contents are built on first expand, see build_content
+    content_ready = QtCore.Signal()
+
     def __init__(self, title="", parent=None):
         """
         Implementation of collapsible boxes:
         https://stackoverflow.com/a/52617714/11483674
         """
         super().__init__(parent)
+        # Subclasses building their contents on first expand set it to False,
+        # see build_content
+        self.content_built = True
 
         self.toggle_button = QtWidgets.QToolButton(
             text=title, checkable=True, checked=False
@@ -47,6 +53,7 @@ class CollapsibleBox(QtWidgets.QGroupBox):
 
     @QtCore.Slot()
     def on_pressed(self):
+        self.ensure_content()
         checked = self.toggle_button.isChecked()
         self.toggle_button.setArrowType(
             QtCore.Qt.DownArrow if not checked else QtCore.Qt.RightArrow
@@ -58,10 +65,26 @@ class CollapsibleBox(QtWidgets.QGroupBox):
         )
         self.toggle_animation.start()
 
+    def build_content(self):
+        """
+        Builds the contents and calls setContentLayout. Called on first expand
+        when content_built is False, so collapsed boxes cost only their title.
+        """
+        pass
+
+    def ensure_content(self):
+        """Builds the contents, if not built yet."""
+        if not self.content_built:
+            self.content_built = True
+            self.build_content()
+            self.content_ready.emit()
+
     def setContentLayout(self, layout):
         lay = self.content_area.layout()
         del lay
-        self.content_area.setLayout(layout)
+        # Forms reused from the widget pool already have their layout
+        if self.content_area.layout() is not layout:
+            self.content_area.setLayout(layout)
         collapsed_height = (
             self.sizeHint().height() - self.content_area.maximumHeight()
         )
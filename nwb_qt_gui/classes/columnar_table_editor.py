@@ -0,0 +1,195 @@
+"""
+Spreadsheet-like editor of a columnar table, see utils.columnar_table
+
+Cells are edited in place. Bulk edits work on whole columns at once:
+fill-down of the selected cells, column expressions on all or on the
+selected rows, number of rows, and csv import/export.
+"""
+from PySide2 import QtCore
+from PySide2.QtWidgets import (QWidget, QPushButton, QLineEdit, QLabel, QComboBox, QSpinBox,
+                               QCheckBox, QTableView, QGridLayout, QVBoxLayout, QFileDialog,
+                               QAbstractItemView)
+
+
+class ColumnarTableModel(QtCore.QAbstractTableModel):
+    def __init__(self, table):
+        """Table model reading and writing cells of a ColumnarTable."""
+        super().__init__()
+        self.table = table
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else self.table.n_rows
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self.table.names)
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        if role in (QtCore.Qt.DisplayRole, QtCore.Qt.EditRole):
+            return self.table.text(index.row(), index.column())
+        return None
+
+    def setData(self, index, value, role=QtCore.Qt.EditRole):
+        if not index.isValid() or role != QtCore.Qt.EditRole:
+            return False
+        try:
+            self.table.set_text(index.row(), index.column(), str(value))
+        except ValueError:
+            return False
+        self.dataChanged.emit(index, index)
+        return True
+
+    def flags(self, index):
+        return QtCore.Qt.ItemIsSelectable | QtCore.Qt.ItemIsEnabled | QtCore.Qt.ItemIsEditable
+
+    def headerData(self, section, orientation, role=QtCore.Qt.DisplayRole):
+        if role != QtCore.Qt.DisplayRole:
+            return None
+        if orientation == QtCore.Qt.Horizontal:
+            return self.table.names[section]
+        return str(section)
+
+    def update(self, edit):
+        """Runs edit(), a bulk edit of the table, and refreshes all views."""
+        self.beginResetModel()
+        try:
+            edit()
+        finally:
+            self.endResetModel()
+
+
+class ColumnarTableEditor(QWidget):
+    def __init__(self, table, parent=None):
+        """Table view of a ColumnarTable with bulk edit tools."""
+        super().__init__()
+        self.parent = parent
+        self.model = ColumnarTableModel(table)
+
+        self.view = QTableView()
+        self.view.setModel(self.model)
+        self.view.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.view.setMinimumHeight(300)
+
+        self.spin_rows = QSpinBox()
+        self.spin_rows.setRange(0, 10 ** 7)
+        self.spin_rows.setValue(table.n_rows)
+        self.spin_rows.setToolTip("Number of rows. Rows are added or removed at the end.")
+        self.spin_rows.editingFinished.connect(self.resize)
+        self.btn_fill_down = QPushButton('Fill down')
+        self.btn_fill_down.setToolTip("Copies the first selected value of each column to the selected cells below.")
+        self.btn_fill_down.clicked.connect(self.fill_down)
+
+        self.combo_column = QComboBox()
+        self.combo_column.addItems(table.names)
+        self.lin_expression = QLineEdit('')
+        self.lin_expression.setPlaceholderText("e.g. row * 20, x + 100, location + '_L'")
+        self.lin_expression.setToolTip(
+            "Arithmetic expression over columns (by name), numbers, strings and row (the row number).")
+        self.lin_expression.returnPressed.connect(self.apply_expression)
+        self.chk_selected = QCheckBox('Selected rows only')
+        self.btn_apply = QPushButton('Apply')
+        self.btn_apply.clicked.connect(self.apply_expression)
+
+        self.btn_import = QPushButton('Import csv')
+        self.btn_import.clicked.connect(self.import_csv)
+        self.btn_export = QPushButton('Export csv')
+        self.btn_export.clicked.connect(self.export_csv)
+        self.lbl_status = QLabel('')
+
+        grid = QGridLayout()
+        grid.setColumnStretch(3, 1)
+        grid.addWidget(QLabel('rows:'), 0, 0, 1, 1)
+        grid.addWidget(self.spin_rows, 0, 1, 1, 1)
+        grid.addWidget(self.btn_fill_down, 0, 2, 1, 1)
+        grid.addWidget(self.btn_import, 0, 4, 1, 1)
+        grid.addWidget(self.btn_export, 0, 5, 1, 1)
+        grid.addWidget(self.combo_column, 1, 0, 1, 1)
+        grid.addWidget(QLabel('='), 1, 1, 1, 1, QtCore.Qt.AlignCenter)
+        grid.addWidget(self.lin_expression, 1, 2, 1, 2)
+        grid.addWidget(self.chk_selected, 1, 4, 1, 1)
+        grid.addWidget(self.btn_apply, 1, 5, 1, 1)
+        layout = QVBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addLayout(grid)
+        layout.addWidget(self.view)
+        layout.addWidget(self.lbl_status)
+        self.setLayout(layout)
+
+    @property
+    def table(self):
+        return self.model.table
+
+    def refresh(self):
+        """Updates the tools after the table columns or rows changed."""
+        self.spin_rows.setValue(self.table.n_rows)
+        current = self.combo_column.currentText()
+        self.combo_column.clear()
+        self.combo_column.addItems(self.table.names)
+        if current in self.table.names:
+            self.combo_column.setCurrentText(current)
+
+    def set_columns(self, data):
+        """Replaces the table with {name: list of values}."""
+        self.model.update(lambda: self.table.set_columns(data))
+        self.refresh()
+
+    def resize(self):
+        if self.spin_rows.value() != self.table.n_rows:
+            self.model.update(lambda: self.table.resize(self.spin_rows.value()))
+
+    def selected_rows_by_column(self):
+        """Returns {column: rows} of the selected cells."""
+        selected = {}
+        for index in self.view.selectionModel().selectedIndexes():
+            selected.setdefault(index.column(), []).append(index.row())
+        return selected
+
+    def fill_down(self):
+        selected = self.selected_rows_by_column()
+        for col, rows in selected.items():
+            self.table.fill_down(col, rows)
+            self.model.dataChanged.emit(self.model.index(min(rows), col), self.model.index(max(rows), col))
+
+    def apply_expression(self):
+        name = self.combo_column.currentText()
+        expression = self.lin_expression.text()
+        if not name or not expression.strip():
+            return
+        rows = None
+        if self.chk_selected.isChecked():
+            rows = sorted({index.row() for index in self.view.selectionModel().selectedIndexes()})
+        try:
+            self.model.update(lambda: self.table.assign(name, expression, rows=rows))
+        except (ValueError, TypeError, ZeroDivisionError) as error:
+            self.lbl_status.setText('Expression failed: ' + str(error))
+        else:
+            self.lbl_status.setText('')
+
+    def import_csv(self):
+        filename, ftype = QFileDialog.getOpenFileName(
+            parent=self,
+            caption='Import csv',
+            directory='',
+            filter="(*.csv);;(*)"
+        )
+        if filename == '':
+            return
+        try:
+            self.model.update(lambda: self.table.read_csv(filename))
+        except (OSError, ValueError) as error:
+            self.lbl_status.setText('Import failed: ' + str(error))
+        else:
+            self.lbl_status.setText('Imported ' + str(self.table.n_rows) + ' rows')
+        self.refresh()
+
+    def export_csv(self):
+        filename, _ = QFileDialog.getSaveFileName(self, 'Export csv', '', "(*.csv)")
+        if filename == '':
+            return
+        try:
+            self.table.write_csv(filename)
+        except OSError as error:
+            self.lbl_status.setText('Export failed: ' + str(error))
+        else:
+            self.lbl_status.setText('Exported ' + str(self.table.n_rows) + ' rows')
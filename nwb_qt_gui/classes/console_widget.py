@@ -1,33 +1,131 @@
 from qtconsole.rich_jupyter_widget import RichJupyterWidget
 from qtconsole.inprocess import QtInProcessKernelManager
+from qtconsole.manager import QtKernelManager
+import psutil
 
 
 class ConsoleWidget(RichJupyterWidget):
 
-    def __init__(self, par=None):
+    def __init__(self, par=None, out_of_process=False):
         super().__init__()
         self.par = par
 
         self.font_size = 6
+        # Memory of the GUI process before the in-process kernel runs any code
+        self.base_memory = psutil.Process().memory_info().rss
         self.kernel_manager = kernel_manager = QtInProcessKernelManager()
         kernel_manager.start_kernel(show_banner=False)
         kernel_manager.kernel.gui = 'qt'
         self.kernel_client = kernel_client = self._kernel_manager.client()
         kernel_client.start_channels()
+        # In-process kernel, used unless a kernel process is started
+        self.inprocess_kernel_manager = kernel_manager
+        self.inprocess_kernel_client = kernel_client
+        # Kernel owned by the console, restored when detaching from an external kernel:
+        # the in-process kernel or a kernel process
+        self.own_kernel_manager = kernel_manager
+        self.own_kernel_client = kernel_client
+        if out_of_process:
+            self.start_process_kernel()
 
         def stop():
+            self.shutdown_process_kernel()
             kernel_client.stop_channels()
             kernel_manager.shutdown_kernel()
             guisupport.get_app_qt().exit()
 
         self.exit_requested.connect(stop)
 
+    def start_process_kernel(self):
+        """
+        Runs the console kernel in a separate process, so code typed on the
+        console never blocks the GUI. Replaces any previous kernel process.
+        """
+        self.detach_kernel()
+        self.shutdown_process_kernel()
+        kernel_manager = QtKernelManager(kernel_name='python3')
+        kernel_manager.start_kernel()
+        kernel_client = kernel_manager.client()
+        kernel_client.start_channels()
+        self.own_kernel_manager = self.kernel_manager = kernel_manager
+        self.own_kernel_client = self.kernel_client = kernel_client
+
+    def shutdown_process_kernel(self):
+        """Stops the kernel process, if any, and returns to the in-process kernel."""
+        if not self.is_out_of_process():
+            return
+        self.detach_kernel()
+        self.own_kernel_client.stop_channels()
+        self.own_kernel_manager.shutdown_kernel(now=True)
+        self.own_kernel_manager = self.kernel_manager = self.inprocess_kernel_manager
+        self.own_kernel_client = self.kernel_client = self.inprocess_kernel_client
+
+    def is_out_of_process(self):
+        """Whether the console owns a kernel process."""
+        return self.own_kernel_manager is not self.inprocess_kernel_manager
+
+    def memory_usage(self):
+        """
+        Returns the resident memory in bytes of the console own kernel: of its process,
+        or, for the in-process kernel, the memory grown by the GUI process since the console started.
+        """
+        try:
+            if not self.is_out_of_process():
+                return max(psutil.Process().memory_info().rss - self.base_memory, 0)
+            manager = self.own_kernel_manager
+            # Kernel process handle: provisioner process (jupyter_client >= 7) or Popen
+            process = getattr(getattr(manager, 'provisioner', None), 'process', None) or \
+                getattr(manager, 'kernel', None)
+            if getattr(process, 'pid', None) is None:
+                return 0
+            return psutil.Process(process.pid).memory_info().rss
+        except psutil.Error:
+            return 0
+
+    def interrupt_kernel(self):
+        """Interrupts code running on the kernel process."""
+        if self.is_out_of_process() and not self.is_attached():
+            self.own_kernel_manager.interrupt_kernel()
+
+    def restart_kernel(self):
+        """Restarts the kernel process. All variables are lost."""
+        if self.is_out_of_process() and not self.is_attached():
+            self.own_kernel_manager.restart_kernel(now=True)
+
+    def attach_kernel(self, connection_file):
+        """
+        Connects the console to an existing kernel, e.g. the kernel of a Voila
+        page, given its connection file. The kernel is not owned by the console.
+        """
+        self.detach_kernel()
+        kernel_manager = QtKernelManager(connection_file=connection_file)
+        kernel_manager.load_connection_file()
+        kernel_client = kernel_manager.client()
+        kernel_client.start_channels()
+        self.kernel_manager = kernel_manager
+        self.kernel_client = kernel_client
+
+    def detach_kernel(self):
+        """Disconnects from an external kernel and returns to the console own kernel."""
+        if self.is_attached():
+            self.kernel_client.stop_channels()
+            self.kernel_manager = self.own_kernel_manager
+            self.kernel_client = self.own_kernel_client
+
+    def is_attached(self):
+        """Whether the console is connected to an external kernel."""
+        return self.kernel_manager is not self.own_kernel_manager
+
+    def run_silent(self, code):
+        """Silently runs code on the console own kernel, even while attached to an external kernel."""
+        self.own_kernel_client.execute(code, silent=True, store_history=False)
+
     def push_vars(self, variableDict):
         """
         Given a dictionary containing name / value pairs, push those variables
         to the Jupyter console widget
         """
-        self.kernel_manager.kernel.shell.push(variableDict)
+        self.inprocess_kernel_manager.kernel.shell.push(variableDict)
 
     def clear(self):
         """
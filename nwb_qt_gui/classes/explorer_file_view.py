@@ -0,0 +1,135 @@
+"""
+View of one NWB file opened on the explorer
+
+Each open file has its own widgets page (and Voila kernel) and tree view.
+When the file is evicted to bound memory, its HDF5 handle and kernel are
+released and the view shows the summary of the file stored on the summary
+index instead, until it is reopened.
+"""
+from PySide2 import QtCore
+from PySide2.QtWebEngineWidgets import QWebEngineView
+from PySide2.QtWidgets import (QWidget, QTabWidget, QStackedWidget, QTextEdit,
+                               QPushButton, QVBoxLayout)
+from nwb_qt_gui.classes.h5_tree import H5TreeWidget, _format_bytes
+from nwb_qt_gui.classes.storage_widget import StorageAnalyzerWidget
+import html
+import os
+import sqlite3
+
+
+class ExplorerFileView(QWidget):
+    def __init__(self, fname, mode, parent=None):
+        """
+        Parameters
+        ----------
+        fname : str
+            Path to the NWB file.
+        mode : str
+            'quick' (tree view only), 'shared' or 'separate' (console kernel).
+        parent : Application
+        """
+        super().__init__()
+        self.parent = parent
+        self.fname = fname
+        self.mode = mode
+        self.is_open = False
+        self.summary = None
+        # Shared mode: file receiving the Voila kernel connection file path
+        self.kernel_file = None
+        self.connection_file = None
+
+        self.h5_tree = H5TreeWidget(parent=self)
+        self.views = QTabWidget()
+        if mode == 'quick':
+            self.html = None
+        else:
+            self.html = QWebEngineView()
+            self.views.addTab(self.html, 'Widgets')
+        self.views.addTab(self.h5_tree, 'Tree')
+        self.storage = StorageAnalyzerWidget(fname=fname, parent=self)
+        self.views.addTab(self.storage, 'Storage')
+
+        # Shown while the file is closed
+        self.summary_view = QTextEdit()
+        self.summary_view.setReadOnly(True)
+        self.btn_reopen = QPushButton('Reopen')
+        self.btn_reopen.clicked.connect(lambda: self.parent.open_explorer_file(self))
+        summary_layout = QVBoxLayout()
+        summary_layout.addWidget(self.btn_reopen)
+        summary_layout.addWidget(self.summary_view)
+        summary_page = QWidget()
+        summary_page.setLayout(summary_layout)
+
+        self.stack = QStackedWidget()
+        self.stack.addWidget(self.views)
+        self.stack.addWidget(summary_page)
+        layout = QVBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(self.stack)
+        self.setLayout(layout)
+
+    def open_file(self):
+        """Opens file structure on tree view, no data is read."""
+        self.h5_tree.open_file(self.fname)
+        self.connection_file = None
+        self.is_open = True
+        self.stack.setCurrentIndex(0)
+        if self.html is not None:
+            self.views.setCurrentWidget(self.html)
+
+    def close_file(self, refresh=True):
+        """
+        Releases the HDF5 handle and the Voila kernel, showing the stored summary
+        of the file. If it is stale, it is shown until refreshed in background.
+        """
+        if not self.is_open:
+            return
+        self.h5_tree.close_file()
+        self.storage.stop()
+        if self.html is not None:
+            # Leaving the page shuts down its kernel, the Voila server keeps running
+            self.html.setUrl(QtCore.QUrl('about:blank'))
+        self.connection_file = None
+        self.is_open = False
+        if not self.show_summary() and refresh:
+            self.parent.refresh_summaries(paths=[self.fname], on_refreshed=self.show_summary)
+        self.stack.setCurrentIndex(1)
+
+    def show_summary(self, path=None):
+        """
+        Shows the stored summary of the file while it is closed, a stale one if it
+        was not refreshed yet. Returns True if the summary shown is up to date.
+        """
+        if self.is_open or (path is not None and os.path.abspath(path) != os.path.abspath(self.fname)):
+            return False
+        index = self.parent.summary_index
+        try:
+            summary = index.get(self.fname)
+            fresh = summary is not None
+            if not fresh:
+                summary = index.get_metadata(self.fname)
+        except (OSError, sqlite3.Error, ValueError):
+            summary, fresh = None, False
+        self.summary = summary
+        if summary is None:
+            self.summary_view.setHtml('<b>' + html.escape(os.path.basename(self.fname)) + '</b> (closed)<br>' +
+                                      html.escape(self.fname) + '<br>Summary not available yet.')
+        else:
+            self.summary_view.setHtml(summary_html(self.fname, summary))
+        return fresh
+
+
+def summary_html(fname, summary):
+    """Returns an html description of a file summary, see utils.summary_index.compute_summary."""
+    txt = '<b>' + html.escape(os.path.basename(fname)) + '</b> (closed)<br>' + html.escape(fname)
+    txt += '<br>{}, {} objects, {} of datasets stored<table>'.format(
+        _format_bytes(summary['size']), summary['n_objects'], _format_bytes(summary['storage_size']))
+    for k, v in summary['session'].items():
+        txt += '<tr><td>' + k + ':</td><td>' + html.escape(str(v)) + '</td></tr>'
+    txt += '</table>'
+    for group_name, children in summary['groups'].items():
+        txt += '<br><b>' + group_name + '</b><table>'
+        for k, v in children.items():
+            txt += '<tr><td>' + html.escape(k) + '</td><td>' + html.escape(v) + '</td></tr>'
+        txt += '</table>'
+    return txt
@@ -37,8 +37,25 @@ class BasicFormCollapsible(CollapsibleBox):
         self.fill_fields_info()
         # Updates specific fields from specific classes that inherit BasicFormCollapsible
         self.fields_info_update()
-        # Constructs GUI forms using self.fields_info dictionary
+        # GUI forms are constructed on first expand, until then fields values
+        # are kept in self.metadata. The name form is always present, as it is
+        # referenced by other groups
+        self.form_name = QLineEdit('')
+        self.content_built = False
+
+    def build_content(self):
+        """Constructs GUI forms and writes the stored fields values to them."""
+        stored = self.metadata
         self.make_forms()
+        if stored:
+            self.write_fields(metadata=dict(stored, name=self.form_name.text()))
+            self.refresh_objects_references()
+            # Keeps the stored links selected after the comboboxes are refreshed
+            for field in self.fields_info:
+                if field['type'] == 'link' and field['name'] in stored:
+                    getattr(self, 'form_' + field['name']).setCurrentText(str(stored[field['name']]))
+        else:
+            self.setContentLayout(self.grid)
 
     def fill_fields_info(self):
         """Fills the fields info details dictionary."""
@@ -97,8 +114,11 @@ class BasicFormCollapsible(CollapsibleBox):
             else:
                 field_label = field['name'] + ":"
 
+            # The name form already exists
+            if field['name'] == 'name':
+                form = self.form_name
             # String types
-            if field['type'] == 'str':
+            elif field['type'] == 'str':
                 form = QLineEdit('')
             # Float types
             elif field['type'] == 'float':
@@ -126,6 +146,9 @@ class BasicFormCollapsible(CollapsibleBox):
         Refreshes references with existing objects in parent / grandparent groups.
         Refreshes children's references.
         """
+        # References of forms not built yet are kept in self.metadata
+        if not self.content_built:
+            return
         # Refreshes self comboboxes
         for field in self.fields_info:
             if field['type'] == 'link':
@@ -149,6 +172,12 @@ class BasicFormCollapsible(CollapsibleBox):
 
     def read_fields(self):
         """Reads fields and returns them structured in a dictionary."""
+        # Forms never expanded return the stored fields values, forms of new
+        # groups without stored values are built to read their defaults
+        if not self.content_built:
+            if self.metadata:
+                return dict(self.metadata, name=self.form_name.text())
+            self.ensure_content()
         metadata = {}
         n_fields = self.grid.rowCount()
         for i in range(n_fields):
@@ -176,6 +205,12 @@ class BasicFormCollapsible(CollapsibleBox):
 
     def write_fields(self, metadata={}):
         """Reads structured dictionary and write in form fields."""
+        # Forms not built yet only store the fields values
+        if not self.content_built:
+            self.metadata = dict(self.metadata or {}, **metadata)
+            if 'name' in metadata:
+                self.form_name.setText(str(metadata['name']))
+            return
         # Loops through fields info list
         for i, field in enumerate(self.fields_info):
             # Write metadata to field
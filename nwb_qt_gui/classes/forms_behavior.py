@@ -228,6 +228,7 @@ class GroupBehavior(QGroupBox):
         """Groupbox for Behavior modules fields filling forms."""
         super().__init__()
         self.setTitle('Behavior')
+        self.parent = parent
         self.group_type = 'Behavior'
         self.groups_list = []
 
@@ -273,6 +274,8 @@ class GroupBehavior(QGroupBox):
         self.combo1.setCurrentIndex(0)
         # self.combo2.addItem(group.form_name.text())
         self.refresh_children(metadata=metadata)
+        # Edits of the group forms are autosaved
+        self.parent.watch_edits(group)
 
     def del_group(self, group_name):
         """Deletes group form by name."""
@@ -287,6 +290,8 @@ class GroupBehavior(QGroupBox):
                                     "deleting it!")
                 self.combo2.setCurrentIndex(0)
             else:
+                # Forms before deleting are an undo step
+                self.parent.checkpoint()
                 nWidgetsVbox = self.vbox1.count()
                 for i in range(nWidgetsVbox):
                     if self.vbox1.itemAt(i) is not None:
@@ -309,6 +314,11 @@ class GroupBehavior(QGroupBox):
                     if isinstance(ch, (CustomComboBox, QComboBox)):
                         if ch.currentText() == grp_unique_name:
                             return True
+                # subgroups not expanded yet keep their references in their stored metadata
+                if not getattr(other_grp, 'content_built', True) and other_grp.metadata:
+                    for k, v in other_grp.metadata.items():
+                        if k != 'name' and v == grp_unique_name:
+                            return True
         return False
 
     def refresh_children(self, metadata=None):
@@ -324,8 +334,13 @@ class GroupBehavior(QGroupBox):
             self.combo2.addItem(child.form_name.text())
         self.refresh_children()
 
-    def read_fields(self):
-        """Reads fields and returns them structured in a dictionary."""
+    def read_fields(self, read=None):
+        """
+        Reads fields and returns them structured in a dictionary.
+        Groups are read with read(group) if given, e.g. from a cache.
+        """
+        if read is None:
+            read = lambda grp: grp.read_fields()
         error = None
         data = {}
         # group_type counts, if there are multiple groups of same type, they are saved in a list
@@ -338,9 +353,9 @@ class GroupBehavior(QGroupBox):
         # iterate over existing groups and copy their metadata
         for grp in self.groups_list:
             if grp_type_count[grp.group_type] > 1 or grp.group_type in ['Device', 'TimeSeries', 'SpatialSeries']:
-                data[grp.group_type].append(grp.read_fields())
+                data[grp.group_type].append(read(grp))
             else:
-                data[grp.group_type] = grp.read_fields()
+                data[grp.group_type] = read(grp)
         return data, error
 
 
@@ -5,6 +5,8 @@ from nwb_qt_gui.classes.forms_general import GroupDevice
 from nwb_qt_gui.classes.forms_misc import GroupDecompositionSeries
 from nwb_qt_gui.classes.collapsible_box import CollapsibleBox
 from nwb_qt_gui.classes.forms_basic import BasicFormCollapsible
+from nwb_qt_gui.classes.columnar_table_editor import ColumnarTableEditor
+from nwb_qt_gui.utils.columnar_table import ColumnarTable, electrodes_columns
 import pynwb
 from itertools import groupby
 
@@ -26,16 +28,110 @@ class GroupElectrodeGroup(BasicFormCollapsible):
         self.fields_info.extend(specific_fields)
 
 
+class GroupElectrodes(CollapsibleBox):
+    def __init__(self, parent):
+        """Groupbox for the electrodes table, edited as a spreadsheet and stored as columns."""
+        super().__init__(title='Electrodes', parent=parent)
+        self.parent = parent
+        self.group_type = 'Electrodes'
+        # The table is built on first expand, until then it is kept in self.metadata
+        self.metadata = None
+        self.form_name = QLineEdit('electrodes')
+        self.form_name.setToolTip("The name of the electrodes table.")
+        self.content_built = False
+        # Columns that could not be loaded in the table, returned as they are
+        # until the table is edited, so they are not lost on saving
+        self.invalid_columns = None
+
+    def build_content(self):
+        """Builds the table editor with the stored columns."""
+        self.lbl_name = QLabel('name<span style="color:' + required_asterisk_color + ';">*</span>:')
+        self.table = ColumnarTable(columns=electrodes_columns)
+        self.editor = ColumnarTableEditor(table=self.table, parent=self)
+        if self.metadata:
+            self.load_columns(self.metadata.get('columns') or {})
+        self.editor.model.dataChanged.connect(self.discard_invalid_columns)
+        self.editor.model.modelReset.connect(self.discard_invalid_columns)
+
+        self.grid = QGridLayout()
+        self.grid.setColumnStretch(4, 1)
+        self.grid.addWidget(self.lbl_name, 0, 0, 1, 2)
+        self.grid.addWidget(self.form_name, 0, 2, 1, 4)
+        self.grid.addWidget(self.editor, 1, 0, 1, 6)
+        self.setContentLayout(self.grid)
+
+    def load_columns(self, columns):
+        """Loads columns in the table. Invalid columns are reported and kept, see invalid_columns."""
+        try:
+            self.editor.set_columns(columns)
+        except ValueError as error:
+            self.invalid_columns = columns
+            self.editor.lbl_status.setText('Invalid columns, kept unchanged until edited: ' + str(error))
+            QMessageBox.warning(self, "Invalid electrodes table",
+                                "The electrodes columns could not be loaded:\n" + str(error) + "\n\n"
+                                "They are saved unchanged until the table is edited.")
+        else:
+            self.invalid_columns = None
+
+    def discard_invalid_columns(self):
+        """Edits replace the invalid columns with the table."""
+        if self.invalid_columns is not None:
+            self.invalid_columns = None
+            self.editor.lbl_status.setText('')
+
+    def references(self):
+        """Returns the names of the ElectrodeGroups referenced by the electrodes."""
+        if not self.content_built:
+            return set(((self.metadata or {}).get('columns') or {}).get('group') or [])
+        if self.invalid_columns is not None:
+            return set(self.invalid_columns.get('group') or [])
+        return set(self.table.columns['group'].tolist())
+
+    def refresh_objects_references(self, metadata=None):
+        """Refreshes references with existing objects in parent group."""
+        pass
+
+    def read_fields(self):
+        """Reads fields and returns them structured in a dictionary."""
+        # Tables never expanded return the stored columns
+        if not self.content_built:
+            if self.metadata:
+                return dict(self.metadata, name=self.form_name.text())
+            self.ensure_content()
+        data = {}
+        data['name'] = self.form_name.text()
+        if self.invalid_columns is not None:
+            data['columns'] = self.invalid_columns
+        else:
+            data['columns'] = self.table.to_columns()
+        return data
+
+    def write_fields(self, metadata={}):
+        """Reads structured dictionary and write in form fields."""
+        self.form_name.setText(metadata.get('name', 'electrodes'))
+        if not self.content_built:
+            self.metadata = metadata
+            return
+        self.load_columns(metadata.get('columns') or {})
+
+
 class GroupElectricalSeries(CollapsibleBox):
     def __init__(self, parent):
         """Groupbox for pynwb.ecephys.ElectricalSeries fields filling form."""
         super().__init__(title="ElectricalSeries", parent=parent)
         self.parent = parent
         self.group_type = 'ElectricalSeries'
-
-        self.lbl_name = QLabel('name<span style="color:' + required_asterisk_color + ';">*</span>:')
+        # Forms are built on first expand, until then fields values are kept
+        # in self.metadata. The name form is always present, as it is
+        # referenced by other groups
+        self.metadata = None
         self.form_name = QLineEdit('ElectricalSeries')
         self.form_name.setToolTip("The unique name of this ElectricalSeries dataset.")
+        self.content_built = False
+
+    def build_content(self):
+        """Builds the forms and writes the stored fields values to them."""
+        self.lbl_name = QLabel('name<span style="color:' + required_asterisk_color + ';">*</span>:')
 
         self.lbl_electrodes = QLabel('electrodes<span style="color:' + required_asterisk_color + ';">*</span>:')
         self.chk_electrodes = QCheckBox("Get from source file")
@@ -105,6 +201,8 @@ class GroupElectricalSeries(CollapsibleBox):
         self.grid.addWidget(self.lbl_description, 9, 0, 1, 2)
         self.grid.addWidget(self.form_description, 9, 2, 1, 4)
         self.setContentLayout(self.grid)
+        if self.metadata:
+            self.write_fields(metadata=dict(self.metadata, name=self.form_name.text()))
 
     def refresh_objects_references(self, metadata=None):
         """Refreshes references with existing objects in parent group."""
@@ -112,6 +210,11 @@ class GroupElectricalSeries(CollapsibleBox):
 
     def read_fields(self):
         """Reads fields and returns them structured in a dictionary."""
+        # Forms never expanded return the stored fields values
+        if not self.content_built:
+            if self.metadata:
+                return dict(self.metadata, name=self.form_name.text())
+            self.ensure_content()
         data = {}
         data['name'] = self.form_name.text()
         if self.chk_electrodes.isChecked():
@@ -141,6 +244,10 @@ class GroupElectricalSeries(CollapsibleBox):
     def write_fields(self, metadata={}):
         """Reads structured dictionary and write in form fields."""
         self.form_name.setText(metadata['name'])
+        # Forms not built yet only store the fields values
+        if not self.content_built:
+            self.metadata = metadata
+            return
         self.chk_electrodes.setChecked(True)
         if 'conversion' in metadata:
             self.form_conversion.setText(str(metadata['conversion']))
@@ -594,6 +701,7 @@ class GroupEcephys(QGroupBox):
         """Groupbox for Ecephys module fields filling form."""
         super().__init__()
         self.setTitle('Ecephys')
+        self.parent = parent
         self.group_type = 'Ecephys'
         self.groups_list = []
 
@@ -601,6 +709,7 @@ class GroupEcephys(QGroupBox):
         self.combo1.addItem('-- Add group --')
         self.combo1.addItem('Device')
         self.combo1.addItem('ElectrodeGroup')
+        self.combo1.addItem('Electrodes')
         self.combo1.addItem('ElectricalSeries')
         self.combo1.addItem('SpikeEventSeries')
         self.combo1.addItem('EventDetection')
@@ -638,6 +747,8 @@ class GroupEcephys(QGroupBox):
         self.combo1.setCurrentIndex(0)
         self.combo2.addItem(group.form_name.text())
         self.refresh_children(metadata=metadata)
+        # Edits of the group forms are autosaved
+        self.parent.watch_edits(group)
 
     def del_group(self, group_name):
         """Deletes group form by name."""
@@ -652,6 +763,8 @@ class GroupEcephys(QGroupBox):
                                     "deleting it!")
                 self.combo2.setCurrentIndex(0)
             else:
+                # Forms before deleting are an undo step
+                self.parent.checkpoint()
                 nWidgetsVbox = self.vbox1.count()
                 for i in range(nWidgetsVbox):
                     if self.vbox1.itemAt(i) is not None:
@@ -674,6 +787,14 @@ class GroupEcephys(QGroupBox):
                     if isinstance(ch, (CustomComboBox, QComboBox)):
                         if ch.currentText() == grp_unique_name:
                             return True
+                # the electrodes table references electrode groups by name
+                if hasattr(other_grp, 'references') and grp_unique_name in other_grp.references():
+                    return True
+                # subgroups not expanded yet keep their references in their stored metadata
+                if not getattr(other_grp, 'content_built', True) and other_grp.metadata:
+                    for k, v in other_grp.metadata.items():
+                        if k != 'name' and v == grp_unique_name:
+                            return True
         return False
 
     def refresh_children(self, metadata=None):
@@ -689,8 +810,13 @@ class GroupEcephys(QGroupBox):
             self.combo2.addItem(child.form_name.text())
         self.refresh_children()
 
-    def read_fields(self):
-        """Reads fields and returns them structured in a dictionary."""
+    def read_fields(self, read=None):
+        """
+        Reads fields and returns them structured in a dictionary.
+        Groups are read with read(group) if given, e.g. from a cache.
+        """
+        if read is None:
+            read = lambda grp: grp.read_fields()
         error = None
         data = {}
         # group_type counts, if there are multiple groups of same type, they are saved in a list
@@ -704,9 +830,9 @@ class GroupEcephys(QGroupBox):
         for grp in self.groups_list:
             if grp_type_count[grp.group_type] > 1 or grp.group_type == 'Device' \
                or grp.group_type == 'ElectrodeGroup' or grp.group_type == 'ElectricalSeries':
-                data[grp.group_type].append(grp.read_fields())
+                data[grp.group_type].append(read(grp))
             else:
-                data[grp.group_type] = grp.read_fields()
+                data[grp.group_type] = read(grp)
         return data, error
 
 
@@ -188,8 +188,11 @@ class GroupNwbfile(CollapsibleBox):
         #self.setLayout(self.grid)
         self.setContentLayout(self.grid)
 
-    def read_fields(self):
-        """Reads fields and returns them structured in a dictionary."""
+    def read_fields(self, log=True):
+        """
+        Reads fields and returns them structured in a dictionary. Invalid fields
+        are reported on the logger, unless log is False (e.g. background reads).
+        """
         error = None
         data = {}
         data['session_description'] = self.form_session_description.text()
@@ -198,9 +201,10 @@ class GroupNwbfile(CollapsibleBox):
         try:
             data['session_start_time'] = datetime.strptime(str_datetime, '%d/%m/%Y, %H:%M')
         except Exception as error:
-            self.parent.write_to_logger(str(error))
-            self.parent.write_to_logger("ERROR: Invalid 'session_start_time' format. "
-                                        "Please fill in correct format.")
+            if log:
+                self.parent.write_to_logger(str(error))
+                self.parent.write_to_logger("ERROR: Invalid 'session_start_time' format. "
+                                            "Please fill in correct format.")
             return None, error
         if self.form_experimenter.text() != '':
             data['experimenter'] = self.form_experimenter.text()
@@ -381,8 +385,11 @@ class GroupSubject(CollapsibleBox):
         #self.setLayout(self.grid)
         self.setContentLayout(self.grid)
 
-    def read_fields(self):
-        """Reads fields and returns them structured in a dictionary."""
+    def read_fields(self, log=True):
+        """
+        Reads fields and returns them structured in a dictionary. Invalid fields
+        are reported on the logger, unless log is False (e.g. background reads).
+        """
         error = None
         data = {}
         data['age'] = self.form_age.text()
@@ -394,7 +401,14 @@ class GroupSubject(CollapsibleBox):
         data['weight'] = self.form_weight.text()
         str_datetime = self.form_date_of_birth.text()
         if len(str_datetime) > 0:
-            data['date_of_birth'] = datetime.strptime(str_datetime, '%d/%m/%Y')
+            try:
+                data['date_of_birth'] = datetime.strptime(str_datetime, '%d/%m/%Y')
+            except ValueError as error:
+                if log:
+                    self.parent.write_to_logger(str(error))
+                    self.parent.write_to_logger("ERROR: Invalid 'date_of_birth' format. "
+                                                "Please fill in correct format.")
+                return None, error
         else:
             data['date_of_birth'] = ''
         return data, error
@@ -544,7 +558,8 @@ class GroupCustomExtension(QGroupBox):
                 self.metadata[key] = float(attr.text())
             elif isinstance(self.metadata[key], str):
                 self.metadata[key] = attr.text()
-        return self.metadata, error
+        # A copy, the stored metadata changes on the next read
+        return dict(self.metadata), error
 
     def write_fields(self, data={}):
         """Reads structured dictionary and write in form fields."""
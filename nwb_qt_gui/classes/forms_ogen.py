@@ -43,6 +43,7 @@ class GroupOgen(QGroupBox):
         """Groupbox for Ogen module fields filling form."""
         super().__init__()
         self.setTitle('Ogen')
+        self.parent = parent
         self.group_type = 'Ogen'
         self.groups_list = []
 
@@ -63,6 +64,8 @@ class GroupOgen(QGroupBox):
         nWidgetsVbox = self.vbox1.count()
         self.vbox1.insertWidget(nWidgetsVbox - 1, group)  # insert before the stretch
         self.refresh_children(metadata=metadata)
+        # Edits of the group forms are autosaved
+        self.parent.watch_edits(group)
 
     def is_referenced(self, grp_unique_name):
         """Tests if a group is being referenced any other groups. Returns boolean."""
@@ -75,6 +78,11 @@ class GroupOgen(QGroupBox):
                     if isinstance(ch, (CustomComboBox, QComboBox)):
                         if ch.currentText() == grp_unique_name:
                             return True
+                # subgroups not expanded yet keep their references in their stored metadata
+                if not getattr(other_grp, 'content_built', True) and other_grp.metadata:
+                    for k, v in other_grp.metadata.items():
+                        if k != 'name' and v == grp_unique_name:
+                            return True
         return False
 
     def refresh_children(self, metadata=None):
@@ -82,8 +90,13 @@ class GroupOgen(QGroupBox):
         for child in self.groups_list:
             child.refresh_objects_references(metadata=metadata)
 
-    def read_fields(self):
-        """Reads fields and returns them structured in a dictionary."""
+    def read_fields(self, read=None):
+        """
+        Reads fields and returns them structured in a dictionary.
+        Groups are read with read(group) if given, e.g. from a cache.
+        """
+        if read is None:
+            read = lambda grp: grp.read_fields()
         error = None
         data = {}
         # group_type counts, if there are multiple groups of same type, they are saved in a list
@@ -98,9 +111,9 @@ class GroupOgen(QGroupBox):
             if grp_type_count[grp.group_type] > 1 or grp.group_type == 'Device' \
                or grp.group_type == 'OptogeneticStimulusSite' \
                or grp.group_type == 'OptogeneticSeries':
-                data[grp.group_type].append(grp.read_fields())
+                data[grp.group_type].append(read(grp))
             else:
-                data[grp.group_type] = grp.read_fields()
+                data[grp.group_type] = read(grp)
         return data, error
 
 
@@ -47,10 +47,17 @@ class GroupTwoPhotonSeries(CollapsibleBox):
         #self.setTitle('TwoPhotonSeries')
         self.parent = parent
         self.group_type = 'TwoPhotonSeries'
-
-        self.lbl_name = QLabel('name<span style="color:'+required_asterisk_color+';">*</span>:')
+        # Forms are built on first expand, until then fields values are kept
+        # in self.metadata. The name form is always present, as it is
+        # referenced by other groups
+        self.metadata = None
         self.form_name = QLineEdit('TwoPhotonSeries')
         self.form_name.setToolTip("The name of this TimeSeries dataset")
+        self.content_built = False
+
+    def build_content(self):
+        """Builds the forms and writes the stored fields values to them."""
+        self.lbl_name = QLabel('name<span style="color:'+required_asterisk_color+';">*</span>:')
 
         self.lbl_imaging_plane = QLabel('imaging_plane<span style="color:'+required_asterisk_color+';">*</span>:')
         self.combo_imaging_plane = CustomComboBox()
@@ -213,21 +220,33 @@ class GroupTwoPhotonSeries(CollapsibleBox):
         self.grid.addWidget(self.chk_control, 19, 2, 1, 2)
         self.grid.addWidget(self.lbl_control_description, 20, 0, 1, 2)
         self.grid.addWidget(self.chk_control_description, 20, 2, 1, 2)
-        #self.setLayout(self.grid)
+        if self.metadata:
+            self.write_fields(metadata=dict(self.metadata, name=self.form_name.text()))
+            self.refresh_objects_references(metadata=self.metadata)
+        else:
+            self.setContentLayout(self.grid)
 
     def refresh_objects_references(self, metadata=None):
         """Refreshes references with existing objects in parent group."""
+        # References of forms not built yet are kept in self.metadata
+        if not self.content_built:
+            return
         self.combo_imaging_plane.clear()
         for grp in self.parent.groups_list:
             # Adds all existing ImagingPlanes to combobox
             if isinstance(grp, GroupImagingPlane):
                 self.combo_imaging_plane.addItem(grp.form_name.text())
         # If metadata is referring to this specific object, update combobox item
-        if metadata['name'] == self.form_name.text():
+        if metadata is not None and metadata['name'] == self.form_name.text():
             self.combo_imaging_plane.setCurrentText(metadata['imaging_plane'])
 
     def read_fields(self):
         """Reads fields and returns them structured in a dictionary."""
+        # Forms never expanded return the stored fields values
+        if not self.content_built:
+            if self.metadata:
+                return dict(self.metadata, name=self.form_name.text())
+            self.ensure_content()
         data = {}
         data['name'] = self.form_name.text()
         data['imaging_plane'] = self.combo_imaging_plane.currentText()
@@ -280,6 +299,10 @@ class GroupTwoPhotonSeries(CollapsibleBox):
     def write_fields(self, metadata={}):
         """Reads structured dictionary and write in form fields."""
         self.form_name.setText(metadata['name'])
+        # Forms not built yet only store the fields values
+        if not self.content_built:
+            self.metadata = metadata
+            return
         self.combo_imaging_plane.clear()
         self.combo_imaging_plane.addItem(metadata['imaging_plane'])
         if 'unit' in metadata:
@@ -953,6 +976,7 @@ class GroupOphys(QGroupBox):
         """Groupbox for Ophys module fields filling form."""
         super().__init__()
         self.setTitle('Ophys')
+        self.parent = parent
         self.group_type = 'Ophys'
         self.groups_list = []
 
@@ -1001,6 +1025,8 @@ class GroupOphys(QGroupBox):
         self.combo1.setCurrentIndex(0)
         #self.combo2.addItem(group.form_name.text())
         self.refresh_children(metadata=metadata)
+        # Edits of the group forms are autosaved
+        self.parent.watch_edits(group)
 
     def del_group(self, group_name):
         """Deletes group form by name."""
@@ -1015,6 +1041,8 @@ class GroupOphys(QGroupBox):
                                     "deleting it!")
                 self.combo2.setCurrentIndex(0)
             else:
+                # Forms before deleting are an undo step
+                self.parent.checkpoint()
                 nWidgetsVbox = self.vbox1.count()
                 for i in range(nWidgetsVbox):
                     if self.vbox1.itemAt(i) is not None:
@@ -1037,6 +1065,11 @@ class GroupOphys(QGroupBox):
                     if isinstance(ch, (CustomComboBox, QComboBox)):
                         if ch.currentText() == grp_unique_name:
                             return True
+                # subgroups not expanded yet keep their references in their stored metadata
+                if not getattr(other_grp, 'content_built', True) and other_grp.metadata:
+                    for k, v in other_grp.metadata.items():
+                        if k != 'name' and v == grp_unique_name:
+                            return True
         return False
 
     def refresh_children(self, metadata=None):
@@ -1052,8 +1085,13 @@ class GroupOphys(QGroupBox):
             self.combo2.addItem(child.form_name.text())
         self.refresh_children()
 
-    def read_fields(self):
-        """Reads fields and returns them structured in a dictionary."""
+    def read_fields(self, read=None):
+        """
+        Reads fields and returns them structured in a dictionary.
+        Groups are read with read(group) if given, e.g. from a cache.
+        """
+        if read is None:
+            read = lambda grp: grp.read_fields()
         error = None
         data = {}
         # group_type counts, if there are multiple groups of same type, they are saved in a list
@@ -1066,9 +1104,9 @@ class GroupOphys(QGroupBox):
         # iterate over existing groups and copy their metadata
         for grp in self.groups_list:
             if grp_type_count[grp.group_type] > 1 or grp.group_type in ['Device', 'OpticalChannel', 'ImagingPlane', 'FRET']:
-                data[grp.group_type].append(grp.read_fields())
+                data[grp.group_type].append(read(grp))
             else:
-                data[grp.group_type] = grp.read_fields()
+                data[grp.group_type] = read(grp)
         return data, error
 
 
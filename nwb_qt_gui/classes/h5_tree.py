@@ -0,0 +1,269 @@
+"""
+Native lazy tree browser for HDF5/NWB files
+
+The item model only lists the children of a group when its node is expanded
+(canFetchMore/fetchMore), in batches, and never reads dataset values: shape,
+dtype, chunking and compression come from the dataset metadata. Opening a
+file therefore costs the same regardless of its size. Double-clicking a
+1-D or 2-D numeric dataset opens it in the time series preview.
+"""
+from PySide2 import QtCore
+from PySide2.QtWidgets import (QWidget, QTreeView, QTextEdit, QSplitter,
+                               QVBoxLayout, QTabWidget)
+from nwb_qt_gui.classes.timeseries_preview import TimeSeriesPreview
+import numpy as np
+import html
+import h5py
+
+
+class H5TreeItem:
+    def __init__(self, name, path, kind, parent=None, row=0):
+        """Node of the HDF5 tree. kind is 'group', 'dataset', 'softlink' or 'externallink'."""
+        self.name = name
+        self.path = path
+        self.kind = kind
+        self.parent = parent
+        self.row = row
+        self.children = []
+        self.info = None
+        # Iterator over children names, created on first fetch
+        self.names = None
+        self.fetched_all = kind != 'group'
+
+
+class H5TreeModel(QtCore.QAbstractItemModel):
+    headers = ['Name', 'Type', 'Shape', 'Dtype']
+
+    def __init__(self, h5file, batch_size=500):
+        """Lazy item model over an open h5py.File."""
+        super().__init__()
+        self.h5file = h5file
+        self.batch_size = batch_size
+        self.root = H5TreeItem(name='/', path='/', kind='group')
+
+    def item_from_index(self, index):
+        if index.isValid():
+            return index.internalPointer()
+        return self.root
+
+    def index(self, row, column, parent=QtCore.QModelIndex()):
+        parent_item = self.item_from_index(parent)
+        if 0 <= row < len(parent_item.children):
+            return self.createIndex(row, column, parent_item.children[row])
+        return QtCore.QModelIndex()
+
+    def parent(self, index):
+        if not index.isValid():
+            return QtCore.QModelIndex()
+        parent_item = index.internalPointer().parent
+        if parent_item is None or parent_item is self.root:
+            return QtCore.QModelIndex()
+        return self.createIndex(parent_item.row, 0, parent_item)
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        if parent.column() > 0:
+            return 0
+        return len(self.item_from_index(parent).children)
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        return len(self.headers)
+
+    def hasChildren(self, parent=QtCore.QModelIndex()):
+        item = self.item_from_index(parent)
+        if item.kind != 'group':
+            return False
+        if item.children:
+            return True
+        return len(self.h5file[item.path]) > 0
+
+    def canFetchMore(self, parent):
+        return not self.item_from_index(parent).fetched_all
+
+    def fetchMore(self, parent):
+        """Lists the next batch of children of a group."""
+        item = self.item_from_index(parent)
+        group = self.h5file[item.path]
+        if item.names is None:
+            item.names = iter(group)
+        new_items = []
+        n = len(item.children)
+        for name in item.names:
+            path = item.path.rstrip('/') + '/' + name
+            link = group.get(name, getlink=True)
+            if isinstance(link, h5py.SoftLink):
+                kind = 'softlink'
+            elif isinstance(link, h5py.ExternalLink):
+                kind = 'externallink'
+            elif group.get(name, getclass=True) is h5py.Group:
+                kind = 'group'
+            else:
+                kind = 'dataset'
+            new_items.append(H5TreeItem(name=name, path=path, kind=kind, parent=item,
+                                        row=n + len(new_items)))
+            if len(new_items) >= self.batch_size:
+                break
+        else:
+            item.fetched_all = True
+            item.names = None
+        if new_items:
+            self.beginInsertRows(parent, n, n + len(new_items) - 1)
+            item.children.extend(new_items)
+            self.endInsertRows()
+
+    def item_info(self, item):
+        """Returns (and caches) the metadata shown in the tree columns."""
+        if item.info is None:
+            info = {'type': '', 'shape': '', 'dtype': ''}
+            if item.kind == 'group':
+                obj = self.h5file[item.path]
+                info['type'] = _attr_str(obj.attrs.get('neurodata_type', 'Group'))
+            elif item.kind == 'dataset':
+                obj = self.h5file[item.path]
+                info['type'] = _attr_str(obj.attrs.get('neurodata_type', 'Dataset'))
+                info['shape'] = str(obj.shape)
+                info['dtype'] = str(obj.dtype)
+            else:
+                info['type'] = item.kind
+            item.info = info
+        return item.info
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if not index.isValid() or role != QtCore.Qt.DisplayRole:
+            return None
+        item = index.internalPointer()
+        if index.column() == 0:
+            return item.name
+        info = self.item_info(item)
+        return info[self.headers[index.column()].lower()]
+
+    def headerData(self, section, orientation, role=QtCore.Qt.DisplayRole):
+        if orientation == QtCore.Qt.Horizontal and role == QtCore.Qt.DisplayRole:
+            return self.headers[section]
+        return None
+
+    def details(self, item):
+        """Returns an html description of an item: storage layout and attributes."""
+        rows = [('path', item.path), ('kind', item.kind)]
+        if item.kind in ('softlink', 'externallink'):
+            link = self.h5file[item.parent.path].get(item.name, getlink=True)
+            rows.append(('target', link.path))
+            if item.kind == 'externallink':
+                rows.append(('file', link.filename))
+            obj = None
+        else:
+            obj = self.h5file[item.path]
+        if isinstance(obj, h5py.Dataset):
+            rows.extend([
+                ('shape', obj.shape),
+                ('dtype', obj.dtype),
+                ('chunks', obj.chunks),
+                ('compression', obj.compression),
+                ('compression_opts', obj.compression_opts),
+                ('shuffle', obj.shuffle),
+                ('fletcher32', obj.fletcher32),
+                ('storage size', _format_bytes(obj.id.get_storage_size())),
+            ])
+        elif isinstance(obj, h5py.Group):
+            rows.append(('children', len(obj)))
+        txt = '<b>' + html.escape(item.name) + '</b><table>'
+        for k, v in rows:
+            txt += '<tr><td>' + k + ':</td><td>' + html.escape(str(v)) + '</td></tr>'
+        txt += '</table>'
+        if obj is not None and len(obj.attrs):
+            txt += '<br><b>Attributes</b><table>'
+            for k in obj.attrs:
+                try:
+                    v = _attr_str(obj.attrs[k])
+                except (OSError, TypeError) as error:
+                    v = str(error)
+                txt += '<tr><td>' + html.escape(k) + ':</td><td>' + html.escape(v) + '</td></tr>'
+            txt += '</table>'
+        return txt
+
+
+class H5TreeWidget(QWidget):
+    def __init__(self, parent=None):
+        """Tree view of an HDF5/NWB file with a details panel for the selected object."""
+        super().__init__()
+        self.parent = parent
+        self.h5file = None
+        self.model = None
+
+        self.tree = QTreeView()
+        self.tree.setUniformRowHeights(True)
+        self.details = QTextEdit()
+        self.details.setReadOnly(True)
+        self.preview = TimeSeriesPreview(parent=self)
+        self.tree.doubleClicked.connect(self.show_preview)
+
+        self.bottom_tabs = QTabWidget()
+        self.bottom_tabs.addTab(self.details, 'Details')
+        self.bottom_tabs.addTab(self.preview, 'Preview')
+        splitter = QSplitter(QtCore.Qt.Vertical)
+        splitter.addWidget(self.tree)
+        splitter.addWidget(self.bottom_tabs)
+        splitter.setStretchFactor(0, 3)
+        layout = QVBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(splitter)
+        self.setLayout(layout)
+
+    def open_file(self, fname):
+        """Opens file and shows its top level objects. No data is read."""
+        self.close_file()
+        self.h5file = h5py.File(fname, 'r')
+        self.model = H5TreeModel(self.h5file)
+        self.tree.setModel(self.model)
+        self.tree.setColumnWidth(0, 250)
+        self.tree.selectionModel().currentChanged.connect(self.show_details)
+        self.details.setHtml(self.model.details(self.model.root))
+
+    def close_file(self):
+        if self.h5file is not None:
+            self.preview.clear()
+            self.tree.setModel(None)
+            self.model = None
+            self.h5file.close()
+            self.h5file = None
+            self.details.clear()
+
+    def show_details(self, current, previous=None):
+        if self.model is not None and current.isValid():
+            self.details.setHtml(self.model.details(current.internalPointer()))
+
+    def show_preview(self, index):
+        """Previews a 1-D or 2-D numeric dataset, timed by the rate of its TimeSeries if any."""
+        item = index.internalPointer() if index.isValid() else None
+        if self.model is None or item is None or item.kind != 'dataset':
+            return
+        dataset = self.h5file[item.path]
+        if dataset.ndim not in (1, 2) or dataset.dtype.kind not in 'iufb' or dataset.shape[0] == 0:
+            return
+        rate, starting_time = None, 0.
+        group = self.h5file[item.parent.path]
+        if item.name == 'data' and 'starting_time' in group:
+            rate = group['starting_time'].attrs.get('rate')
+            starting_time = float(group['starting_time'][()])
+        self.preview.set_dataset(dataset, rate=rate, starting_time=starting_time)
+        self.bottom_tabs.setCurrentWidget(self.preview)
+
+
+def _attr_str(value, max_len=200):
+    """Returns a short string representation of an attribute value."""
+    if isinstance(value, bytes):
+        value = value.decode(errors='replace')
+    elif isinstance(value, h5py.Reference):
+        value = '<object reference>'
+    elif isinstance(value, np.ndarray):
+        value = np.array2string(value, threshold=20)
+    value = str(value)
+    if len(value) > max_len:
+        value = value[:max_len] + '...'
+    return value
+
+
+def _format_bytes(n_bytes):
+    for unit in ['B', 'KB', 'MB', 'GB', 'TB']:
+        if n_bytes < 1024 or unit == 'TB':
+            return '{:.1f} {}'.format(n_bytes, unit) if unit != 'B' else str(n_bytes) + ' B'
+        n_bytes /= 1024
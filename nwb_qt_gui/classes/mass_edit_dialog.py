@@ -0,0 +1,124 @@
+"""
+Dialog setting fields of many groups at once
+
+The fields shown are those all selected groups have. A value is either the
+same text for all groups or a template with expressions in braces, evaluated
+for each group over its fields and row (its position in the selection), e.g.
+'shank{row + 1}' or '{location}_L', see utils.columnar_table.
+"""
+from PySide2.QtWidgets import (QDialog, QLineEdit, QLabel, QCheckBox, QGridLayout, QVBoxLayout,
+                               QDialogButtonBox)
+from nwb_qt_gui.utils.columnar_table import ColumnarTable, evaluate_template
+
+
+def _is_scalar(value):
+    return value is None or (isinstance(value, (str, int, float)) and not isinstance(value, bool))
+
+
+def common_fields(data):
+    """Returns the fields with text or number values in all dictionaries of data, in order."""
+    if not data:
+        return []
+    return [k for k in data[0] if all(k in d and _is_scalar(d[k]) for d in data)]
+
+
+def _convert(text, values):
+    """Converts text to the type of the current values of a field: int, float or str."""
+    numbers = [v for v in values if v is not None]
+    if numbers and all(isinstance(v, (int, float)) for v in numbers):
+        if text.strip() == '':
+            return None
+        if all(isinstance(v, int) for v in numbers):
+            return int(text)
+        return float(text)
+    return text
+
+
+class MassEditDialog(QDialog):
+    def __init__(self, titles, data, parent=None):
+        """Sets fields of the groups with the given titles and fields values (data)."""
+        super().__init__(parent)
+        self.parent = parent
+        self.data = data
+        self.fields = common_fields(data)
+        # Fields values set, by group, once accepted
+        self.changes = []
+        self.setWindowTitle('Edit ' + str(len(data)) + ' groups')
+
+        lbl_help = QLabel("Checked fields are set on all groups: " + ', '.join(titles[:3]) +
+                          (', ...' if len(titles) > 3 else '') + ".\n"
+                          "Expressions in braces are evaluated for each group, over its fields and\n"
+                          "row (its position, from 0), e.g. shank{row + 1} or {location}_L.")
+        grid = QGridLayout()
+        grid.setColumnStretch(1, 1)
+        self.checks = {}
+        self.forms = {}
+        for n, field in enumerate(self.fields):
+            values = [d[field] for d in data]
+            chk = QCheckBox(field)
+            form = QLineEdit('')
+            if all(v == values[0] for v in values):
+                form.setText('' if values[0] is None else str(values[0]))
+            else:
+                form.setPlaceholderText('(different values)')
+            form.textEdited.connect((lambda c: lambda: c.setChecked(True))(chk))
+            form.textEdited.connect(self.preview)
+            chk.toggled.connect(self.preview)
+            self.checks[field] = chk
+            self.forms[field] = form
+            grid.addWidget(chk, n, 0, 1, 1)
+            grid.addWidget(form, n, 1, 1, 1)
+        self.lbl_preview = QLabel('')
+        self.lbl_preview.setWordWrap(True)
+
+        buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+
+        layout = QVBoxLayout()
+        layout.addWidget(lbl_help)
+        layout.addLayout(grid)
+        layout.addWidget(self.lbl_preview)
+        layout.addWidget(buttons)
+        self.setLayout(layout)
+
+    def compute_changes(self):
+        """Returns the fields values set on each group. Raises ValueError or TypeError for invalid values."""
+        checked = [field for field in self.fields if self.checks[field].isChecked()]
+        changes = [{} for _ in self.data]
+        if not checked:
+            return changes
+        table = ColumnarTable(columns=[])
+        table.set_columns({field: [d[field] for d in self.data] for field in self.fields})
+        for field in checked:
+            values = [d[field] for d in self.data]
+            texts = evaluate_template(table, self.forms[field].text())
+            for n, text in enumerate(texts):
+                try:
+                    changes[n][field] = _convert(text, values)
+                except ValueError:
+                    raise ValueError(field + ' must be a number, got ' + repr(text))
+        return changes
+
+    def preview(self):
+        """Shows the values set on the first and last groups."""
+        try:
+            changes = self.compute_changes()
+        except (ValueError, TypeError, ZeroDivisionError) as error:
+            self.lbl_preview.setText('Invalid value: ' + str(error))
+            return
+        if not changes or not changes[0]:
+            self.lbl_preview.setText('')
+            return
+        rows = [0] if len(changes) == 1 else [0, len(changes) - 1]
+        self.lbl_preview.setText('\n'.join(
+            'row ' + str(n) + ': ' + ', '.join(k + ' = ' + str(v) for k, v in changes[n].items())
+            for n in rows))
+
+    def accept(self):
+        try:
+            self.changes = self.compute_changes()
+        except (ValueError, TypeError, ZeroDivisionError) as error:
+            self.lbl_preview.setText('Invalid value: ' + str(error))
+            return
+        super().accept()
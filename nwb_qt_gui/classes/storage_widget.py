@@ -0,0 +1,140 @@
+"""
+Storage layout tables of the file opened on an explorer tab
+
+The analysis runs in background and only reads metadata, see
+utils.storage_analyzer.
+"""
+from PySide2 import QtCore
+from PySide2.QtWidgets import (QWidget, QPushButton, QLabel, QTableView, QTabWidget,
+                               QGridLayout, QVBoxLayout, QAbstractItemView)
+from nwb_qt_gui.classes.h5_tree import _format_bytes
+from nwb_qt_gui.utils.storage_analyzer import (analyze_storage, rollup, format_value,
+                                               dataset_columns, group_columns)
+
+
+class StorageAnalyzerThread(QtCore.QThread):
+    done = QtCore.Signal(object)
+    failed = QtCore.Signal(str)
+
+    def __init__(self, path):
+        """Analyzes the storage of a file in background. Emits the dataset rows."""
+        super().__init__()
+        self.path = path
+
+    def run(self):
+        try:
+            rows = analyze_storage(self.path)
+        except Exception as error:
+            # A file failing to be read (h5py may raise anything) must not leave the tab waiting
+            self.failed.emit(str(error))
+        else:
+            self.done.emit(rows)
+
+
+class StorageTableModel(QtCore.QAbstractTableModel):
+    def __init__(self, columns):
+        """Table of storage rows (dictionaries), sortable by their raw values."""
+        super().__init__()
+        self.columns = columns
+        self.rows = []
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        return len(self.columns)
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        column = self.columns[index.column()]
+        value = self.rows[index.row()][column]
+        if role == QtCore.Qt.DisplayRole:
+            if column in ('logical', 'stored') and value is not None:
+                return _format_bytes(value)
+            return format_value(column, value)
+        if role == QtCore.Qt.UserRole:
+            # Sort key, missing values first
+            if value is None:
+                return -1.
+            if isinstance(value, (int, float)):
+                return float(value)
+            return format_value(column, value)
+        return None
+
+    def headerData(self, section, orientation, role=QtCore.Qt.DisplayRole):
+        if orientation == QtCore.Qt.Horizontal and role == QtCore.Qt.DisplayRole:
+            return self.columns[section]
+        return None
+
+    def set_rows(self, rows):
+        self.beginResetModel()
+        self.rows = rows
+        self.endResetModel()
+
+
+class StorageAnalyzerWidget(QWidget):
+    def __init__(self, fname, parent=None):
+        """Per dataset and per group storage tables of a file, computed on request."""
+        super().__init__()
+        self.parent = parent
+        self.fname = fname
+        self.thread = None
+
+        self.btn_analyze = QPushButton('Analyze storage')
+        self.btn_analyze.setToolTip("Stored versus logical size, chunking and filters of all datasets.\n"
+                                    "No data is read.")
+        self.btn_analyze.clicked.connect(self.analyze)
+        self.lbl_status = QLabel('')
+
+        self.tables = QTabWidget()
+        self.datasets_model = StorageTableModel(dataset_columns)
+        self.groups_model = StorageTableModel(group_columns)
+        for model, label in [(self.datasets_model, 'Datasets'), (self.groups_model, 'Groups')]:
+            proxy = QtCore.QSortFilterProxyModel(self)
+            proxy.setSourceModel(model)
+            proxy.setSortRole(QtCore.Qt.UserRole)
+            table = QTableView()
+            table.setModel(proxy)
+            table.setSortingEnabled(True)
+            table.setSelectionBehavior(QAbstractItemView.SelectRows)
+            table.verticalHeader().setVisible(False)
+            self.tables.addTab(table, label)
+
+        grid = QGridLayout()
+        grid.setColumnStretch(1, 1)
+        grid.addWidget(self.btn_analyze, 0, 0, 1, 1)
+        grid.addWidget(self.lbl_status, 0, 1, 1, 1)
+        layout = QVBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addLayout(grid)
+        layout.addWidget(self.tables)
+        self.setLayout(layout)
+
+    def analyze(self):
+        self.btn_analyze.setEnabled(False)
+        self.lbl_status.setText('Analyzing...')
+        self.thread = StorageAnalyzerThread(self.fname)
+        self.thread.done.connect(self.show_rows)
+        self.thread.failed.connect(lambda error: self.lbl_status.setText('Failed: ' + error))
+        self.thread.finished.connect(lambda: self.btn_analyze.setEnabled(True))
+        self.thread.start()
+
+    def show_rows(self, rows):
+        self.datasets_model.set_rows(rows)
+        groups = rollup(rows)
+        self.groups_model.set_rows(groups)
+        for n in range(self.tables.count()):
+            self.tables.widget(n).sortByColumn(4 if n == 0 else 3, QtCore.Qt.DescendingOrder)
+            self.tables.widget(n).resizeColumnsToContents()
+        root = groups[0] if groups else None
+        if root is not None:
+            self.lbl_status.setText('{} datasets, {} stored, {} logical'.format(
+                root['n_datasets'], _format_bytes(root['stored']), _format_bytes(root['logical'])))
+        else:
+            self.lbl_status.setText('No datasets')
+
+    def stop(self):
+        if self.thread is not None:
+            self.thread.wait()
+            self.thread = None
@@ -0,0 +1,212 @@
+"""
+Native preview of 1-D and 2-D TimeSeries datasets
+
+The visible time window is drawn as per-pixel min/max envelopes computed by
+a MinMaxPyramid in a worker thread, so only the chunks covering the window
+(or cached decimation tiles) are read. Mouse wheel zooms around the cursor,
+dragging pans.
+"""
+from PySide2 import QtCore
+from PySide2.QtGui import QImage, QPainter, QColor
+from PySide2.QtWidgets import QWidget, QLabel, QVBoxLayout
+from nwb_qt_gui.utils.minmax_pyramid import MinMaxPyramid, Cancelled, render_envelope
+from nwb_qt_gui.utils.configs import preview_cache_size, preview_max_channels, preview_initial_values
+import numpy as np
+import threading
+
+
+class EnvelopeThread(QtCore.QThread):
+    done = QtCore.Signal(object)
+
+    def __init__(self, pyramid):
+        """Computes envelopes for the most recent view request only."""
+        super().__init__()
+        self.pyramid = pyramid
+        self.request = None
+        self.stopped = False
+        self.condition = threading.Condition()
+
+    def submit(self, request):
+        """Replaces any pending request. request is (start, stop, n_pixels, first_channel, n_channels)."""
+        with self.condition:
+            self.request = request
+            self.condition.notify()
+
+    def cancelled(self):
+        """Whether the request being computed is stopped or superseded by a newer one."""
+        return self.stopped or self.request is not None
+
+    def stop(self):
+        """Cancels the request being computed, at the next tile, and waits for the thread."""
+        with self.condition:
+            self.stopped = True
+            self.condition.notify()
+        self.wait()
+
+    def run(self):
+        while True:
+            with self.condition:
+                while self.request is None and not self.stopped:
+                    self.condition.wait()
+                if self.stopped:
+                    return
+                request, self.request = self.request, None
+            start, stop, n_pixels, first_channel, n_channels = request
+            try:
+                mins, maxs = self.pyramid.envelope(start, stop, n_pixels, cancelled=self.cancelled)
+            except Cancelled:
+                continue
+            channels = slice(first_channel, first_channel + n_channels)
+            self.done.emit((request, mins[:, channels], maxs[:, channels]))
+
+
+class EnvelopeCanvas(QWidget):
+    def __init__(self, parent=None):
+        """Draws the envelope image and handles zoom and pan."""
+        super().__init__()
+        self.parent = parent
+        self.image = None
+        self.drag_x = None
+        self.setMinimumHeight(200)
+        self.setMouseTracking(False)
+
+    def set_image(self, array):
+        # QImage does not own the buffer, the array is kept alive with it
+        self.array = np.ascontiguousarray(array)
+        h, w = self.array.shape[:2]
+        self.image = QImage(self.array.data, w, h, 4 * w, QImage.Format_RGBA8888)
+        self.update()
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), QColor(255, 255, 255))
+        if self.image is not None:
+            painter.drawImage(self.rect(), self.image)
+        painter.end()
+
+    def resizeEvent(self, event):
+        self.parent.request_envelope()
+        super().resizeEvent(event)
+
+    def wheelEvent(self, event):
+        x = event.position().x() if hasattr(event, 'position') else event.x()
+        scale = 0.8 if event.angleDelta().y() > 0 else 1.25
+        self.parent.zoom(scale, x / max(self.width(), 1))
+
+    def mousePressEvent(self, event):
+        self.drag_x = event.x()
+
+    def mouseMoveEvent(self, event):
+        if self.drag_x is not None:
+            self.parent.pan((self.drag_x - event.x()) / max(self.width(), 1))
+            self.drag_x = event.x()
+
+    def mouseReleaseEvent(self, event):
+        self.drag_x = None
+
+
+class TimeSeriesPreview(QWidget):
+    def __init__(self, parent=None):
+        """Preview of a 1-D (time) or 2-D (time, channels) dataset."""
+        super().__init__()
+        self.parent = parent
+        self.pyramid = None
+        self.thread = None
+        self.rate = None
+        self.starting_time = 0.
+        self.start = 0
+        self.stop = 0
+        self.first_channel = 0
+        self.setFocusPolicy(QtCore.Qt.StrongFocus)
+
+        self.lbl_info = QLabel('Double-click a 1-D or 2-D dataset to preview it.')
+        self.canvas = EnvelopeCanvas(parent=self)
+        layout = QVBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(self.lbl_info)
+        layout.addWidget(self.canvas)
+        self.setLayout(layout)
+
+    def set_dataset(self, dataset, rate=None, starting_time=0.):
+        """Shows a dataset. rate (Hz) and starting_time (s) are used to label the time axis."""
+        self.clear()
+        self.pyramid = MinMaxPyramid(dataset, cache_size=preview_cache_size)
+        self.name = dataset.name
+        self.rate = rate
+        self.starting_time = starting_time
+        # Opens on the first samples only, zooming out covers the whole series
+        self.start = 0
+        self.stop = min(self.pyramid.n_samples, max(preview_initial_values // self.pyramid.n_channels, 10))
+        self.first_channel = 0
+        self.thread = EnvelopeThread(self.pyramid)
+        self.thread.done.connect(self.show_envelope)
+        self.thread.start()
+        self.request_envelope()
+
+    def clear(self):
+        """Stops the worker and releases the dataset."""
+        if self.thread is not None:
+            self.thread.stop()
+            self.thread = None
+        self.pyramid = None
+        self.canvas.image = None
+        self.canvas.update()
+
+    def n_visible_channels(self):
+        return min(preview_max_channels, self.pyramid.n_channels - self.first_channel)
+
+    def request_envelope(self):
+        if self.thread is None:
+            return
+        self.thread.submit((self.start, self.stop, max(self.canvas.width(), 1),
+                            self.first_channel, self.n_visible_channels()))
+        self.update_info()
+
+    def show_envelope(self, result):
+        request, mins, maxs = result
+        self.canvas.set_image(render_envelope(mins, maxs, height=max(self.canvas.height(), 1)))
+
+    def zoom(self, scale, anchor):
+        """Scales the visible window around anchor, a fraction of the window width."""
+        if self.pyramid is None:
+            return
+        length = self.stop - self.start
+        new_length = int(min(max(length * scale, 10), self.pyramid.n_samples))
+        center = self.start + anchor * length
+        self.set_window(int(center - anchor * new_length), new_length)
+
+    def pan(self, fraction):
+        if self.pyramid is None:
+            return
+        length = self.stop - self.start
+        self.set_window(self.start + int(round(fraction * length)), length)
+
+    def set_window(self, start, length):
+        start = min(max(start, 0), self.pyramid.n_samples - length)
+        if (start, start + length) != (self.start, self.stop):
+            self.start, self.stop = start, start + length
+            self.request_envelope()
+
+    def keyPressEvent(self, event):
+        """Page Up/Down scroll through channels."""
+        if self.pyramid is None:
+            return super().keyPressEvent(event)
+        step = preview_max_channels
+        if event.key() == QtCore.Qt.Key_PageDown:
+            self.first_channel = min(self.first_channel + step, max(self.pyramid.n_channels - step, 0))
+        elif event.key() == QtCore.Qt.Key_PageUp:
+            self.first_channel = max(self.first_channel - step, 0)
+        else:
+            return super().keyPressEvent(event)
+        self.request_envelope()
+
+    def update_info(self):
+        n = self.n_visible_channels()
+        if self.rate:
+            window = '{:.3f} - {:.3f} s'.format(self.starting_time + self.start / self.rate,
+                                                 self.starting_time + self.stop / self.rate)
+        else:
+            window = 'samples {} - {}'.format(self.start, self.stop)
+        txt = '{}: {}, channels {} - {} of {}'.format(self.name, window, self.first_channel,
+                                                      self.first_channel + n - 1, self.pyramid.n_channels)
+        self.lbl_info.setText(txt)
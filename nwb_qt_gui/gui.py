@@ -1,28 +1,55 @@
 from PySide2 import QtCore
-from PySide2.QtWebEngineWidgets import QWebEngineView
 from PySide2.QtWidgets import (QMainWindow, QWidget, QApplication, QAction,
                                QPushButton, QLineEdit, QTextEdit, QVBoxLayout,
                                QGridLayout, QSplitter, QLabel, QFileDialog,
                                QMessageBox, QComboBox, QScrollArea, QStyle,
-                               QGroupBox, QCheckBox, QTabWidget)
+                               QGroupBox, QCheckBox, QTabWidget, QProgressBar,
+                               QHBoxLayout, QListWidget, QAbstractItemView, QPlainTextEdit,
+                               QSpinBox, QDoubleSpinBox)
+from PySide2.QtGui import QKeySequence
 from nwb_qt_gui.classes.console_widget import ConsoleWidget
+from nwb_qt_gui.classes.explorer_file_view import ExplorerFileView
+from nwb_qt_gui.classes.catalog_widget import CatalogWidget
+from nwb_qt_gui.classes.chunk_advisor_dialog import ChunkAdvisorDialog
+from nwb_qt_gui.classes.mass_edit_dialog import MassEditDialog
 from nwb_qt_gui.classes.forms_general import GroupNwbfile, GroupSubject
 from nwb_qt_gui.classes.forms_ophys import GroupOphys
 from nwb_qt_gui.classes.forms_ecephys import GroupEcephys
 from nwb_qt_gui.classes.forms_behavior import GroupBehavior
 from nwb_qt_gui.classes.forms_ogen import GroupOgen
 from nwb_qt_gui.utils.name_references import name_to_gui_class
+from nwb_qt_gui.utils.output_capture import OutputQueue, OutputCapture
+from nwb_qt_gui.utils.run_log import RunRecord, logger as conversion_logger
+from nwb_qt_gui.utils.configs import (log_queue_maxsize, log_flush_interval,
+                                      log_batch_size, log_max_lines,
+                                      voila_kernel_pool_size, voila_startup_timeout,
+                                      explorer_notebook, explorer_shared_kernel,
+                                      explorer_max_open_files, explorer_memory_budget,
+                                      summary_index_file, console_out_of_process,
+                                      form_build_slice_ms, autosave_file, autosave_delay,
+                                      search_max_results)
+from nwb_qt_gui.utils.voila_server import VoilaServer, VoilaReadyThread, get_free_port
+from nwb_qt_gui.utils.summary_index import SummaryIndex, SummaryRefreshThread
+from nwb_qt_gui.utils.widget_pool import WidgetPool
+from nwb_qt_gui.utils.autosave import (AutosaveThread, autosave_path, orphan_autosaves, claim_autosave,
+                                       read_autosave)
+from nwb_qt_gui.utils.undo_history import UndoHistory, diff, plan_group_patches, share
+from nwb_qt_gui.utils.search_index import SearchIndex, flatten_fields
+from nwb_qt_gui.utils.metafile import (decode_columnar, load_metafile, save_metafile,
+                                       metafile_filter)
 
-import numpy as np
 import nbformat as nbf
 from pathlib import Path
+from urllib.parse import urlencode
+from collections import OrderedDict
 import tempfile
-import socket
-import psutil
+import copy
 import shutil
 import datetime
 import importlib
 import warnings
+import uuid
+import time
 import yaml
 import sys
 import os
@@ -51,6 +78,22 @@ class Application(QMainWindow):
         self.nwbfile_loc = nwbfile_loc
         # conversion_class:
         self.conversion_class = conversion_class
+        # Path of the currently loaded metafile
+        self.metafile_path = None
+        # Chunking and compression (H5DataIO keyword arguments) by series name,
+        # stored on the metadata 'StorageOptions' entry
+        self.storage_options = {}
+        # Detached group forms, reused by the next metafile load
+        self.widget_pool = WidgetPool()
+        # Files open on explorer, least recently viewed first
+        self.explorer_lru = OrderedDict()
+        # Snapshots of the forms metadata, for undo and redo
+        self.undo_history = UndoHistory()
+        # Whether the forms being built restore an undo step, instead of adding one
+        self.undo_rebuild = False
+        # Groups by words of their names, types and fields, updated on search
+        self.search_index = SearchIndex()
+        self.search_results = []
 
         self.resize(1200, 900)
         self.setWindowTitle('NWB:N conversion tools')
@@ -58,10 +101,13 @@ class Application(QMainWindow):
         # Initialize GUI elements
         self.init_gui()
         self.init_meta_tab()
+        self.init_autosave()
         self.load_meta_file(filename=metafile)
         if nwbwidgets:
             self.init_nwb_explorer()
         self.show()
+        # Offers to restore the autosave of a session that did not exit normally
+        QtCore.QTimer.singleShot(0, self.offer_autosave_restore)
 
     def init_gui(self):
         """Initiates GUI elements."""
@@ -71,6 +117,27 @@ class Application(QMainWindow):
         action_choose_conversion = QAction('Choose conversion module', self)
         fileMenu.addAction(action_choose_conversion)
         action_choose_conversion.triggered.connect(self.load_conversion_module)
+        # Saves repeated groups once per field instead of once per item, see utils.metafile
+        self.action_columnar = QAction('Save repeated groups as columns', self, checkable=True)
+        self.action_columnar.setChecked(False)
+        fileMenu.addAction(self.action_columnar)
+
+        editMenu = mainMenu.addMenu('Edit')
+        self.action_undo = QAction('Undo', self)
+        self.action_undo.setShortcut(QKeySequence.Undo)
+        self.action_undo.setEnabled(False)
+        editMenu.addAction(self.action_undo)
+        self.action_undo.triggered.connect(self.undo)
+        self.action_redo = QAction('Redo', self)
+        self.action_redo.setShortcut(QKeySequence.Redo)
+        self.action_redo.setEnabled(False)
+        editMenu.addAction(self.action_redo)
+        self.action_redo.triggered.connect(self.redo)
+
+        toolsMenu = mainMenu.addMenu('Tools')
+        action_chunk_advisor = QAction('Chunk and codec advisor', self)
+        toolsMenu.addAction(action_chunk_advisor)
+        action_chunk_advisor.triggered.connect(self.open_chunk_advisor)
 
         helpMenu = mainMenu.addMenu('Help')
         action_about = QAction('About', self)
@@ -169,17 +236,77 @@ class Application(QMainWindow):
             self.group_kwargs.setLayout(self.grid_kwargs)
             l_grid1.addWidget(self.group_kwargs, 4, 0, 1, 6)
 
+        # Search of groups by name, type and fields values
+        self.lin_search = QLineEdit('')
+        self.lin_search.setPlaceholderText('Search groups and fields')
+        self.lin_search.setToolTip("Finds groups with words starting with the words typed, "
+                                   "in their name, type or fields.\nSelect a result to show the group.")
+        self.lin_search.textChanged.connect(self.search_forms)
+        self.lin_search.returnPressed.connect(lambda: self.jump_to_result(self.lst_search.item(0)))
+        self.lbl_search = QLabel('')
+        self.lst_search = QListWidget()
+        self.lst_search.setMaximumHeight(150)
+        self.lst_search.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.lst_search.setToolTip("Double click (or Enter) shows a group.\n"
+                                   "Select several groups to edit their fields at once.\n"
+                                   "Only the first " + str(search_max_results) + " results are listed, "
+                                   "'Edit all' edits all matches.")
+        self.lst_search.itemActivated.connect(self.jump_to_result)
+        self.lst_search.itemSelectionChanged.connect(
+            lambda: self.btn_mass_edit.setEnabled(len(self.lst_search.selectedItems()) > 0))
+        self.lst_search.hide()
+        self.btn_mass_edit = QPushButton('Edit selected')
+        self.btn_mass_edit.setToolTip("Sets fields of all selected groups at once.")
+        self.btn_mass_edit.setEnabled(False)
+        self.btn_mass_edit.clicked.connect(lambda: self.edit_selected_groups())
+        self.btn_edit_all = QPushButton('Edit all')
+        self.btn_edit_all.setToolTip("Sets fields of all groups matching the search at once, "
+                                     "including those not listed.")
+        self.btn_edit_all.setEnabled(False)
+        self.btn_edit_all.clicked.connect(lambda: self.edit_selected_groups(all_matches=True))
+        self.search_w = QWidget()
+        search_box = QGridLayout()
+        search_box.setContentsMargins(0, 0, 0, 0)
+        search_box.setColumnStretch(0, 1)
+        search_box.addWidget(self.lin_search, 0, 0, 1, 1)
+        search_box.addWidget(self.lbl_search, 0, 1, 1, 1)
+        search_box.addWidget(self.btn_mass_edit, 0, 2, 1, 1)
+        search_box.addWidget(self.btn_edit_all, 0, 3, 1, 1)
+        search_box.addWidget(self.lst_search, 1, 0, 1, 4)
+        self.search_w.setLayout(search_box)
+
+        # Progress of forms building, shown while groups are being built
+        self.form_progress = QProgressBar()
+        self.form_progress.setFormat('Building forms: %v / %m groups')
+        self.btn_cancel_forms = QPushButton('Cancel')
+        self.btn_cancel_forms.clicked.connect(lambda: self.cancel_form_build(log=True))
+        self.form_progress_w = QWidget()
+        form_progress_box = QHBoxLayout()
+        form_progress_box.setContentsMargins(0, 0, 0, 0)
+        form_progress_box.addWidget(self.form_progress)
+        form_progress_box.addWidget(self.btn_cancel_forms)
+        self.form_progress_w.setLayout(form_progress_box)
+        self.form_progress_w.hide()
+        self.form_build_steps = None
+        self.form_build_timer = QtCore.QTimer(self)
+        self.form_build_timer.setInterval(0)
+        self.form_build_timer.timeout.connect(self.build_forms_slice)
+        # Time (ms) to first interaction and total time of the last forms building
+        self.form_build_metrics = {}
+
         self.l_vbox1 = QVBoxLayout()
         self.l_vbox1.addStretch()
         scroll_aux = QWidget()
         scroll_aux.setLayout(self.l_vbox1)
-        l_scroll = QScrollArea()
-        l_scroll.setWidget(scroll_aux)
-        l_scroll.setWidgetResizable(True)
+        self.l_scroll = QScrollArea()
+        self.l_scroll.setWidget(scroll_aux)
+        self.l_scroll.setWidgetResizable(True)
 
         self.l_vbox2 = QVBoxLayout()
         self.l_vbox2.addLayout(l_grid1)
-        self.l_vbox2.addWidget(l_scroll)
+        self.l_vbox2.addWidget(self.search_w)
+        self.l_vbox2.addWidget(self.form_progress_w)
+        self.l_vbox2.addWidget(self.l_scroll)
 
         # Right-side panel
         # Metadata text
@@ -201,6 +328,12 @@ class Application(QMainWindow):
         r_grid2.addWidget(QLabel(), 0, 1, 1, 1)
         self.logger = QTextEdit()
         self.logger.setReadOnly(True)
+        self.logger.document().setMaximumBlockCount(log_max_lines)
+        # Captured output from conversion jobs, flushed to logger in batches
+        self.output_queue = OutputQueue(maxsize=log_queue_maxsize)
+        self.log_timer = QtCore.QTimer(self)
+        self.log_timer.setInterval(log_flush_interval)
+        self.log_timer.timeout.connect(self.flush_output_queue)
         r_vbox2 = QVBoxLayout()
         r_vbox2.addLayout(r_grid2)
         r_vbox2.addWidget(self.logger)
@@ -238,29 +371,63 @@ class Application(QMainWindow):
         self.btn_load_nwbexp.setIcon(self.style().standardIcon(QStyle.SP_ArrowDown))
         self.btn_load_nwbexp.clicked.connect(self.load_nwb_explorer)
         self.btn_load_nwbexp.setToolTip("Choose NWB file to explore!")
+        self.btn_quick_nwbexp = QPushButton('Quick view')
+        self.btn_quick_nwbexp.setIcon(self.style().standardIcon(QStyle.SP_FileDialogContentsView))
+        self.btn_quick_nwbexp.clicked.connect(lambda: self.load_nwb_explorer(quick=True))
+        self.btn_quick_nwbexp.setToolTip("Browse NWB file structure without loading widgets.\n"
+                                         "No data is read.")
         self.btn_close_nwbexp = QPushButton('Close')
         self.btn_close_nwbexp.setIcon(self.style().standardIcon(QStyle.SP_DialogCloseButton))
-        self.btn_close_nwbexp.clicked.connect(self.close_nwb_explorer)
+        self.btn_close_nwbexp.clicked.connect(lambda: self.close_nwb_explorer())
         self.btn_close_nwbexp.setToolTip("Close current file view.")
-        self.html = QWebEngineView()
+        self.chk_shared_kernel = QCheckBox('Share kernel')
+        self.chk_shared_kernel.setChecked(explorer_shared_kernel)
+        self.chk_shared_kernel.setToolTip(
+            "Console and widgets share one kernel and one open file.\n"
+            "Halves memory use for large files. Applies to the next file opened.")
+        # One tab per opened file
+        self.explorer_files = QTabWidget()
+        self.explorer_files.setTabsClosable(True)
+        self.explorer_files.tabCloseRequested.connect(self.close_nwb_explorer)
+        self.explorer_files.currentChanged.connect(self.on_explorer_file_changed)
 
         self.grid_widgets = QGridLayout()
-        self.grid_widgets.setColumnStretch(2, 1)
+        self.grid_widgets.setColumnStretch(4, 1)
         self.grid_widgets.addWidget(self.btn_load_nwbexp, 0, 0, 1, 1)
-        self.grid_widgets.addWidget(self.btn_close_nwbexp, 0, 1, 1, 1)
-        self.grid_widgets.addWidget(QLabel(), 0, 2, 1, 1)
+        self.grid_widgets.addWidget(self.btn_quick_nwbexp, 0, 1, 1, 1)
+        self.grid_widgets.addWidget(self.btn_close_nwbexp, 0, 2, 1, 1)
+        self.grid_widgets.addWidget(self.chk_shared_kernel, 0, 3, 1, 1)
+        self.grid_widgets.addWidget(QLabel(), 0, 4, 1, 1)
         self.vbox_widgets = QVBoxLayout()
         self.vbox_widgets.addLayout(self.grid_widgets)
-        self.vbox_widgets.addWidget(self.html)
+        self.vbox_widgets.addWidget(self.explorer_files)
 
         # Layout Console
         console_label = QLabel('Ipython console:')
-        self.explorer_console = ConsoleWidget(par=self)
+        self.explorer_console = ConsoleWidget(par=self, out_of_process=console_out_of_process)
         self.explorer_console.setToolTip("nwbfile --> NWB file data")
+        self.chk_console_process = QCheckBox('Separate process')
+        self.chk_console_process.setChecked(console_out_of_process)
+        self.chk_console_process.setToolTip("Runs the console kernel in a separate process,\n"
+                                            "so long computations do not freeze the GUI.")
+        self.chk_console_process.toggled.connect(self.toggle_console_process)
+        self.btn_console_interrupt = QPushButton('Interrupt')
+        self.btn_console_interrupt.setIcon(self.style().standardIcon(QStyle.SP_MediaStop))
+        self.btn_console_interrupt.clicked.connect(self.explorer_console.interrupt_kernel)
+        self.btn_console_restart = QPushButton('Restart')
+        self.btn_console_restart.setIcon(self.style().standardIcon(QStyle.SP_BrowserReload))
+        self.btn_console_restart.setToolTip("Restarts the console kernel and reloads open files.")
+        self.btn_console_restart.clicked.connect(self.restart_console_kernel)
+        self.btn_console_interrupt.setEnabled(console_out_of_process)
+        self.btn_console_restart.setEnabled(console_out_of_process)
 
         self.grid_console = QGridLayout()
+        self.grid_console.setColumnStretch(1, 1)
         self.grid_console.addWidget(console_label, 0, 0, 1, 1)
-        self.grid_console.addWidget(self.explorer_console, 1, 0, 1, 1)
+        self.grid_console.addWidget(self.chk_console_process, 0, 2, 1, 1)
+        self.grid_console.addWidget(self.btn_console_interrupt, 0, 3, 1, 1)
+        self.grid_console.addWidget(self.btn_console_restart, 0, 4, 1, 1)
+        self.grid_console.addWidget(self.explorer_console, 1, 0, 1, 5)
 
         hsplitter = QSplitter(QtCore.Qt.Horizontal)
         left_w = QWidget()
@@ -271,27 +438,66 @@ class Application(QMainWindow):
         hsplitter.addWidget(right_w)
 
         # Add tab to GUI
+        self.explorer_tab = hsplitter
         self.tabs.addTab(hsplitter, 'NWB widgets')
 
+        # Polls for the connection files of Voila kernels reading their file
+        self.kernel_file_timer = QtCore.QTimer(self)
+        self.kernel_file_timer.setInterval(200)
+        self.kernel_file_timer.timeout.connect(self.attach_console_to_voila)
+
+        # Summaries of explored files, stale entries are refreshed in background
+        self.summary_index = SummaryIndex(summary_index_file)
+        self.summary_threads = []
+        self.refresh_summaries()
+
+        # Catalog of NWB files, opened on explorer by double-click
+        self.catalog = CatalogWidget(parent=self)
+        self.tabs.addTab(self.catalog, 'NWB catalog')
+
+        # Starts the session Voila server, so it is ready when the first file is opened
+        self.start_voila_server()
+
     def write_to_logger(self, txt):
         time = datetime.datetime.now().time().strftime("%H:%M:%S")
         full_txt = "[" + time + "]    " + txt
         self.logger.append(full_txt)
 
+    def flush_output_queue(self):
+        """Writes a batch of captured conversion output to logger."""
+        items, dropped = self.output_queue.drain(max_items=log_batch_size)
+        lines = []
+        for stamp, job_id, source, text in items:
+            lines.append("[" + stamp.strftime("%H:%M:%S") + "]    [" + job_id + "] "
+                         + source + ": " + text)
+        if dropped:
+            time = datetime.datetime.now().time().strftime("%H:%M:%S")
+            lines.append("[" + time + "]    " + str(dropped) + " output lines dropped")
+        if lines:
+            self.logger.append("\n".join(lines))
+
     def run_conversion(self):
         """Runs conversion function."""
-        self.write_to_logger('Converting data to NWB... please wait.')
+        job_id = uuid.uuid4().hex[:8]
+        self.write_to_logger('Converting data to NWB... please wait. Job id: ' + job_id)
         self.toggle_enable_gui(enable=False)
-        self.thread = ConversionFunctionThread(self)
+        self.thread = ConversionFunctionThread(self, job_id=job_id)
         self.thread.finished.connect(lambda: self.finish_conversion(error=self.thread.error))
+        self.log_timer.start()
         self.thread.start()
 
     def finish_conversion(self, error):
+        # Writes any remaining captured output
+        self.log_timer.stop()
+        while not self.output_queue.queue.empty():
+            self.flush_output_queue()
         if error:
             self.write_to_logger('ERROR:')
             self.write_to_logger(str(error))
         else:
             self.write_to_logger('Data successfully converted to NWB.')
+        if self.thread.log_path:
+            self.write_to_logger('Run record saved to ' + self.thread.log_path)
         self.toggle_enable_gui(enable=True)
 
     def toggle_enable_gui(self, enable):
@@ -299,8 +505,8 @@ class Application(QMainWindow):
         self.left_w.setEnabled(enable)
 
     def save_meta_file(self):
-        """Saves metadata to .yml file."""
-        filename, _ = QFileDialog.getSaveFileName(self, 'Save file', '', "(*.yml);;(*.yaml)")
+        """Saves metadata to a .yml, .json or .msgpack file."""
+        filename, _ = QFileDialog.getSaveFileName(self, 'Save file', '', metafile_filter)
         if filename:
             data = {}
             for grp in self.groups_list:
@@ -309,8 +515,11 @@ class Application(QMainWindow):
                     data[grp.group_type] = info
                 else:
                     return
-            with open(filename, 'w') as f:
-                yaml.dump(data, f, default_flow_style=False)
+            if self.storage_options:
+                data['StorageOptions'] = self.storage_options
+            save_metafile(filename, data, columnar=self.action_columnar.isChecked())
+            self.metafile_path = filename
+            self.autosave_thread.remove()
 
     def read_metadata_from_form(self):
         """Loads metadata from form."""
@@ -321,6 +530,8 @@ class Application(QMainWindow):
                 metadata[grp.group_type] = info
             else:
                 return
+        if self.storage_options:
+            metadata['StorageOptions'] = self.storage_options
         return metadata
 
     def form_to_editor(self):
@@ -364,7 +575,7 @@ class Application(QMainWindow):
 
     def load_meta_file(self, filename=None):
         """
-        Opens (or browsers to) a .yml file containing metadata for NWB. Then:
+        Opens (or browsers to) a .yml, .json or .msgpack file containing metadata for NWB. Then:
         1. loads the internal variable self.metadata with the content
         2. writes content to editor
         3. updates forms
@@ -374,12 +585,16 @@ class Application(QMainWindow):
                 parent=self,
                 caption='Open file',
                 directory='',
-                filter="(*.yml);;(*.yaml)"
+                filter=metafile_filter
             )
-            if ftype != '(*.yml)' or ftype != '(*.yaml)':
+            if filename == '':
                 return
-        with open(filename) as f:
-            self.metadata = yaml.safe_load(f)
+        # Format detected from extension or contents, repeated groups may be encoded as columns
+        self.metadata = load_metafile(filename)
+        # Edits before loading can be restored with undo
+        self.checkpoint()
+        self.metafile_path = filename
+        self.storage_options = dict(self.metadata.get('StorageOptions') or {})
         txt = yaml.dump(self.metadata, default_flow_style=False)
         self.editor.setText(txt)
         self.update_forms()
@@ -395,6 +610,13 @@ class Application(QMainWindow):
         if filename != '':
             self.conversion_module_path = filename
 
+    def open_chunk_advisor(self):
+        """Opens the chunk and codec advisor. Chosen settings go to storage options."""
+        dialog = ChunkAdvisorDialog(parent=self)
+        if dialog.exec_():
+            self.form_to_editor()
+            self.mark_dirty()
+
     def load_nwb_file(self):
         """Browser to nwb file location."""
         filename, ftype = QFileDialog.getSaveFileName(
@@ -406,8 +628,11 @@ class Application(QMainWindow):
         if filename is not None:
             self.lin_nwb_file.setText(filename)
 
-    def load_nwb_explorer(self):
-        """Browser to nwb file location."""
+    def load_nwb_explorer(self, quick=False):
+        """
+        Browser to nwb file location. With quick=True, the file is only opened
+        on the native tree view, without widgets or console.
+        """
         filename, ftype = QFileDialog.getOpenFileName(
             parent=self,
             caption='Load file',
@@ -415,79 +640,339 @@ class Application(QMainWindow):
             filter="(*nwb)"
         )
         if filename != '':
+            self.open_nwb_explorer(filename=filename, quick=quick)
+
+    def open_nwb_explorer(self, filename, quick=False):
+        """Opens file on a new explorer tab, or brings its tab to front if already there."""
+        # Files already on explorer are only brought to front
+        for ind in range(self.explorer_files.count()):
+            view = self.explorer_files.widget(ind)
+            if view.fname == filename:
+                self.explorer_files.setCurrentWidget(view)
+                if not view.is_open:
+                    self.open_explorer_file(view)
+                return
+        if quick:
+            mode = 'quick'
+        elif self.chk_shared_kernel.isChecked():
+            mode = 'shared'
+        else:
+            mode = 'separate'
+        view = ExplorerFileView(fname=filename, mode=mode, parent=self)
+        self.explorer_files.addTab(view, os.path.basename(filename))
+        self.explorer_files.setTabToolTip(self.explorer_files.indexOf(view), filename)
+        self.open_explorer_file(view)
+
+    def open_explorer_file(self, view):
+        """Opens (or reopens) a file view, then closes least recently viewed files beyond budget."""
+        view.open_file()
+        if view.mode != 'quick':
+            # Kernels write their connection file once the file is read: the console attaches
+            # to shared kernels, and the memory budget is checked again with the file loaded
+            view.kernel_file = os.path.join(self.temp_dir, uuid.uuid4().hex + '.kernel')
+            self.kernel_file_timer.start()
+        if view.mode == 'shared':
+            self.run_voila(view=view, kernel_file=view.kernel_file)
+        elif view.mode == 'separate':
             # Opens file on Ipython console
-            self.run_console(fname=filename)
+            self.run_console(fname=view.fname)
             # Opens file on NWBWidgets
-            self.run_voila(fname=filename)
+            self.run_voila(view=view, kernel_file=view.kernel_file)
+        self.explorer_lru[view] = True
+        self.explorer_lru.move_to_end(view)
+        self.refresh_summaries(paths=[view.fname])
+        if self.explorer_files.currentWidget() is view:
+            self.bind_console(view)
+        else:
+            self.explorer_files.setCurrentWidget(view)
+        self.enforce_explorer_budget()
 
-    def close_nwb_explorer(self):
-        """Close current NWB file view on explorer"""
-        if hasattr(self, 'voilathread'):
-            # Stop Voila thread
-            self.voilathread.stop()
+    def refresh_summaries(self, paths=None, on_refreshed=None):
+        """
+        Refreshes stale summaries of paths, by default of all indexed files, in background.
+        on_refreshed(path) is called for each summary refreshed.
+        """
+        thread = SummaryRefreshThread(index=self.summary_index, paths=paths)
+        if on_refreshed is not None:
+            # Connected before the thread starts, so no summary refreshed is missed
+            thread.refreshed.connect(on_refreshed)
+        thread.failed.connect(lambda path, error: self.write_to_logger(
+            'WARNING: could not index ' + path + ': ' + error))
+        thread.finished.connect(lambda: self.summary_threads.remove(thread))
+        self.summary_threads.append(thread)
+        thread.start()
+
+    def evict_explorer_file(self, view, refresh=True):
+        """Closes the HDF5 handle and kernels of a file. Its view keeps a summary, refreshed if stale."""
+        if view.mode == 'shared':
+            if (view.connection_file is not None and self.explorer_console.is_attached() and
+                    self.explorer_console.kernel_manager.connection_file == view.connection_file):
+                self.explorer_console.detach_kernel()
+                self.explorer_console.clear()
+        elif view.mode == 'separate':
             # Closes nwb file on console
-            self.explorer_console._execute('io.close()', True)
+            self.explorer_console.run_silent(
+                "_nwb_files.pop(r'" + str(view.fname) + "')[0].close()")
+        self.voila_pending = [(v, url) for v, url in self.voila_pending if v is not view]
+        view.close_file(refresh=refresh)
+        self.explorer_lru.pop(view, None)
+
+    def explorer_memory_usage(self):
+        """
+        Returns {view: resident memory in bytes} of the open files: their Voila kernel
+        and, for files open in 'separate' mode, an equal share of the console kernel.
+        Idle pre-warmed kernels are not counted, nor kernels still reading their file.
+        """
+        views = list(self.explorer_lru)
+        kernels = self.voila_server.kernel_memory([v.connection_file for v in views if v.connection_file])
+        memory = {view: kernels.get(view.connection_file, 0) for view in views}
+        separate = [view for view in views if view.mode == 'separate']
+        if separate:
+            console = self.explorer_console.memory_usage()
+            for view in separate:
+                memory[view] += console // len(separate)
+        return memory
+
+    def enforce_explorer_budget(self):
+        """Closes least recently viewed files while over the open files or memory budget."""
+        current = self.explorer_files.currentWidget()
+        # Measured once, closed files are taken out as kernels take time to exit
+        memory = self.explorer_memory_usage()
+        while len(self.explorer_lru) > 1:
+            over_files = len(self.explorer_lru) > explorer_max_open_files
+            over_memory = sum(memory.get(view, 0) for view in self.explorer_lru) > explorer_memory_budget
+            if not over_files and not over_memory:
+                break
+            oldest = next(iter(self.explorer_lru))
+            if oldest is current:
+                break
+            self.evict_explorer_file(oldest)
+            self.write_to_logger('Closed ' + oldest.fname + ' on explorer to free memory.')
+
+    def on_explorer_file_changed(self, index):
+        """Marks the file as most recently viewed and points the console to it."""
+        view = self.explorer_files.widget(index)
+        if view is None or not view.is_open:
+            return
+        self.explorer_lru.move_to_end(view)
+        self.bind_console(view)
+        self.enforce_explorer_budget()
+
+    def bind_console(self, view):
+        """Makes nwbfile, on the console, refer to the file of a view."""
+        if view.mode == 'quick':
+            return
+        if view.mode == 'shared':
+            if view.connection_file is None:
+                # Attached by attach_console_to_voila once the kernel is ready
+                self.explorer_console.detach_kernel()
+                self.explorer_console.clear()
+                self.explorer_console.print_text('Loading NWB file...\n')
+                return
+            manager = self.explorer_console.kernel_manager
+            if not self.explorer_console.is_attached() or manager.connection_file != view.connection_file:
+                self.explorer_console.attach_kernel(view.connection_file)
+                self.explorer_console.clear()
+                self.explorer_console.print_text(
+                    'nwbfile --> ' + os.path.basename(view.fname) + ' (shared with widgets)\n')
+        else:
+            self.explorer_console.detach_kernel()
+            self.explorer_console.run_silent(
+                "io, nwbfile = _nwb_files[r'" + str(view.fname) + "']")
             self.explorer_console.clear()
+            self.explorer_console.print_text('nwbfile --> ' + os.path.basename(view.fname) + '\n')
 
-    def run_console(self, fname):
-        """Loads NWB file on Ipython console"""
+    def toggle_console_process(self, checked):
+        """Moves the console kernel to (or back from) a separate process, reloading open files."""
+        if checked:
+            self.explorer_console.start_process_kernel()
+        else:
+            self.explorer_console.shutdown_process_kernel()
+        self.btn_console_interrupt.setEnabled(checked)
+        self.btn_console_restart.setEnabled(checked)
+        self.reload_console_files()
+
+    def restart_console_kernel(self):
+        self.explorer_console.restart_kernel()
+        self.reload_console_files()
+
+    def reload_console_files(self):
+        """Loads again, on the console own kernel, the files open in 'separate' mode."""
+        self.explorer_console.clear()
+        for view in self.explorer_lru:
+            if view.mode == 'separate':
+                self.run_console(fname=view.fname)
+        current = self.explorer_files.currentWidget()
+        if current is not None and current.is_open:
+            self.bind_console(current)
+
+    def close_nwb_explorer(self, index=None):
+        """Closes a file view on explorer, by default the current one."""
+        if index is None:
+            index = self.explorer_files.currentIndex()
+        view = self.explorer_files.widget(index)
+        if view is None:
+            return
+        if view.is_open:
+            self.evict_explorer_file(view, refresh=False)
+        self.explorer_files.removeTab(index)
+        view.deleteLater()
+
+    def attach_console_to_voila(self):
+        """
+        Reads connection files written by Voila kernels once they read their file,
+        attaching the console to the current shared one. Checks the memory budget
+        again for the kernels now ready.
+        """
+        waiting = False
+        ready = False
+        for view in self.explorer_lru:
+            if view.mode == 'quick' or view.connection_file is not None:
+                continue
+            connection_file = ''
+            if os.path.isfile(view.kernel_file):
+                with open(view.kernel_file) as f:
+                    connection_file = f.read().strip()
+            if not connection_file:
+                waiting = True
+                continue
+            view.connection_file = connection_file
+            ready = True
+            if view.mode == 'shared' and self.explorer_files.currentWidget() is view:
+                self.bind_console(view)
+        if not waiting:
+            self.kernel_file_timer.stop()
+        if ready:
+            self.enforce_explorer_budget()
+
+    def start_voila_server(self):
+        """Starts a single Voila server for this session, serving the temporary folder."""
+        self.write_explorer_notebook()
+        self.voila_server = VoilaServer(
+            path=self.temp_dir,
+            port=get_free_port(),
+            pool_size=voila_kernel_pool_size,
+            log_file=os.path.join(self.temp_dir, 'voila.log')
+        )
+        self.voila_server.start()
+        self.voila_ready = False
+        # (view, url) pairs waiting for the server
+        self.voila_pending = []
+        # Probes server readiness in background
+        self.voila_ready_thread = VoilaReadyThread(server=self.voila_server,
+                                                   timeout=voila_startup_timeout)
+        self.voila_ready_thread.ready.connect(self.on_voila_ready)
+        self.voila_ready_thread.failed.connect(self.on_voila_failed)
+        self.voila_ready_thread.start()
+
+    def on_voila_ready(self):
+        """Loads any file view requested while the Voila server was starting."""
+        self.voila_ready = True
+        for view, url in self.voila_pending:
+            self.update_html(view=view, url=url)
+        self.voila_pending = []
+
+    def on_voila_failed(self, error):
+        self.write_to_logger('ERROR: NWB widgets server could not start. ' + error)
+
+    def write_explorer_notebook(self):
+        """
+        Writes the explorer notebook to the temporary folder. Its first cell runs
+        in pre-warmed kernels, up to wait_for_request(). The second cell reads the
+        file given by the 'nwbfile' query parameter of the rendering request and,
+        if a 'kernel_file' parameter is given, writes the kernel connection file
+        path to it, so the console can share the kernel and its memory is measured.
+        """
+        nb = nbf.v4.new_notebook()
         # Imports extension modules
         imports_text = ""
         if self.extension_modules:
             for k, v in self.extension_modules.items():
                 imports_text += "\nfrom " + k + " import " + ", ".join(v)
-        code = """
+        code_warm = """
+            from nwbwidgets import nwb2widget
+            from urllib.parse import parse_qs
+            from voila.utils import wait_for_request
+            import matplotlib.pyplot as plt
             import pynwb
             import os
             """ + imports_text + """
-            fpath = os.path.join(r'""" + str(fname) + """')
+            wait_for_request()
+            """
+        code_file = """
+            query = parse_qs(os.getenv('QUERY_STRING', ''))
+            fpath = query['nwbfile'][0]
             io = pynwb.NWBHDF5IO(fpath, 'r', load_namespaces=True)
-            nwbfile = io.read()
+            nwb = io.read()
+            nwbfile = nwb
+            if 'kernel_file' in query:
+                from ipykernel import get_connection_file
+                kernel_file = query['kernel_file'][0]
+                with open(kernel_file + '.tmp', 'w') as f:
+                    f.write(get_connection_file())
+                os.replace(kernel_file + '.tmp', kernel_file)
+            nwb2widget(nwb)
             """
-        self.explorer_console._execute(code, True)
-        self.explorer_console.clear()
-        self.explorer_console.print_text('nwbfile --> Loaded NWB file\n')
+        nb['cells'] = [nbf.v4.new_code_cell(code_warm), nbf.v4.new_code_cell(code_file)]
+        nbf.write(nb, os.path.join(self.temp_dir, explorer_notebook))
 
-    def run_voila(self, fname):
-        """Set up notebook and run it with a dedicated Voila thread."""
-        # Stop any current Voila thread
-        self.close_nwb_explorer()
-        # Write Figure + ipywidgets to a .ipynb file
-        nb = nbf.v4.new_notebook()
+    def stop_voila_server(self):
+        """Stops the session Voila server."""
+        if hasattr(self, 'voila_server'):
+            self.voila_server.stop()
+            self.voila_ready_thread.wait()
+            del self.voila_server
+
+    def run_console(self, fname):
+        """Loads NWB file on Ipython console. Open files are kept in _nwb_files, by path."""
         # Imports extension modules
         imports_text = ""
         if self.extension_modules:
             for k, v in self.extension_modules.items():
                 imports_text += "\nfrom " + k + " import " + ", ".join(v)
         code = """
-            from nwbwidgets import nwb2widget
             import pynwb
             import os
             """ + imports_text + """
             fpath = os.path.join(r'""" + str(fname) + """')
             io = pynwb.NWBHDF5IO(fpath, 'r', load_namespaces=True)
-            nwb = io.read()
-            nwb2widget(nwb)
+            nwbfile = io.read()
+            _nwb_files = globals().get('_nwb_files', {})
+            _nwb_files[fpath] = (io, nwbfile)
             """
-        nb['cells'] = [nbf.v4.new_code_cell(code)]
-        nbpath = os.path.join(self.temp_dir, Path(fname).stem + '.ipynb')
-        nbf.write(nb, nbpath)
-        # Run instance of Voila with the just saved .ipynb file
-        port = get_free_port()
-        self.voilathread = voilaThread(parent=self, port=port, nbpath=nbpath)
-        self.voilathread.start()
-        # Load Voila instance on GUI
-        self.update_html(url='http://localhost:' + str(port))
-        # self.parent.write_to_logger(txt=self.name + " ready!")
-
-    def update_html(self, url):
+        self.explorer_console.detach_kernel()
+        self.explorer_console._execute(code, True)
+        self.explorer_console.clear()
+        self.explorer_console.print_text('nwbfile --> Loaded NWB file\n')
+
+    def run_voila(self, view, kernel_file=None):
+        """
+        Renders the explorer notebook for the file of a view on the session Voila server.
+        If kernel_file is given, the kernel writes its connection file path to it.
+        """
+        query = {'nwbfile': str(view.fname)}
+        if kernel_file is not None:
+            query['kernel_file'] = kernel_file
+        query = urlencode(query)
+        url = self.voila_server.url + '/voila/render/' + explorer_notebook + '?' + query
+        if self.voila_ready:
+            self.update_html(view=view, url=url)
+        else:
+            # Loaded as soon as the server answers
+            self.voila_pending.append((view, url))
+
+    def update_html(self, view, url):
         """Loads temporary HTML file and render it."""
-        self.html.load(QtCore.QUrl(url))
-        self.html.show()
+        view.html.load(QtCore.QUrl(url))
+        view.html.show()
 
     def clean_groups(self):
-        """Removes all groups widgets."""
+        """Removes all groups widgets. Subgroups are kept in the widget pool for reuse."""
         for grp in self.groups_list:
+            if grp.group_type in ('Ophys', 'Ecephys', 'Behavior', 'Ogen'):
+                for subgroup in grp.groups_list:
+                    self.widget_pool.release(subgroup)
+                grp.groups_list = []
             nWidgetsVbox = self.l_vbox1.count()
             for i in range(nWidgetsVbox):
                 if self.l_vbox1.itemAt(i) is not None:
@@ -496,89 +981,606 @@ class Application(QMainWindow):
         self.groups_list = []                        # deletes all list items
 
     def update_forms(self):
-        """Updates forms fields with values in metadata."""
+        """
+        Updates forms fields with values in metadata. Groups are built a slice at
+        a time from the event loop, the first slice right away, so the window stays
+        responsive and the first groups are shown immediately.
+        """
+        self.cancel_form_build(log=False)
         self.clean_groups()
+        self.autosave_cache = {}
+        self.dirty_groups = set()
+        self.search_dirty = set()
+        self.search_index.clear()
+        self.metadata = decode_columnar(self.metadata)
+        self.form_build_steps = self.iter_form_steps()
+        self.form_build_metrics = {'n_groups': self.count_form_steps(), 'reused': -self.widget_pool.reused}
+        self.form_build_t0 = time.perf_counter()
+        self.form_progress.setMaximum(self.form_build_metrics['n_groups'])
+        self.form_progress.setValue(0)
+        self.form_progress_w.show()
+        self.enable_form_actions(False)
+        self.build_forms_slice()
+        if self.form_build_steps is not None:
+            # Runs as soon as control returns to the event loop, i.e. when the
+            # user can first interact with the forms
+            QtCore.QTimer.singleShot(0, self.record_first_interaction)
+            self.form_build_timer.start()
+
+    def count_form_steps(self):
+        """Returns the number of groups built from metadata."""
+        n_steps = 0
+        for grp, value in self.metadata.items():
+            if grp in ('NWBFile', 'Subject'):
+                n_steps += 1
+            if grp in ('Ophys', 'Ecephys', 'Behavior', 'Ogen'):
+                n_steps += 1 + sum(len(v) if isinstance(v, list) else 1 for v in value.values())
+        return n_steps
+
+    def iter_form_steps(self):
+        """Builds groups from metadata, yielding after each one."""
+        module_classes = {'Ophys': GroupOphys, 'Ecephys': GroupEcephys,
+                          'Behavior': GroupBehavior, 'Ogen': GroupOgen}
         for grp in self.metadata:
             if grp == 'NWBFile':
                 item = GroupNwbfile(parent=self, metadata=self.metadata['NWBFile'])
                 item.write_fields(data=self.metadata['NWBFile'])
                 self.groups_list.append(item)
                 self.l_vbox1.addWidget(item)
+                yield
             if grp == 'Subject':
                 item = GroupSubject(parent=self)
                 item.write_fields(data=self.metadata['Subject'])
                 self.groups_list.append(item)
                 self.l_vbox1.addWidget(item)
-            if grp == 'Ophys':
-                item = GroupOphys(self)
-                for subgroup in self.metadata[grp]:
-                    # if many items of same class, in list
-                    if isinstance(self.metadata[grp][subgroup], list):
-                        for subsub in self.metadata[grp][subgroup]:
-                            item.add_group(
-                                group=self.name_to_gui_class[subgroup](parent=item),
-                                metadata=subsub
-                            )
-                    else:  # if it's just one item of this class
-                        item.add_group(
-                            group=self.name_to_gui_class[subgroup](parent=item),
-                            metadata=self.metadata[grp][subgroup]
-                        )
+                yield
+            if grp in module_classes:
+                item = module_classes[grp](self)
                 self.groups_list.append(item)
                 self.l_vbox1.addWidget(item)
-            if grp == 'Ecephys':
-                item = GroupEcephys(self)
+                yield
                 for subgroup in self.metadata[grp]:
                     # if many items of same class, in list
                     if isinstance(self.metadata[grp][subgroup], list):
                         for subsub in self.metadata[grp][subgroup]:
                             item.add_group(
-                                group=self.name_to_gui_class[subgroup](parent=item),
+                                group=self.widget_pool.acquire(self.name_to_gui_class[subgroup], parent=item),
                                 metadata=subsub
                             )
+                            yield
                     else:  # if it's just one item of this class
                         item.add_group(
-                            group=self.name_to_gui_class[subgroup](parent=item),
+                            group=self.widget_pool.acquire(self.name_to_gui_class[subgroup], parent=item),
                             metadata=self.metadata[grp][subgroup]
                         )
-                self.groups_list.append(item)
-                self.l_vbox1.addWidget(item)
-            if grp == 'Behavior':
-                item = GroupBehavior(self)
-                for subgroup in self.metadata[grp]:
-                    # if many items of same class, in list
-                    if isinstance(self.metadata[grp][subgroup], list):
-                        for subsub in self.metadata[grp][subgroup]:
-                            item.add_group(
-                                group=self.name_to_gui_class[subgroup](parent=item),
-                                metadata=subsub
-                            )
-                    else:  # if it's just one item of this class
-                        item.add_group(
-                            group=self.name_to_gui_class[subgroup](parent=item),
-                            metadata=self.metadata[grp][subgroup]
-                        )
-                self.groups_list.append(item)
-                self.l_vbox1.addWidget(item)
-            if grp == 'Ogen':
-                item = GroupOgen(self)
-                for subgroup in self.metadata[grp]:
-                    # if many items of same class, in list
-                    if isinstance(self.metadata[grp][subgroup], list):
-                        for subsub in self.metadata[grp][subgroup]:
-                            item.add_group(
-                                group=self.name_to_gui_class[subgroup](parent=item),
-                                metadata=subsub
-                            )
-                    else:  # if it's just one item of this class
-                        item.add_group(
-                            group=self.name_to_gui_class[subgroup](parent=item),
-                            metadata=self.metadata[grp][subgroup]
-                        )
-                self.groups_list.append(item)
-                self.l_vbox1.addWidget(item)
+                        yield
+
+    def build_forms_slice(self):
+        """Builds groups for at most form_build_slice_ms, at least one."""
+        t_end = time.perf_counter() + form_build_slice_ms / 1000
+        n_built = self.form_progress.value()
+        while True:
+            try:
+                next(self.form_build_steps)
+            except StopIteration:
+                self.form_progress.setValue(n_built)
+                self.finish_form_build()
+                return
+            n_built += 1
+            if time.perf_counter() >= t_end:
+                break
+        self.form_progress.setValue(n_built)
+
+    def record_first_interaction(self):
+        self.form_build_metrics.setdefault('first_interaction_ms',
+                                           1000 * (time.perf_counter() - self.form_build_t0))
+
+    def finish_form_build(self):
+        """Stops building forms and logs time to first interaction and total time."""
+        self.form_build_timer.stop()
+        self.form_build_steps = None
         nItems = self.l_vbox1.count()
         self.l_vbox1.addStretch(nItems)
+        for grp in self.groups_list:
+            self.watch_edits(grp)
+        self.form_progress_w.hide()
+        self.enable_form_actions(True)
+        # The built forms are an undo step, or the step being restored
+        if self.undo_rebuild:
+            self.undo_history.replace(self.read_forms_cached())
+            self.undo_rebuild = False
+        else:
+            self.undo_history.push(self.read_forms_cached())
+        self.update_undo_actions()
+        metrics = self.form_build_metrics
+        metrics['n_built'] = self.form_progress.value()
+        metrics['total_ms'] = 1000 * (time.perf_counter() - self.form_build_t0)
+        metrics['reused'] += self.widget_pool.reused
+        # Built in the first slice, interactive as soon as update_forms returns
+        metrics.setdefault('first_interaction_ms', metrics['total_ms'])
+        self.write_to_logger(
+            'Forms: {} of {} groups built ({} reused) in {:.0f} ms, first interaction after {:.0f} ms.'.format(
+                metrics['n_built'], metrics['n_groups'], metrics['reused'], metrics['total_ms'],
+                metrics['first_interaction_ms']))
+
+    def cancel_form_build(self, log=True):
+        """Stops building forms, groups built so far are kept."""
+        if self.form_build_steps is None:
+            return
+        self.form_build_steps.close()
+        self.finish_form_build()
+        if log:
+            self.write_to_logger('Forms building cancelled, groups not built are missing from '
+                                 'the forms and from metadata saved from them.')
+
+    def enable_form_actions(self, enable):
+        """Enables actions reading all forms, disabled while forms are being built."""
+        self.btn_save_meta.setEnabled(enable)
+        self.btn_run_conversion.setEnabled(enable)
+        self.btn_form_editor.setEnabled(enable)
+
+    def init_autosave(self):
+        """
+        Autosaves forms in background, autosave_delay ms after the last edit. Edit
+        signals of the forms mark the groups holding them dirty, see watch_edits.
+        """
+        # Groups edited since the last autosave and since the last search, and
+        # last read fields of each group
+        self.dirty_groups = set()
+        self.search_dirty = set()
+        self.autosave_cache = {}
+        self.autosave_timer = QtCore.QTimer(self)
+        self.autosave_timer.setSingleShot(True)
+        self.autosave_timer.setInterval(autosave_delay)
+        self.autosave_timer.timeout.connect(self.run_autosave)
+        self.autosave_thread = AutosaveThread(autosave_path(autosave_file))
+        self.autosave_thread.failed.connect(
+            lambda error: self.write_to_logger('Autosave failed: ' + error))
+        self.autosave_thread.start()
+
+    def watch_edits(self, widget):
+        """
+        Marks the groups holding a widget dirty on edits of its forms and of the forms
+        of its children, see mark_dirty. Forms built later, on first expand, are watched
+        once built. Forms already watched are skipped, so it can be called again.
+        """
+        for form in [widget] + widget.findChildren(QWidget):
+            if form.property('edits_watched'):
+                continue
+            form.setProperty('edits_watched', True)
+            mark = (lambda w: lambda *args: self.mark_dirty(w))(form)
+            if isinstance(form, QLineEdit):
+                form.textEdited.connect(mark)
+            elif isinstance(form, (QTextEdit, QPlainTextEdit)):
+                form.textChanged.connect(mark)
+            elif isinstance(form, QCheckBox):
+                form.toggled.connect(mark)
+            elif isinstance(form, QComboBox):
+                form.currentIndexChanged.connect(mark)
+            elif isinstance(form, (QSpinBox, QDoubleSpinBox)):
+                form.valueChanged.connect(mark)
+            elif isinstance(form, QAbstractItemView) and form.model() is not None:
+                # Tables edited in place, not the popups of comboboxes
+                parent = form.parentWidget()
+                while parent is not None and not isinstance(parent, QComboBox):
+                    parent = parent.parentWidget()
+                if parent is None:
+                    model = form.model()
+                    for signal in (model.dataChanged, model.rowsInserted, model.rowsRemoved,
+                                   model.columnsInserted, model.columnsRemoved, model.modelReset):
+                        signal.connect(mark)
+            if hasattr(form, 'content_ready'):
+                form.content_ready.connect((lambda w: lambda: self.watch_edits(w))(form))
+
+    def mark_dirty(self, widget=None):
+        """
+        Marks the groups holding widget as edited and (re)starts the autosave delay.
+        Without widget, e.g. for storage options, only (re)starts the delay.
+        """
+        if widget is not None:
+            groups = []
+            while widget is not None:
+                if hasattr(widget, 'read_fields') and hasattr(widget, 'group_type'):
+                    groups.append(widget)
+                widget = widget.parentWidget()
+            if not groups or groups[-1] not in self.groups_list:
+                # Not on the forms
+                return
+            self.dirty_groups.update(groups)
+            self.search_dirty.update(groups)
+        self.autosave_timer.start()
+
+    def read_cached(self, grp):
+        """
+        Returns the fields of a group, read again only if it was edited. Fields read
+        again share the subtrees unchanged with the cached ones, so undo steps compare
+        only the groups changed, see utils.undo_history.
+        """
+        if grp in self.dirty_groups or grp not in self.autosave_cache:
+            cached = self.autosave_cache.get(grp)
+            if grp.group_type in ('NWBFile', 'Subject'):
+                # Read in background, invalid fields (e.g. being typed) are not logged
+                value = grp.read_fields(log=False)
+            else:
+                value = grp.read_fields()
+            if isinstance(value, tuple):
+                if value[1] is not None:
+                    # Invalid fields, the last valid ones are kept, so the group is never left out
+                    if cached is not None:
+                        return cached
+                    value = (self.last_valid_fields(grp.group_type), None)
+                elif cached is not None:
+                    info = share(cached[0], value[0])
+                    value = cached if info is cached[0] else (info, None)
+            else:
+                value = share(cached, value)
+            self.autosave_cache[grp] = value
+        return self.autosave_cache[grp]
+
+    def last_valid_fields(self, group_type):
+        """Returns the fields of a general group on the current undo step or, if none, as loaded."""
+        current = self.undo_history.current
+        if current is not None and group_type in current:
+            return current[group_type]
+        return copy.deepcopy(self.metadata.get(group_type) or {})
+
+    def read_forms_cached(self):
+        """Returns the metadata of the forms, reading again only the groups edited."""
+        metadata = {}
+        for grp in self.groups_list:
+            if grp.group_type in ('Ophys', 'Ecephys', 'Behavior', 'Ogen'):
+                info, error = grp.read_fields(read=self.read_cached)
+            else:
+                info, error = self.read_cached(grp)
+            if error is None:
+                metadata[grp.group_type] = info
+        if self.storage_options:
+            # Copied, the storage options are changed in place
+            metadata['StorageOptions'] = dict(self.storage_options)
+        self.dirty_groups.clear()
+        return metadata
+
+    def run_autosave(self):
+        """Reads edited groups, adds an undo step and submits the metadata to the autosave thread."""
+        if self.form_build_steps is not None:
+            self.autosave_timer.start()
+            return
+        metadata = self.read_forms_cached()
+        if self.undo_history.push(metadata):
+            self.update_undo_actions()
+        self.autosave_thread.submit({
+            'metafile': self.metafile_path,
+            'saved_at': datetime.datetime.now(),
+            'metadata': metadata,
+        })
+
+    def checkpoint(self):
+        """Adds an undo step with the current forms, e.g. before replacing them."""
+        if self.form_build_steps is None and self.groups_list:
+            self.undo_history.push(self.read_forms_cached())
+            self.update_undo_actions()
+
+    def update_undo_actions(self):
+        self.action_undo.setEnabled(self.undo_history.can_undo())
+        self.action_redo.setEnabled(self.undo_history.can_redo())
+
+    def undo(self):
+        """Restores the previous undo step, edits not in a step yet are added as one first."""
+        if self.form_build_steps is not None:
+            return
+        self.checkpoint()
+        current = self.undo_history.current
+        target = self.undo_history.undo()
+        if target is not None:
+            self.apply_undo_step(current, target)
+
+    def redo(self):
+        """Restores the next undo step. Edits not in a step yet discard the next steps."""
+        if self.form_build_steps is not None:
+            return
+        self.checkpoint()
+        current = self.undo_history.current
+        target = self.undo_history.redo()
+        if target is not None:
+            self.apply_undo_step(current, target)
+
+    def apply_undo_step(self, current, target):
+        """
+        Changes the forms from metadata current to target, replacing only the groups
+        that differ. Forms are rebuilt if modules or general groups were added or removed.
+        """
+        groups = {grp.group_type: grp for grp in self.groups_list}
+        # General groups on the forms are never removed, steps may lack them (e.g. taken
+        # by older versions while they could not be read), they are kept as they are
+        general = ('NWBFile', 'Subject')
+        patches = [(op, path, value) for op, path, value in diff(current, target)
+                   if not (op == 'remove' and len(path) == 1 and path[0] in general)]
+        self.autosave_timer.stop()
+        if any(len(path) == 1 and path[0] != 'StorageOptions' and
+               not (path[0] in general and path[0] in groups) for op, path, value in patches):
+            self.undo_rebuild = True
+            self.metadata = self.with_general_groups(current, target)
+            self.update_forms()
+            return
+        changed = {}
+        for op, path, value in patches:
+            if path[0] == 'StorageOptions':
+                self.storage_options = dict(target.get('StorageOptions') or {})
+            elif path[0] in ('NWBFile', 'Subject'):
+                changed[path[0]] = None
+            else:
+                # Named groups by name, others (single groups or lists) as a whole
+                module = path[0]
+                named = len(path) > 2 and isinstance(target[module].get(path[1], current[module].get(path[1])), list)
+                names = changed.setdefault((module, path[1]), set())
+                if names is not None:
+                    if named:
+                        names.add(path[2])
+                    else:
+                        changed[(module, path[1])] = None
+        try:
+            for key, names in changed.items():
+                if key in ('NWBFile', 'Subject'):
+                    self.replace_general_group(groups[key], target[key])
+                else:
+                    self.patch_module_groups(groups[key[0]], key[1], current[key[0]].get(key[1]),
+                                             target[key[0]].get(key[1]), names)
+        except (ValueError, KeyError) as error:
+            # Forms partly patched, rebuilt from the restored step instead
+            self.write_to_logger('Undo history: forms rebuilt, patching failed: ' + str(error))
+            self.undo_rebuild = True
+            self.metadata = self.with_general_groups(current, target)
+            self.update_forms()
+            return
+        for grp in groups.values():
+            if grp.group_type in ('Ophys', 'Ecephys', 'Behavior', 'Ogen'):
+                self.refresh_module(grp)
+        # The forms read back are the restored step
+        self.undo_history.replace(self.read_forms_cached())
+        # Replaced groups may be reused widgets, indexed with their former fields
+        self.search_index.clear()
+        self.update_undo_actions()
+        self.autosave_timer.start()
+        self.write_to_logger('Undo history: {} groups restored.'.format(len(changed)))
+
+    def with_general_groups(self, current, target):
+        """Returns a copy of the metadata target with the general groups only current has, first."""
+        metadata = {k: current[k] for k in ('NWBFile', 'Subject') if k in current and k not in target}
+        metadata.update(target)
+        return copy.deepcopy(metadata)
+
+    def refresh_module(self, module):
+        """Refreshes the delete combobox, if any, and references of the groups of a module."""
+        if hasattr(module, 'refresh_del_combo'):
+            module.refresh_del_combo()
+        else:
+            module.refresh_children()
+
+    def replace_general_group(self, old, data):
+        """Replaces the NWBFile or Subject group with one holding data."""
+        # Groups may change the metadata they are built from, snapshots must not change
+        data = copy.deepcopy(data)
+        if old.group_type == 'NWBFile':
+            new = GroupNwbfile(parent=self, metadata=data)
+        else:
+            new = GroupSubject(parent=self)
+        new.write_fields(data=data)
+        pos = self.l_vbox1.indexOf(old)
+        self.groups_list[self.groups_list.index(old)] = new
+        old.setParent(None)
+        self.autosave_cache.pop(old, None)
+        self.l_vbox1.insertWidget(pos, new)
+        self.watch_edits(new)
+
+    def patch_module_groups(self, module, group_type, old_items, new_items, names=None):
+        """
+        Removes, adds or replaces the groups of group_type of a module to go from
+        old_items to new_items (a list or a single group metadata), only those
+        named in names if given. Replaced (and renamed) groups keep their position.
+        """
+        widgets = {grp.form_name.text(): grp for grp in module.groups_list
+                   if grp.group_type == group_type}
+        for op, old_name, data in plan_group_patches(old_items, new_items, names):
+            old = None
+            if op != 'add':
+                # Each widget is taken once
+                old = widgets.pop(old_name, None)
+                if old is None and old_name is None and len(widgets) == 1:
+                    # Single group of a type without names
+                    old = widgets.popitem()[1]
+            idx, pos = None, None
+            if old is not None:
+                idx = module.groups_list.index(old)
+                pos = module.vbox1.indexOf(old)
+                module.groups_list.remove(old)
+                self.autosave_cache.pop(old, None)
+                self.widget_pool.release(old)
+            if op == 'remove':
+                continue
+            new = self.widget_pool.acquire(self.name_to_gui_class[group_type], parent=module)
+            # Unbuilt groups keep the metadata they are given, snapshots must not change
+            module.add_group(group=new, metadata=copy.deepcopy(data))
+            if old is not None:
+                module.vbox1.removeWidget(new)
+                module.vbox1.insertWidget(pos, new)
+                module.groups_list.remove(new)
+                module.groups_list.insert(idx, new)
+
+    def refresh_search_index(self):
+        """Indexes groups added or edited since the last search, removes groups deleted."""
+        groups = {}
+        for grp in self.groups_list:
+            if grp.group_type in ('Ophys', 'Ecephys', 'Behavior', 'Ogen'):
+                for subgroup in grp.groups_list:
+                    groups[subgroup] = grp.group_type
+            else:
+                groups[grp] = None
+        for grp in self.search_index.keys():
+            if grp not in groups:
+                self.search_index.remove(grp)
+        for grp, module in groups.items():
+            if grp in self.search_dirty or grp not in self.search_index:
+                data = self.read_cached(grp)
+                if isinstance(data, tuple):
+                    data = data[0] or {}
+                name = grp.form_name.text() if hasattr(grp, 'form_name') else grp.group_type
+                fields = flatten_fields({k: v for k, v in data.items() if k != 'name'})
+                if module is not None:
+                    fields.append(('module', module))
+                self.search_index.update(grp, name, grp.group_type, fields)
+        self.search_dirty.clear()
+
+    def search_forms(self, text):
+        """Lists the groups matching the search text."""
+        self.lst_search.clear()
+        self.search_results = []
+        if not text.strip() or self.form_build_steps is not None:
+            self.lst_search.hide()
+            self.lbl_search.setText('')
+            self.btn_edit_all.setEnabled(False)
+            return
+        t0 = time.perf_counter()
+        self.refresh_search_index()
+        results = self.search_index.search(text, limit=search_max_results)
+        for grp, field, value in results:
+            entry = self.search_index.entries[grp]
+            label = entry['name'] + ' (' + entry['group_type'] + ')'
+            if field:
+                label += '  ' + field + ': ' + value
+            self.lst_search.addItem(label)
+            self.search_results.append(grp)
+        self.lst_search.setVisible(len(results) > 0)
+        self.btn_edit_all.setEnabled(len(results) > 0)
+        self.lbl_search.setText('{}{} results, {:.1f} ms'.format(
+            len(results), '+' if len(results) == search_max_results else '',
+            1000 * (time.perf_counter() - t0)))
+
+    def jump_to_result(self, item):
+        """Expands the group of a search result and scrolls to it."""
+        if item is None:
+            return
+        grp = self.search_results[self.lst_search.row(item)]
+        if hasattr(grp, 'toggle_button') and not grp.toggle_button.isChecked():
+            grp.toggle_button.click()
+            # Scrolls again once expanded
+            QtCore.QTimer.singleShot(grp.toggle_animation.duration(),
+                                     lambda: self.l_scroll.ensureWidgetVisible(grp))
+        self.l_scroll.ensureWidgetVisible(grp)
+
+    def edit_selected_groups(self, all_matches=False):
+        """
+        Opens the mass edit dialog for the module groups selected on the search results
+        or, if all_matches, for all groups matching the search, listed or not.
+        """
+        modules = {}
+        for grp in self.groups_list:
+            if grp.group_type in ('Ophys', 'Ecephys', 'Behavior', 'Ogen'):
+                for subgroup in grp.groups_list:
+                    modules[subgroup] = grp
+        if all_matches:
+            self.refresh_search_index()
+            selected = self.search_index.matching_keys(self.lin_search.text())
+        else:
+            rows = sorted(self.lst_search.row(item) for item in self.lst_search.selectedItems())
+            selected = [self.search_results[row] for row in rows]
+        groups = [grp for grp in selected if grp in modules]
+        if not groups:
+            self.write_to_logger('Mass edit: select groups of modules (e.g. Ecephys), general groups '
+                                 'are edited on their forms.')
+            return
+        data = [self.read_cached(grp) for grp in groups]
+        titles = [grp.form_name.text() for grp in groups]
+        dialog = MassEditDialog(titles, data, parent=self)
+        if dialog.exec_():
+            self.apply_mass_edit(groups, data, dialog.changes, modules)
+
+    def apply_mass_edit(self, groups, data, changes, modules):
+        """
+        Sets fields of many groups as one undo step. Name change signals are blocked while
+        writing, references are refreshed once per module at the end.
+        """
+        duplicates = self.mass_edit_duplicates(groups, data, changes, modules)
+        if duplicates:
+            text = 'Mass edit not applied, names would not be unique: ' + ', '.join(duplicates[:5]) + \
+                   (', ...' if len(duplicates) > 5 else '')
+            self.write_to_logger(text)
+            QMessageBox.warning(self, 'Mass edit', text + '.')
+            return
+        t0 = time.perf_counter()
+        self.checkpoint()
+        changed_modules = []
+        n_changed = 0
+        for grp, values, fields in zip(groups, data, changes):
+            if all(values.get(k) == v for k, v in fields.items()):
+                continue
+            blocked = grp.form_name.blockSignals(True)
+            try:
+                grp.write_fields(dict(values, **fields))
+            finally:
+                grp.form_name.blockSignals(blocked)
+            self.dirty_groups.add(grp)
+            self.search_dirty.add(grp)
+            if modules[grp] not in changed_modules:
+                changed_modules.append(modules[grp])
+            n_changed += 1
+        for module in changed_modules:
+            self.refresh_module(module)
+        if self.undo_history.push(self.read_forms_cached()):
+            self.update_undo_actions()
+            self.autosave_timer.start()
+        self.search_forms(self.lin_search.text())
+        self.write_to_logger('Mass edit: {} of {} groups changed in {:.0f} ms.'.format(
+            n_changed, len(groups), 1000 * (time.perf_counter() - t0)))
+
+    def mass_edit_duplicates(self, groups, data, changes, modules):
+        """Returns the names a mass edit would give to more than one group of the same type in a module."""
+        new_names = {grp: fields.get('name', values.get('name'))
+                     for grp, values, fields in zip(groups, data, changes)}
+        duplicates = []
+        for module in dict.fromkeys(modules[grp] for grp in groups):
+            names = {}
+            for subgroup in module.groups_list:
+                name = new_names[subgroup] if subgroup in new_names else subgroup.form_name.text()
+                key = (subgroup.group_type, str(name))
+                names[key] = names.get(key, 0) + 1
+            duplicates.extend(module.group_type + '/' + group_type + '/' + name
+                              for (group_type, name), count in names.items() if count > 1)
+        return duplicates
+
+    def offer_autosave_restore(self):
+        """
+        Asks whether to restore the last autosave of an instance no longer running, if
+        any. It is claimed first, so no other instance offers it, and removed if declined.
+        """
+        record = None
+        for path in orphan_autosaves(autosave_file):
+            if not claim_autosave(path, self.autosave_thread.path):
+                continue
+            record = read_autosave(self.autosave_thread.path)
+            if record is not None:
+                break
+            self.autosave_thread.remove()
+        if record is None:
+            return
+        saved_at = record.get('saved_at')
+        text = 'Unsaved metadata from a previous session was found'
+        if isinstance(saved_at, datetime.datetime):
+            text += ' (autosaved ' + saved_at.strftime('%Y-%m-%d %H:%M') + ')'
+        if record.get('metafile'):
+            text += ',\nedited from ' + str(record['metafile'])
+        answer = QMessageBox.question(self, 'Restore autosave', text + '.\n\nRestore it?',
+                                      QMessageBox.Yes | QMessageBox.No, QMessageBox.Yes)
+        if answer != QMessageBox.Yes:
+            self.autosave_thread.remove()
+            return
+        self.checkpoint()
+        self.metadata = record['metadata']
+        self.metafile_path = record.get('metafile')
+        self.storage_options = dict(self.metadata.get('StorageOptions') or {})
+        txt = yaml.dump(self.metadata, default_flow_style=False)
+        self.editor.setText(txt)
+        self.update_forms()
+        self.write_to_logger('Restored autosaved metadata.')
 
     def about(self):
         """About dialog."""
@@ -593,96 +1595,84 @@ class Application(QMainWindow):
 
     def closeEvent(self, event):
         """Before exiting, executes these actions."""
-        # Stop any current Voila thread
-        self.close_nwb_explorer()
+        # Closes all files on explorer and stops the Voila server
+        if hasattr(self, 'explorer_files'):
+            while self.explorer_files.count():
+                self.close_nwb_explorer(index=0)
+            self.catalog.stop()
+            for thread in list(self.summary_threads):
+                thread.requestInterruption()
+                thread.wait()
+            self.explorer_console.shutdown_process_kernel()
+        self.stop_voila_server()
+        # Writes edits not autosaved yet, kept for restore if not saved to a metafile
+        QApplication.instance().removeEventFilter(self)
+        if self.autosave_timer.isActive() or self.dirty_groups:
+            self.autosave_timer.stop()
+            self.run_autosave()
+        self.autosave_thread.stop()
         # Remove any remaining temporary directory/files
         shutil.rmtree(self.temp_dir, ignore_errors=False, onerror=None)
         event.accept()
 
 
-def get_free_port():
-    not_free = True
-    while not_free:
-        port = np.random.randint(7000, 7999)
-        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
-            res = sock.connect_ex(('localhost', port))
-            if res != 0:
-                not_free = False
-    return port
-
-
-def is_listening_to_port(process, port):
-    is_listening = False
-    # iterate over processe's children
-    for child in process.children(recursive=True):
-        # iterate over child connections
-        for con in child.connections():
-            if con.status == 'LISTEN':
-                if isinstance(con.laddr.port, int):
-                    is_listening = con.laddr.port == port
-                elif isinstance(con.laddr.port, list):
-                    is_listening = port in con.laddr.port
-                return is_listening
-    return is_listening
-
-
-class voilaThread(QtCore.QThread):
-    def __init__(self, parent, port, nbpath):
-        super().__init__()
-        self.parent = parent
-        self.port = port
-        self.nbpath = nbpath
-
-    def run(self):
-        os.system("voila " + self.nbpath + " --no-browser --port " + str(self.port))
-
-    def stop(self):
-        pid = os.getpid()
-        process = psutil.Process(pid)
-        proc_list = []
-        for child in process.children(recursive=True):
-            is_listening = is_listening_to_port(child, self.port)
-            if is_listening:
-                proc_list.append(child)
-        for proc in proc_list:
-            for child in process.children(recursive=True):
-                child.kill()
-
-
 # Runs conversion function, useful to wait for thread
 class ConversionFunctionThread(QtCore.QThread):
-    def __init__(self, parent):
+    def __init__(self, parent, job_id=''):
         super().__init__()
         self.parent = parent
+        self.job_id = job_id
         self.error = None
+        self.log_path = None
 
     def run(self):
+        # stdout, stderr and logging records are forwarded to the GUI logger
+        with OutputCapture(self.parent.output_queue, job_id=self.job_id):
+            self.run_job()
+
+    def run_job(self):
         if not self.parent.lin_nwb_file.text():
             error = ValueError('select a save location for nwbfile')
             self.error = error.__class__.__name__ + ':' + str(error)
             raise error
+        f_nwb = self.parent.lin_nwb_file.text()
+        run_record = RunRecord(job_id=self.job_id, metafile=self.parent.metafile_path,
+                               output=f_nwb, source_paths=self.parent.source_paths)
+        run_record.start()
         if self.parent.conversion_module_path:  # if not an empty string (if value was selected from gui)
             try:
-                mod_file = self.parent.conversion_module_path
-                spec = importlib.util.spec_from_file_location(os.path.basename(mod_file).strip('.py'), mod_file)
-                conv_module = importlib.util.module_from_spec(spec)
-                spec.loader.exec_module(conv_module)
-                metadata = self.parent.read_metadata_from_form()
-                conv_module.conversion_function(source_paths=self.parent.source_paths,
-                                                f_nwb=self.parent.lin_nwb_file.text(),
-                                                metadata=metadata,
-                                                **self.parent.kwargs_fields)
+                with run_record.stage('module_import'):
+                    mod_file = self.parent.conversion_module_path
+                    spec = importlib.util.spec_from_file_location(os.path.basename(mod_file).strip('.py'), mod_file)
+                    conv_module = importlib.util.module_from_spec(spec)
+                    spec.loader.exec_module(conv_module)
+                with run_record.stage('metadata_read'):
+                    metadata = self.parent.read_metadata_from_form()
+                # conversion_function saves the file itself, so there is no separate save stage
+                with run_record.stage('conversion'):
+                    conv_module.conversion_function(source_paths=self.parent.source_paths,
+                                                    f_nwb=f_nwb,
+                                                    metadata=metadata,
+                                                    **self.parent.kwargs_fields)
             except Exception as error:
                 self.error = error.__class__.__name__ + ':' + str(error)
         else:
             try:
-                metadata = self.parent.read_metadata_from_form()
-                fileloc = list(self.parent.source_paths.values())[0]['path']
-                conversion_obj = self.parent.conversion_class(fileloc, None, metadata)
-                conversion_obj.run_conversion()
-                conversion_obj.save(self.parent.lin_nwb_file.text())
+                with run_record.stage('metadata_read'):
+                    metadata = self.parent.read_metadata_from_form()
+                with run_record.stage('conversion'):
+                    fileloc = list(self.parent.source_paths.values())[0]['path']
+                    conversion_obj = self.parent.conversion_class(fileloc, None, metadata)
+                    conversion_obj.run_conversion()
+                with run_record.stage('save'):
+                    conversion_obj.save(f_nwb)
             except Exception as error:
                 self.error = error.__class__.__name__ + ':' + str(error)
+        run_record.finish(error=self.error)
+        try:
+            self.log_path = run_record.write()
+        except OSError as error:
+            conversion_logger.warning('could not write run log: %s', error)
 
 
 class CustomComboBox(QComboBox):
@@ -0,0 +1,162 @@
+"""
+Background autosave of the metadata forms
+
+Forms are read on the GUI thread, only groups edited since the last autosave
+(the others are taken from a cache), and the record is serialized (msgpack,
+see utils.metafile) and written on a worker thread. Only the latest record is
+written: records submitted while a write is in progress replace each other.
+Files are replaced atomically (written to a temporary file in the same folder,
+flushed to disk and renamed), so a crash leaves either the previous or the
+new autosave, never a partial one.
+
+Each running instance writes its own file, named after its owner (pid and
+start time, so a reused pid is not mistaken for it). Autosaves of instances no
+longer running are offered for restore, and claimed by renaming them to the
+file of the instance restoring them, so only one instance can take each.
+"""
+from PySide2 import QtCore
+
+import tempfile
+import threading
+import glob
+import re
+import os
+import psutil
+
+from nwb_qt_gui.utils.metafile import dumps, loads
+
+
+def write_atomic(path, data):
+    """Replaces the file at path with data, atomically."""
+    dir_name = os.path.dirname(path) or '.'
+    os.makedirs(dir_name, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=dir_name, prefix='.' + os.path.basename(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def instance_owner(pid=None):
+    """Returns the owner id of a process, by default this one: its pid and start time."""
+    process = psutil.Process(pid)
+    return '{}-{}'.format(process.pid, int(process.create_time()))
+
+
+def autosave_path(pattern, owner=None):
+    """Returns the autosave file of an owner, by default this instance."""
+    return os.path.expanduser(pattern.format(owner=owner or instance_owner()))
+
+
+def _is_running(owner):
+    try:
+        pid, started = owner.split('-')
+        return instance_owner(int(pid)) == owner
+    except (psutil.Error, ValueError):
+        return False
+
+
+def orphan_autosaves(pattern):
+    """Returns the autosave files of instances no longer running, most recent first."""
+    prefix, suffix = os.path.expanduser(pattern).split('{owner}')
+    owner_pattern = re.compile(re.escape(prefix) + r'(\d+-\d+)' + re.escape(suffix) + '$')
+    paths = []
+    for path in glob.glob(glob.escape(prefix) + '*' + glob.escape(suffix)):
+        match = owner_pattern.match(path)
+        if match and not _is_running(match.group(1)):
+            try:
+                paths.append((os.path.getmtime(path), path))
+            except OSError:
+                pass
+    return [path for mtime, path in sorted(paths, reverse=True)]
+
+
+def claim_autosave(path, own_path):
+    """Moves an autosave file to own_path. Returns False if another instance claimed it first."""
+    try:
+        os.replace(path, own_path)
+    except FileNotFoundError:
+        return False
+    return True
+
+
+def read_autosave(path):
+    """Returns the record of an autosave file, None if missing or unreadable."""
+    path = os.path.expanduser(path)
+    try:
+        with open(path, 'rb') as f:
+            record = loads(f.read(), 'msgpack')
+    except (OSError, ValueError, TypeError, UnicodeDecodeError):
+        return None
+    if not isinstance(record, dict) or not isinstance(record.get('metadata'), dict):
+        return None
+    return record
+
+
+class AutosaveThread(QtCore.QThread):
+    saved = QtCore.Signal(str)
+    failed = QtCore.Signal(str)
+
+    def __init__(self, path):
+        """Writes submitted records to path in background, the latest one only."""
+        super().__init__()
+        self.path = os.path.expanduser(path)
+        self.condition = threading.Condition()
+        # Held while the file is written or removed
+        self.file_lock = threading.Lock()
+        self.pending = None
+        self.stopping = False
+        # Incremented on remove, records taken before are not written
+        self.generation = 0
+
+    def submit(self, record):
+        """Schedules record to be written, replacing any record not written yet."""
+        with self.condition:
+            self.pending = record
+            self.condition.notify()
+
+    def remove(self):
+        """Discards any pending record and removes the autosave file."""
+        with self.condition:
+            self.pending = None
+        with self.file_lock:
+            self.generation += 1
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+
+    def stop(self):
+        """Writes any pending record and waits for the thread to finish."""
+        with self.condition:
+            self.stopping = True
+            self.condition.notify()
+        self.wait()
+
+    def run(self):
+        while True:
+            with self.condition:
+                while self.pending is None and not self.stopping:
+                    self.condition.wait()
+                record, self.pending = self.pending, None
+                if record is None:
+                    return
+                generation = self.generation
+            try:
+                data = dumps(record, 'msgpack')
+                with self.file_lock:
+                    if generation != self.generation:
+                        continue
+                    write_atomic(self.path, data)
+            except (OSError, TypeError, ValueError) as error:
+                self.failed.emit(str(error))
+            else:
+                self.saved.emit(self.path)
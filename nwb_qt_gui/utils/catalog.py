@@ -0,0 +1,110 @@
+"""
+Indexing of directory trees of NWB files for the catalog
+
+Files are summarized in parallel by a process pool and stored in the summary
+index. Only new files and files whose size or modification time changed are
+read, so rescanning a directory is incremental. Workers are spawned, not
+forked: the GUI process runs other threads that may hold locks (h5py, sqlite,
+logging) a forked worker would inherit locked.
+"""
+from PySide2 import QtCore
+from nwb_qt_gui.utils.summary_index import compute_summary
+
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+import multiprocessing
+import os
+
+
+catalog_columns = ['File', 'Identifier', 'Session start', 'Subject', 'Species', 'Lab',
+                   'Devices', 'Acquisition', 'Size']
+
+
+def find_nwb_files(root):
+    """Returns the paths of all .nwb files under a directory."""
+    paths = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        for fname in filenames:
+            if fname.lower().endswith('.nwb'):
+                paths.append(os.path.abspath(os.path.join(dirpath, fname)))
+    return paths
+
+
+def catalog_row(path, metadata):
+    """Returns the catalog columns of a file from its summary (see catalog_columns)."""
+    session = metadata['session']
+    groups = metadata['groups']
+    return [
+        os.path.basename(path),
+        str(session.get('identifier', '')),
+        str(session.get('session_start_time', '')),
+        str(session.get('subject_id', '')),
+        str(session.get('species', '')),
+        str(session.get('lab', '')),
+        ', '.join(groups.get('general/devices', {})),
+        ', '.join(groups.get('acquisition', {})),
+        metadata['size'],
+    ]
+
+
+def _stat_and_summary(path):
+    """Runs on pool workers. File stats are taken before reading, so a file changed meanwhile stays stale."""
+    st = os.stat(path)
+    return st.st_size, st.st_mtime_ns, compute_summary(path)
+
+
+# Interval (s) at which interruption is checked while files are being summarized
+_poll_interval = 0.2
+
+
+class CatalogIndexThread(QtCore.QThread):
+    progress = QtCore.Signal(int, int)
+    indexed = QtCore.Signal(str)
+    failed = QtCore.Signal(str, str)
+
+    def __init__(self, index, root, max_workers=None):
+        """Indexes new and changed NWB files under root with a process pool."""
+        super().__init__()
+        self.index = index
+        self.root = root
+        self.max_workers = max_workers
+
+    def run(self):
+        on_disk = find_nwb_files(self.root)
+        # Files removed from disk are dropped from the index
+        root = os.path.join(os.path.abspath(self.root), '')
+        for path in set(self.index.paths()) - set(on_disk):
+            if path.startswith(root):
+                self.index.remove(path)
+        paths = self.index.stale_paths(on_disk)
+        self.progress.emit(0, len(paths))
+        if not paths:
+            return
+        executor = ProcessPoolExecutor(max_workers=self.max_workers,
+                                       mp_context=multiprocessing.get_context('spawn'))
+        pending = set()
+        try:
+            futures = {executor.submit(_stat_and_summary, path): path for path in paths}
+            pending = set(futures)
+            n_done = 0
+            while pending:
+                done, pending = wait(pending, timeout=_poll_interval, return_when=FIRST_COMPLETED)
+                if self.isInterruptionRequested():
+                    return
+                for future in done:
+                    path = futures[future]
+                    try:
+                        size, mtime_ns, summary = future.result()
+                    except Exception as error:
+                        # Unreadable files are reported and skipped
+                        self.failed.emit(path, str(error))
+                    else:
+                        self.index.put(path, summary, size, mtime_ns)
+                        self.indexed.emit(path)
+                    n_done += 1
+                    self.progress.emit(n_done, len(paths))
+        finally:
+            # Does not wait for files being summarized when interrupted, nor start
+            # the queued ones (shutdown(cancel_futures=True) needs Python 3.9)
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=not self.isInterruptionRequested())
@@ -0,0 +1,228 @@
+"""
+Chunk shape and codec advisor
+
+Candidate chunk shapes are derived from the shape of the whole source
+dataset, shaped (time, ...). Each candidate is benchmarked on its own sample
+slab of the source, a few chunks long along each axis (e.g. a long time window
+of a few channels for channel-major chunks), written to temporary HDF5 files
+with every codec. For each file, the write throughput, the compression ratio
+and the read time of time-major (all channels of a time window) and
+channel-major (whole duration of a channel) access patterns are measured.
+Times are per MB of data, so samples of different shapes compare. Reads go
+through a new file handle with the HDF5 chunk cache disabled; the OS page
+cache is not dropped, so read times mostly measure decompression and chunk
+overhead rather than disk speed.
+
+The recommended settings are stored in the metadata 'StorageOptions' entry,
+as keyword arguments of hdmf's H5DataIO.
+"""
+import contextlib
+import tempfile
+import time
+import os
+import h5py
+import numpy as np
+
+
+# Approximate chunk sizes (bytes) tried for each layout
+chunk_target_sizes = [256 * 1024, 1024 ** 2, 4 * 1024 ** 2]
+
+# Codecs available with any h5py build: (compression, compression_opts, shuffle)
+codecs = [
+    (None, None, False),
+    ('lzf', None, False),
+    ('lzf', None, True),
+    ('gzip', 1, True),
+    ('gzip', 4, False),
+    ('gzip', 4, True),
+    ('gzip', 6, True),
+]
+
+# Chunks of each candidate along each axis of its sample, and maximum sample size (bytes)
+sample_chunks = 2
+sample_max_bytes = 32 * 1024 ** 2
+
+# Data of full rows (all channels) read by each time-major read (bytes)
+time_window_bytes = 1024 ** 2
+
+# Weights of (time-major read, channel-major read, stored size, write time) on the score
+objectives = {
+    'balanced': (1., 1., 1., 0.5),
+    'time-major reads': (3., 0.5, 1., 0.5),
+    'channel-major reads': (0.5, 3., 1., 0.5),
+    'file size': (0.5, 0.5, 3., 0.5),
+}
+
+
+@contextlib.contextmanager
+def open_source(path, dataset_path=None):
+    """
+    Yields a source dataset, without reading its data. Sources are datasets of
+    HDF5/NWB files (dataset_path is required) or .npy files.
+    """
+    if path.lower().endswith('.npy'):
+        yield np.load(path, mmap_mode='r')
+    else:
+        with h5py.File(path, 'r') as f:
+            yield f[dataset_path]
+
+
+def read_sample(data, chunks, n_chunks=sample_chunks, max_bytes=sample_max_bytes):
+    """
+    Returns the first n_chunks chunks along each axis of a dataset as a numpy array,
+    a slab with the geometry of the chunks. Its duration is shortened to max_bytes,
+    keeping at least one chunk.
+    """
+    shape = [int(min(n, n_chunks * c)) for n, c in zip(data.shape, chunks)]
+    row_bytes = max(int(np.prod(shape[1:], dtype=np.int64)) * data.dtype.itemsize, 1)
+    shape[0] = max(min(shape[0], max_bytes // row_bytes), min(shape[0], chunks[0]), 1)
+    return np.array(data[tuple(slice(0, n) for n in shape)])
+
+
+def candidate_chunks(shape, itemsize):
+    """
+    Returns candidate chunk shapes for a (time, ...) dataset: chunks spanning all
+    channels (time-major), chunks spanning a long time window of few channels
+    (channel-major), and square-ish chunks in between, at each target size.
+    Chunks never exceed shape, the shape of the whole dataset.
+    """
+    shape = tuple(shape)
+    other = shape[1:]
+    n_other = int(np.prod(other, dtype=np.int64)) if other else 1
+    candidates = []
+    for target in chunk_target_sizes:
+        n_items = max(target // itemsize, 1)
+        # All channels (or whole frames), as many time points as fit
+        rows = int(min(shape[0], max(n_items // n_other, 1)))
+        candidates.append((rows,) + other)
+        if len(shape) == 2 and shape[1] > 1:
+            # Few channels, long time window
+            n_ch = int(min(shape[1], 4))
+            candidates.append((int(min(shape[0], max(n_items // n_ch, 1))), n_ch))
+            # Balanced
+            n_ch = int(min(shape[1], max(int(np.sqrt(n_items / 64)), 1)))
+            candidates.append((int(min(shape[0], max(n_items // n_ch, 1))), n_ch))
+        elif len(shape) == 3:
+            # Spatial tiles over a long time window
+            side_x = int(min(shape[1], 32))
+            side_y = int(min(shape[2], 32))
+            candidates.append((int(min(shape[0], max(n_items // (side_x * side_y), 1))), side_x, side_y))
+    # Unique, in order
+    return list(dict.fromkeys(candidates))
+
+
+def _time_major_read(f, name, window, n_reads=8):
+    """Returns the read time (s/MB) of time windows of window rows."""
+    dset = f[name]
+    window = int(min(max(window, 1), dset.shape[0]))
+    starts = np.linspace(0, dset.shape[0] - window, n_reads).astype(int)
+    nbytes = 0
+    t0 = time.perf_counter()
+    for start in starts:
+        nbytes += dset[start:start + window].nbytes
+    return (time.perf_counter() - t0) / (nbytes / 1024 ** 2)
+
+
+def _channel_major_read(f, name, window, n_reads=4):
+    """Returns the read time (s/MB) of the whole duration of single channels."""
+    dset = f[name]
+    if dset.ndim == 1:
+        return _time_major_read(f, name, window, n_reads)
+    channels = np.linspace(0, dset.shape[1] - 1, n_reads).astype(int)
+    nbytes = 0
+    t0 = time.perf_counter()
+    for ch in channels:
+        nbytes += dset[:, ch].nbytes
+    return (time.perf_counter() - t0) / (nbytes / 1024 ** 2)
+
+
+def benchmark(sample, chunks, compression, compression_opts, shuffle, tmp_dir, window=None):
+    """
+    Writes sample with the given settings to a temporary file, and times reads and write.
+    window is the number of rows of time-major reads, by default time_window_bytes of the sample rows.
+    """
+    if window is None:
+        window = time_window_bytes // max(sample[:1].nbytes, 1)
+    fname = os.path.join(tmp_dir, 'bench.h5')
+    nbytes = sample.nbytes
+    t0 = time.perf_counter()
+    with h5py.File(fname, 'w') as f:
+        f.create_dataset('data', data=sample, chunks=chunks, compression=compression,
+                         compression_opts=compression_opts, shuffle=shuffle)
+    write_time = time.perf_counter() - t0
+    stored = os.path.getsize(fname)
+    # New handle with chunk cache disabled for each pattern
+    with h5py.File(fname, 'r', rdcc_nbytes=0) as f:
+        time_read = _time_major_read(f, 'data', window)
+    with h5py.File(fname, 'r', rdcc_nbytes=0) as f:
+        channel_read = _channel_major_read(f, 'data', window)
+    os.remove(fname)
+    return {
+        'chunks': list(chunks),
+        'sample': list(sample.shape),
+        'compression': compression,
+        'compression_opts': compression_opts,
+        'shuffle': shuffle,
+        'write_MBps': nbytes / 1024 ** 2 / write_time if write_time else None,
+        'ratio': nbytes / stored if stored else None,
+        'stored': stored / nbytes,
+        'write_time': write_time / (nbytes / 1024 ** 2),
+        'time_major_read': time_read,
+        'channel_major_read': channel_read,
+    }
+
+
+def run_benchmarks(data, chunk_shapes=None, codec_list=None, progress=None, cancelled=None):
+    """
+    Benchmarks all combinations of chunk shapes and codecs on a dataset (h5py dataset or
+    numpy array), each chunk shape on its own sample, see read_sample. Chunk shapes are by
+    default derived from the shape of the whole dataset. progress(done, total) is called
+    after each benchmark. Stops early if cancelled() is True.
+    """
+    if chunk_shapes is None:
+        chunk_shapes = candidate_chunks(data.shape, data.dtype.itemsize)
+    if codec_list is None:
+        codec_list = codecs
+    # Time-major reads span the same rows of the whole dataset whatever the sample width
+    row_bytes = max(int(np.prod(data.shape[1:], dtype=np.int64)) * data.dtype.itemsize, 1)
+    window = max(time_window_bytes // row_bytes, 1)
+    total = len(chunk_shapes) * len(codec_list)
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for chunks in chunk_shapes:
+            if cancelled is not None and cancelled():
+                break
+            sample = read_sample(data, chunks)
+            for compression, opts, shuffle in codec_list:
+                if cancelled is not None and cancelled():
+                    break
+                results.append(benchmark(sample, chunks, compression, opts, shuffle, tmp_dir, window))
+                if progress is not None:
+                    progress(len(results), total)
+    return results
+
+
+def score(results, objective='balanced'):
+    """
+    Adds a 'score' to each result (lower is better): weighted sum of time-major read,
+    channel-major read, stored size and write time (per MB), each relative to the best result.
+    Returns results sorted by score.
+    """
+    weights = objectives[objective]
+    keys = ['time_major_read', 'channel_major_read', 'stored', 'write_time']
+    best = {k: min(r[k] for r in results) or 1e-12 for k in keys}
+    for r in results:
+        r['score'] = sum(w * r[k] / best[k] for w, k in zip(weights, keys)) / sum(weights)
+    return sorted(results, key=lambda r: r['score'])
+
+
+def to_storage_options(result):
+    """Returns the H5DataIO keyword arguments of a benchmark result."""
+    options = {'chunks': list(result['chunks'])}
+    if result['compression'] is not None:
+        options['compression'] = result['compression']
+        if result['compression_opts'] is not None:
+            options['compression_opts'] = result['compression_opts']
+    if result['shuffle']:
+        options['shuffle'] = True
+    return options
@@ -0,0 +1,215 @@
+"""
+Columnar table of metadata, such as electrodes
+
+Each column is a numpy array: float columns as float64 (missing values are
+NaN) and text columns as object arrays of str. Edits are vectorized per
+column: fill-down copies a value over a range of rows and column expressions
+(e.g. 'x * 2 + 10', 'row % 32', "location + '_L'") are evaluated over whole
+columns. Only arithmetic on columns, numbers, strings and 'row' (the row
+number) is allowed in expressions. Templates embed expressions in text, in
+braces (e.g. 'shank{row + 1}'), and give one text per row.
+
+In the metafile the table is stored as columns, {name: list of values},
+instead of one dictionary per row.
+"""
+import ast
+import re
+import csv
+import numpy as np
+
+
+# Columns of the electrodes table: name and kind ('float' or 'str')
+electrodes_columns = [('x', 'float'), ('y', 'float'), ('z', 'float'), ('imp', 'float'),
+                      ('location', 'str'), ('filtering', 'str'), ('group', 'str')]
+
+_binary_operators = {
+    ast.Add: np.add,
+    ast.Sub: np.subtract,
+    ast.Mult: np.multiply,
+    ast.Div: np.true_divide,
+    ast.FloorDiv: np.floor_divide,
+    ast.Mod: np.mod,
+    ast.Pow: np.power,
+}
+_unary_operators = {
+    ast.USub: np.negative,
+    ast.UAdd: np.positive,
+}
+
+
+def _empty(kind, n_rows):
+    if kind == 'float':
+        return np.full(n_rows, np.nan)
+    return np.full(n_rows, '', dtype=object)
+
+
+def _as_column(values, kind):
+    """Returns values as a column array of kind. Empty strings are missing float values."""
+    if kind == 'float':
+        values = ['nan' if v is None or v == '' else v for v in values]
+        return np.array(values, dtype=float)
+    return np.array(['' if v is None else str(v) for v in values], dtype=object)
+
+
+def _infer_kind(values):
+    """Returns 'float' if all non empty values are numbers, 'str' otherwise."""
+    try:
+        _as_column(values, 'float')
+        return 'float'
+    except (TypeError, ValueError):
+        return 'str'
+
+
+class ColumnarTable:
+    def __init__(self, columns=electrodes_columns, n_rows=0):
+        """Table with columns given as a list of (name, kind), kind is 'float' or 'str'."""
+        self.names = [name for name, kind in columns]
+        self.kinds = dict(columns)
+        self.columns = {name: _empty(kind, n_rows) for name, kind in columns}
+
+    @property
+    def n_rows(self):
+        return len(self.columns[self.names[0]]) if self.names else 0
+
+    def set_columns(self, data):
+        """
+        Replaces the table with {name: list of values}. Columns of the table missing
+        from data are left empty, extra columns of data are added after them.
+        """
+        n_rows = max([len(v) for v in data.values()] + [0])
+        for name, values in data.items():
+            if len(values) != n_rows:
+                raise ValueError('column ' + name + ' has ' + str(len(values)) + ' values, expected ' + str(n_rows))
+        names = self.names + [name for name in data if name not in self.kinds]
+        kinds = dict(self.kinds)
+        columns = {}
+        for name in names:
+            if name not in kinds:
+                kinds[name] = _infer_kind(data[name])
+            if name in data:
+                columns[name] = _as_column(data[name], kinds[name])
+            else:
+                columns[name] = _empty(kinds[name], n_rows)
+        self.names, self.kinds, self.columns = names, kinds, columns
+
+    def to_columns(self):
+        """Returns the table as {name: list of values}, missing float values as None."""
+        data = {}
+        for name in self.names:
+            column = self.columns[name]
+            if self.kinds[name] == 'float':
+                data[name] = [None if np.isnan(v) else v for v in column.tolist()]
+            else:
+                data[name] = column.tolist()
+        return data
+
+    def resize(self, n_rows):
+        """Removes rows at the end, or adds empty rows."""
+        for name in self.names:
+            column = self.columns[name]
+            if n_rows <= len(column):
+                self.columns[name] = column[:n_rows].copy()
+            else:
+                self.columns[name] = np.concatenate([column, _empty(self.kinds[name], n_rows - len(column))])
+
+    def text(self, row, col):
+        """Returns the text of a cell, empty for missing float values."""
+        value = self.columns[self.names[col]][row]
+        if self.kinds[self.names[col]] == 'float':
+            return '' if np.isnan(value) else repr(float(value))
+        return value
+
+    def set_text(self, row, col, text):
+        """Sets a cell from its text. Raises ValueError for invalid float values."""
+        name = self.names[col]
+        self.columns[name][row] = _as_column([text.strip()], self.kinds[name])[0]
+
+    def fill_down(self, col, rows):
+        """Copies the value of the first of rows to all the other rows of a column."""
+        rows = np.sort(np.asarray(rows, dtype=int))
+        if len(rows):
+            column = self.columns[self.names[col]]
+            column[rows] = column[rows[0]]
+
+    def evaluate(self, expression):
+        """Returns the value of an arithmetic expression over columns, an array or a scalar."""
+        try:
+            tree = ast.parse(expression.strip(), mode='eval')
+        except SyntaxError as error:
+            raise ValueError('invalid expression: ' + str(error))
+        return self._evaluate(tree.body)
+
+    def _evaluate(self, node):
+        if isinstance(node, ast.BinOp) and type(node.op) in _binary_operators:
+            return _binary_operators[type(node.op)](self._evaluate(node.left), self._evaluate(node.right))
+        if isinstance(node, ast.UnaryOp) and type(node.op) in _unary_operators:
+            return _unary_operators[type(node.op)](self._evaluate(node.operand))
+        if isinstance(node, ast.Constant) and isinstance(node.value, (int, float, str)) \
+                and not isinstance(node.value, bool):
+            return node.value
+        if isinstance(node, ast.Name):
+            if node.id in self.columns:
+                return self.columns[node.id]
+            if node.id == 'row':
+                return np.arange(self.n_rows)
+            raise ValueError('unknown column: ' + node.id)
+        raise ValueError('only arithmetic on columns, numbers, strings and row is allowed')
+
+    def assign(self, name, expression, rows=None):
+        """Sets a column, on all rows or on the given rows, to the value of an expression."""
+        values = np.broadcast_to(self.evaluate(expression), (self.n_rows,))
+        values = _as_column(values.tolist(), self.kinds[name]) if self.kinds[name] == 'str' \
+            else values.astype(float)
+        if rows is None:
+            self.columns[name] = values.copy()
+        else:
+            rows = np.asarray(rows, dtype=int)
+            self.columns[name][rows] = values[rows]
+
+    def read_csv(self, path):
+        """Replaces the table with the contents of a csv file with a header row."""
+        with open(path, newline='') as f:
+            reader = csv.reader(f)
+            header = next(reader, [])
+            rows = list(reader)
+        data = {name: [r[n] if n < len(r) else '' for r in rows] for n, name in enumerate(header)}
+        self.set_columns(data)
+
+    def write_csv(self, path):
+        """Writes the table to a csv file with a header row."""
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(self.names)
+            columns = [[self.text(row, col) for row in range(self.n_rows)] for col in range(len(self.names))]
+            writer.writerows(zip(*columns))
+
+
+_template_field = re.compile(r'\{([^{}]*)\}')
+
+
+def _format_value(value):
+    if isinstance(value, (float, np.floating)):
+        if np.isnan(value):
+            return ''
+        return str(int(value)) if float(value).is_integer() else repr(float(value))
+    if isinstance(value, (int, np.integer)):
+        return str(int(value))
+    return str(value)
+
+
+def evaluate_template(table, template):
+    """
+    Returns, for each row of table, the text of template with the expressions in
+    braces evaluated on that row, e.g. 'shank{row + 1}' or '{location}_L'.
+    Text without braces is the same for all rows.
+    """
+    parts = _template_field.split(template)
+    texts = [''] * table.n_rows
+    for n, part in enumerate(parts):
+        if n % 2 == 0:
+            values = [part] * table.n_rows
+        else:
+            values = np.broadcast_to(np.asarray(table.evaluate(part), dtype=object), (table.n_rows,))
+            values = [_format_value(v) for v in values]
+        texts = [t + v for t, v in zip(texts, values)]
+    return texts
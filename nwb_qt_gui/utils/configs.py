@@ -1,3 +1,67 @@
 # Configuration values to be imported whenever needed in the GUI
 
 required_asterisk_color = '#db0000'
+
+# Conversion output capture: maximum number of queued lines (extra lines are
+# dropped), GUI log refresh interval (ms) and maximum lines written per refresh
+log_queue_maxsize = 10000
+log_flush_interval = 200
+log_batch_size = 500
+# Maximum number of lines kept in the GUI log
+log_max_lines = 20000
+
+# JSONL file, created next to the output nwb file, collecting one record per conversion run
+run_log_filename = 'nwb_conversion_runs.jsonl'
+
+# NWB explorer: notebook rendered by the session Voila server and number of
+# pre-warmed kernels (with nwbwidgets, pynwb and extensions imported) kept ready
+explorer_notebook = 'nwb_explorer.ipynb'
+voila_kernel_pool_size = 2
+# Maximum time (s) waited for the Voila server to answer after launch
+voila_startup_timeout = 60
+# Whether the explorer console shares the Voila kernel (and open file) by default
+explorer_shared_kernel = False
+
+# Time series preview: maximum size (bytes) of cached min/max decimation tiles
+# per dataset and number of channels drawn at once
+preview_cache_size = 256 * 1024 ** 2
+preview_max_channels = 64
+# Time series preview: the first window shown holds at most this number of
+# values (samples times channels)
+preview_initial_values = 4 * 1024 ** 2
+
+# NWB explorer: maximum number of files kept open at once and maximum resident
+# memory (bytes) of the Voila server and kernels. Least recently viewed files
+# are closed beyond these limits and show a cached summary until reopened
+explorer_max_open_files = 4
+explorer_memory_budget = 4 * 1024 ** 3
+
+# SQLite index of NWB file summaries, keyed by path, size and modification time
+summary_index_file = '~/.nwb_qt_gui/nwb_summaries.sqlite'
+
+# NWB catalog: number of worker processes indexing files (None: number of CPUs)
+catalog_max_workers = None
+
+# Whether the explorer console kernel runs in a separate process by default,
+# so code typed on the console never blocks the GUI
+console_out_of_process = False
+
+# Metadata forms are built from the event loop in slices of at most this time
+# (ms), at least one group per slice, so the window stays responsive
+form_build_slice_ms = 15
+
+# Maximum memory (MB) of the detached group widgets kept for reuse, all GUI
+# classes together (0: no reuse)
+widget_pool_max_mb = 64
+
+# Autosave of the metadata forms: file of each running instance ({owner}: its pid
+# and start time), offered for restore on the next start once that instance is
+# gone (e.g. after a crash), and time (ms) after the last edit before saving
+autosave_file = '~/.nwb_qt_gui/autosave-{owner}.msgpack'
+autosave_delay = 2000
+
+# Maximum number of undo steps of the metadata forms
+undo_max_steps = 200
+
+# Maximum number of results of the metadata forms search
+search_max_results = 100
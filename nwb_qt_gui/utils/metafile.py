@@ -0,0 +1,255 @@
+"""
+Metafile encodings
+
+Repeated groups (e.g. lists of Device, ElectrodeGroup or ImagingPlane) are
+lists of dictionaries with the same keys. In the columnar encoding such a
+list is stored once per field instead of once per item:
+
+    ElectrodeGroup:                      ElectrodeGroup:
+    - name: shank0                         __columns__:
+      device: probe                          name: [shank0, shank1]
+    - name: shank1            <==>           device: [probe, probe]
+      device: probe
+
+Only lists of at least two dictionaries with the same keys are encoded,
+other values are kept as they are. Decoding is applied to any metafile, so
+both encodings can be loaded.
+
+Metafiles are YAML (.yml, .yaml), JSON (.json) or msgpack (.msgpack), chosen
+by extension or, for other extensions, by the first bytes of the file.
+Datetimes and dates are native YAML values; in JSON they are stored as
+{"__datetime__": isoformat} / {"__date__": isoformat} and in msgpack as
+extension types holding the isoformat, so they round-trip exactly, time
+zone included.
+
+Load and save times of the formats can be compared with:
+    python -m nwb_qt_gui.utils.metafile metafile.yml
+    python -m nwb_qt_gui.utils.metafile --synthetic 5000
+"""
+import argparse
+import datetime
+import json
+import os
+import tempfile
+import time
+import msgpack
+import yaml
+
+
+# Marker key of lists of dictionaries encoded as columns
+columns_key = '__columns__'
+
+metafile_formats = {'.yml': 'yaml', '.yaml': 'yaml', '.json': 'json', '.msgpack': 'msgpack'}
+# File dialogs filter of all metafile formats
+metafile_filter = "(*.yml *.yaml *.json *.msgpack);;(*.yml *.yaml);;(*.json);;(*.msgpack);;(*)"
+
+# msgpack extension types of datetimes and dates
+_msgpack_datetime = 1
+_msgpack_date = 2
+
+# C implementations of the YAML loader and dumper, if libyaml is available
+_yaml_loader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+_yaml_dumper = getattr(yaml, 'CSafeDumper', yaml.SafeDumper)
+
+
+def _is_homogeneous(items):
+    """Whether items is a list of at least two dictionaries with the same keys."""
+    if len(items) < 2 or not all(isinstance(item, dict) for item in items):
+        return False
+    keys = set(items[0])
+    return len(keys) > 0 and all(set(item) == keys for item in items[1:])
+
+
+def encode_columnar(value):
+    """Returns metadata with homogeneous lists of dictionaries, at any depth, encoded as columns."""
+    if isinstance(value, dict):
+        return {k: encode_columnar(v) for k, v in value.items()}
+    if isinstance(value, list):
+        items = [encode_columnar(item) for item in value]
+        if _is_homogeneous(items):
+            return {columns_key: {k: [item[k] for item in items] for k in items[0]}}
+        return items
+    return value
+
+
+def decode_columnar(value):
+    """Returns metadata with lists encoded as columns, at any depth, as lists of dictionaries."""
+    if isinstance(value, dict):
+        if len(value) == 1 and columns_key in value:
+            columns = value[columns_key]
+            lengths = {len(v) for v in columns.values()}
+            if len(lengths) > 1:
+                raise ValueError('columns of different lengths in ' + columns_key + ': ' + ', '.join(columns))
+            n_items = lengths.pop() if lengths else 0
+            return [{k: decode_columnar(v[n]) for k, v in columns.items()} for n in range(n_items)]
+        return {k: decode_columnar(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [decode_columnar(item) for item in value]
+    return value
+
+
+def _json_default(value):
+    if isinstance(value, datetime.datetime):
+        return {'__datetime__': value.isoformat()}
+    if isinstance(value, datetime.date):
+        return {'__date__': value.isoformat()}
+    raise TypeError('not JSON serializable: ' + type(value).__name__)
+
+
+def _json_object_hook(obj):
+    if len(obj) == 1:
+        if '__datetime__' in obj:
+            return datetime.datetime.fromisoformat(obj['__datetime__'])
+        if '__date__' in obj:
+            return datetime.date.fromisoformat(obj['__date__'])
+    return obj
+
+
+def _msgpack_default(value):
+    if isinstance(value, datetime.datetime):
+        return msgpack.ExtType(_msgpack_datetime, value.isoformat().encode())
+    if isinstance(value, datetime.date):
+        return msgpack.ExtType(_msgpack_date, value.isoformat().encode())
+    raise TypeError('not msgpack serializable: ' + type(value).__name__)
+
+
+def _msgpack_ext_hook(code, data):
+    if code == _msgpack_datetime:
+        return datetime.datetime.fromisoformat(data.decode())
+    if code == _msgpack_date:
+        return datetime.date.fromisoformat(data.decode())
+    return msgpack.ExtType(code, data)
+
+
+def detect_format(path, head=None):
+    """
+    Returns the format of a metafile, 'yaml', 'json' or 'msgpack', from its extension
+    or, for other extensions, from its first bytes (head, read from path if None).
+    """
+    fmt = metafile_formats.get(os.path.splitext(path)[1].lower())
+    if fmt is not None:
+        return fmt
+    if head is None:
+        with open(path, 'rb') as f:
+            head = f.read(64)
+    if not head:
+        return 'yaml'
+    # msgpack maps start with 0x80-0x8f (fixmap), 0xde (map 16) or 0xdf (map 32)
+    if 0x80 <= head[0] <= 0x8f or head[0] in (0xde, 0xdf):
+        return 'msgpack'
+    if head.lstrip()[:1] == b'{':
+        return 'json'
+    return 'yaml'
+
+
+def loads(data, fmt):
+    """Returns the metadata of the bytes of a metafile, repeated groups decoded."""
+    if fmt == 'json':
+        metadata = json.loads(data.decode('utf-8'), object_hook=_json_object_hook)
+    elif fmt == 'msgpack':
+        metadata = msgpack.unpackb(data, raw=False, strict_map_key=False, ext_hook=_msgpack_ext_hook)
+    else:
+        metadata = yaml.load(data, Loader=_yaml_loader)
+    return decode_columnar(metadata)
+
+
+def dumps(metadata, fmt, columnar=False):
+    """Returns the bytes of a metafile, repeated groups as columns if columnar."""
+    if columnar:
+        metadata = encode_columnar(metadata)
+    if fmt == 'json':
+        return json.dumps(metadata, default=_json_default, indent=1).encode('utf-8')
+    if fmt == 'msgpack':
+        return msgpack.packb(metadata, use_bin_type=True, default=_msgpack_default)
+    return yaml.dump(metadata, Dumper=_yaml_dumper, default_flow_style=False).encode('utf-8')
+
+
+def load_metafile(path):
+    """Returns the metadata of a metafile of any format."""
+    with open(path, 'rb') as f:
+        data = f.read()
+    return loads(data, detect_format(path, head=data[:64]))
+
+
+def save_metafile(path, metadata, columnar=False, fmt=None):
+    """Saves metadata to a metafile, in the format of its extension (YAML if unknown)."""
+    if fmt is None:
+        fmt = metafile_formats.get(os.path.splitext(path)[1].lower(), 'yaml')
+    data = dumps(metadata, fmt, columnar=columnar)
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+def synthetic_metadata(n_groups):
+    """Returns metadata with n_groups Devices, ElectrodeGroups and ElectricalSeries, for benchmarks."""
+    return {
+        'NWBFile': {
+            'session_description': 'synthetic metafile',
+            'identifier': 'synthetic',
+            'session_start_time': datetime.datetime(2020, 1, 1, 12, 0, 0,
+                                                    tzinfo=datetime.timezone(datetime.timedelta(hours=-5))),
+        },
+        'Ecephys': {
+            'Device': [{'name': 'Device' + str(n)} for n in range(n_groups)],
+            'ElectrodeGroup': [{'name': 'ElectrodeGroup' + str(n), 'description': 'shank ' + str(n),
+                                'location': 'CA1', 'device': 'Device' + str(n)} for n in range(n_groups)],
+            'ElectricalSeries': [{'name': 'ElectricalSeries' + str(n), 'conversion': 1.0, 'rate': 30000.0,
+                                  'starting_time': 0.0, 'comments': '', 'description': 'raw'}
+                                 for n in range(n_groups)],
+        },
+    }
+
+
+def benchmark(metadata, repeat=3):
+    """
+    Returns, for each format with and without columnar encoding, the size (bytes) and
+    the best load and save times (s) out of repeat, and whether the metadata round-trips.
+    """
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for fmt in ('yaml', 'json', 'msgpack'):
+            for columnar in (False, True):
+                path = os.path.join(tmp_dir, 'metafile.' + fmt)
+                save_times = []
+                load_times = []
+                for _ in range(repeat):
+                    t0 = time.perf_counter()
+                    save_metafile(path, metadata, columnar=columnar, fmt=fmt)
+                    save_times.append(time.perf_counter() - t0)
+                    t0 = time.perf_counter()
+                    loaded = load_metafile(path)
+                    load_times.append(time.perf_counter() - t0)
+                results.append({
+                    'format': fmt,
+                    'columnar': columnar,
+                    'size': os.path.getsize(path),
+                    'save': min(save_times),
+                    'load': min(load_times),
+                    'lossless': loaded == metadata,
+                })
+    return results
+
+
+def main(argv=None):
+    """Prints load and save times of a metafile, or of synthetic metadata, in all formats."""
+    parser = argparse.ArgumentParser(description='Load and save times of metafile formats.')
+    parser.add_argument('metafile', nargs='?', help='metafile to benchmark, of any format')
+    parser.add_argument('--synthetic', type=int, default=None,
+                        help='benchmarks synthetic metadata with this number of groups of each type')
+    parser.add_argument('--repeat', type=int, default=3, help='best of this number of runs')
+    args = parser.parse_args(argv)
+    if args.synthetic is not None:
+        metadata = synthetic_metadata(args.synthetic)
+    elif args.metafile:
+        metadata = load_metafile(args.metafile)
+    else:
+        parser.error('a metafile or --synthetic is required')
+    print('format   columnar  size (kB)  save (ms)  load (ms)  lossless')
+    for r in benchmark(metadata, repeat=args.repeat):
+        print('{:<8} {:<9} {:>9.0f} {:>10.1f} {:>10.1f}  {}'.format(
+            r['format'], 'yes' if r['columnar'] else 'no', r['size'] / 1024,
+            1000 * r['save'], 1000 * r['load'], r['lossless']))
+
+
+if __name__ == '__main__':
+    main()
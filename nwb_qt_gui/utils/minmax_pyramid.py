@@ -0,0 +1,166 @@
+"""
+Min/max decimation pyramid for time series datasets
+
+Level L of the pyramid stores, for every bin of factor**L samples, the min
+and max of each channel. Levels are computed lazily in tiles of tile_bins
+bins and kept in a bounded cache: level 1 tiles read only the raw samples
+they cover, and higher level tiles are reduced from the level below. A view
+request picks the coarsest level whose bins are not wider than a pixel, so
+its cost depends on the number of pixels and not on the window length.
+Requests can be cancelled between tiles, see Cancelled.
+"""
+from collections import OrderedDict
+import threading
+import numpy as np
+
+
+class Cancelled(Exception):
+    """Raised when a request is cancelled before it completes."""
+    pass
+
+
+def _check(cancelled):
+    if cancelled is not None and cancelled():
+        raise Cancelled()
+
+
+class MinMaxPyramid:
+    def __init__(self, data, factor=16, tile_bins=1024, cache_size=256 * 1024 ** 2):
+        """
+        Parameters
+        ----------
+        data : h5py.Dataset or array-like
+            1-D (time) or 2-D (time, channels) series.
+        factor : int
+            Number of bins of a level reduced into one bin of the next level.
+        tile_bins : int
+            Number of bins per cached tile.
+        cache_size : int
+            Maximum size in bytes of the cached tiles.
+        """
+        if len(data.shape) not in (1, 2):
+            raise ValueError('only 1-D and 2-D series can be previewed, got shape ' + str(data.shape))
+        self.data = data
+        self.n_samples = data.shape[0]
+        self.n_channels = data.shape[1] if len(data.shape) == 2 else 1
+        self.factor = factor
+        self.tile_bins = tile_bins
+        self.cache_size = cache_size
+        self.dtype = np.dtype(data.dtype)
+        self._cache = OrderedDict()
+        self._cache_bytes = 0
+        self._lock = threading.Lock()
+        # Coarsest useful level: a single tile covers the whole series
+        self.max_level = 1
+        while tile_bins * factor ** self.max_level < self.n_samples:
+            self.max_level += 1
+
+    def read_raw(self, start, stop):
+        """Reads samples [start, stop) as a 2-D (time, channels) array."""
+        values = np.asarray(self.data[start:stop])
+        return values.reshape(values.shape[0], self.n_channels)
+
+    def bin_size(self, level):
+        return self.factor ** level
+
+    def tile(self, level, index, cancelled=None):
+        """
+        Returns (mins, maxs) of a tile, shape (n_bins, n_channels), computing it if needed.
+        Raises Cancelled if cancelled() is True before a block of samples or a tile is computed.
+        """
+        key = (level, index)
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+        _check(cancelled)
+        if level == 1:
+            start = index * self.tile_bins * self.factor
+            stop = min(start + self.tile_bins * self.factor, self.n_samples)
+            raw = self.read_raw(start, stop)
+            mins, maxs = _reduce_bins(raw, raw, self.factor)
+        else:
+            parts = []
+            for sub in range(index * self.factor, (index + 1) * self.factor):
+                if sub * self.tile_bins * self.bin_size(level - 1) >= self.n_samples:
+                    break
+                parts.append(self.tile(level - 1, sub, cancelled=cancelled))
+            mins, maxs = _reduce_bins(np.concatenate([p[0] for p in parts]),
+                                      np.concatenate([p[1] for p in parts]), self.factor)
+        self._store(key, (mins, maxs))
+        return mins, maxs
+
+    def _store(self, key, value):
+        n_bytes = value[0].nbytes + value[1].nbytes
+        with self._lock:
+            if key in self._cache:
+                return
+            self._cache[key] = value
+            self._cache_bytes += n_bytes
+            while self._cache_bytes > self.cache_size and len(self._cache) > 1:
+                old_key, old = self._cache.popitem(last=False)
+                self._cache_bytes -= old[0].nbytes + old[1].nbytes
+
+    def bins(self, level, start_bin, stop_bin, cancelled=None):
+        """Returns (mins, maxs) of bins [start_bin, stop_bin) of a level."""
+        first_tile = start_bin // self.tile_bins
+        last_tile = (stop_bin - 1) // self.tile_bins
+        tiles = [self.tile(level, i, cancelled=cancelled) for i in range(first_tile, last_tile + 1)]
+        offset = start_bin - first_tile * self.tile_bins
+        n = stop_bin - start_bin
+        mins = np.concatenate([t[0] for t in tiles])[offset:offset + n]
+        maxs = np.concatenate([t[1] for t in tiles])[offset:offset + n]
+        return mins, maxs
+
+    def envelope(self, start, stop, n_pixels, cancelled=None):
+        """
+        Returns per-pixel (mins, maxs), shape (n_pixels, n_channels), for samples
+        [start, stop). Fewer columns are returned if there are fewer samples than pixels.
+        Raises Cancelled if cancelled() becomes True while tiles are computed.
+        """
+        start = max(0, int(start))
+        stop = min(self.n_samples, int(stop))
+        if stop <= start:
+            empty = np.empty((0, self.n_channels), dtype=self.dtype)
+            return empty, empty
+        samples_per_pixel = (stop - start) / n_pixels
+        level = 0
+        while level < self.max_level and self.bin_size(level + 1) <= samples_per_pixel:
+            level += 1
+        if level == 0:
+            mins = maxs = self.read_raw(start, stop)
+        else:
+            size = self.bin_size(level)
+            mins, maxs = self.bins(level, start // size, -(-stop // size), cancelled=cancelled)
+        n_columns = min(n_pixels, mins.shape[0])
+        edges = np.linspace(0, mins.shape[0], n_columns + 1).astype(int)[:-1]
+        return np.minimum.reduceat(mins, edges, axis=0), np.maximum.reduceat(maxs, edges, axis=0)
+
+
+def _reduce_bins(mins, maxs, factor):
+    """Reduces consecutive groups of factor rows to their min and max. Last group may be shorter."""
+    edges = np.arange(0, mins.shape[0], factor)
+    return np.minimum.reduceat(mins, edges, axis=0), np.maximum.reduceat(maxs, edges, axis=0)
+
+
+def render_envelope(mins, maxs, height, color=(31, 119, 180)):
+    """
+    Rasterizes per-pixel min/max envelopes, one horizontal band per channel,
+    into an RGBA image array of shape (height, n_columns, 4). Each channel is
+    scaled to its own range.
+    """
+    n_columns, n_channels = mins.shape
+    band = max(1, height // max(n_channels, 1))
+    mins = mins.astype(np.float64)
+    maxs = maxs.astype(np.float64)
+    low = np.nanmin(mins, axis=0) if n_columns else np.zeros(n_channels)
+    high = np.nanmax(maxs, axis=0) if n_columns else np.ones(n_channels)
+    span = np.where(high > low, high - low, 1.)
+    # Pixel rows inside each band, 0 at the top
+    top = np.round((1. - (maxs - low) / span) * (band - 1)).T[:, None, :]
+    bottom = np.round((1. - (mins - low) / span) * (band - 1)).T[:, None, :]
+    rows = np.arange(band)[None, :, None]
+    mask = ((rows >= top) & (rows <= bottom)).reshape(n_channels * band, n_columns)
+    image = np.full((n_channels * band, n_columns, 4), 255, dtype=np.uint8)
+    image[mask, :3] = color
+    return image
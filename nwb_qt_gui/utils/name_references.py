@@ -24,6 +24,7 @@ name_to_gui_class = {
     # Ecephys
     'ElectricalSeries': gui_modules.forms_ecephys.GroupElectricalSeries,
     'ElectrodeGroup': gui_modules.forms_ecephys.GroupElectrodeGroup,
+    'Electrodes': gui_modules.forms_ecephys.GroupElectrodes,
     'SpikeEventSeries': gui_modules.forms_ecephys.GroupSpikeEventSeries,
     'EventDetection': gui_modules.forms_ecephys.GroupEventDetection,
     'EventWaveform': gui_modules.forms_ecephys.GroupEventWaveform,
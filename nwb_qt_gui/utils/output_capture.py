@@ -0,0 +1,123 @@
+"""
+Capture of stdout, stderr and logging records produced by conversion jobs
+
+Captured lines are pushed to a bounded OutputQueue. Producers never block:
+when the queue is full, new lines are dropped and counted, so a flood of
+output cannot stall the conversion. The GUI drains the queue in batches of
+bounded size from a timer, so it cannot stall the event loop either.
+"""
+import datetime
+import logging
+import queue
+import sys
+import threading
+import io
+
+
+class OutputQueue:
+    def __init__(self, maxsize=10000):
+        """Bounded, non-blocking queue of captured output lines."""
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.dropped = 0
+        self._lock = threading.Lock()
+
+    def put(self, job_id, source, text):
+        """Stores one line with its timestamp. Drops it if the queue is full."""
+        record = (datetime.datetime.now(), job_id, source, text)
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+
+    def drain(self, max_items):
+        """Returns up to max_items records and the number of dropped lines since last drain."""
+        items = []
+        while len(items) < max_items:
+            try:
+                items.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        with self._lock:
+            dropped, self.dropped = self.dropped, 0
+        return items, dropped
+
+
+class QueueStream(io.TextIOBase):
+    def __init__(self, output_queue, job_id, source):
+        """Text stream that forwards complete lines to an OutputQueue."""
+        super().__init__()
+        self.output_queue = output_queue
+        self.job_id = job_id
+        self.source = source
+        self._buffer = ''
+        self._lock = threading.Lock()
+
+    def writable(self):
+        return True
+
+    def write(self, text):
+        with self._lock:
+            self._buffer += text
+            *lines, self._buffer = self._buffer.split('\n')
+        for line in lines:
+            line = line.rstrip('\r')
+            if line:
+                self.output_queue.put(self.job_id, self.source, line)
+        return len(text)
+
+    def flush(self):
+        with self._lock:
+            line, self._buffer = self._buffer, ''
+        if line.strip():
+            self.output_queue.put(self.job_id, self.source, line)
+
+
+class QueueLogHandler(logging.Handler):
+    def __init__(self, output_queue, job_id, level=logging.INFO):
+        """Logging handler that forwards formatted records to an OutputQueue."""
+        super().__init__(level=level)
+        self.output_queue = output_queue
+        self.job_id = job_id
+        self.setFormatter(logging.Formatter('%(name)s: %(message)s'))
+
+    def emit(self, record):
+        try:
+            self.output_queue.put(self.job_id, record.levelname, self.format(record))
+        except Exception:
+            self.handleError(record)
+
+
+class OutputCapture:
+    def __init__(self, output_queue, job_id, level=logging.INFO):
+        """
+        Context manager redirecting sys.stdout, sys.stderr and logging records
+        to an OutputQueue while a conversion job runs.
+
+        Redirection of the standard streams is process-wide, so output from any
+        thread is captured while the context is active.
+        """
+        self.output_queue = output_queue
+        self.job_id = job_id
+        self.level = level
+
+    def __enter__(self):
+        self._stdout, self._stderr = sys.stdout, sys.stderr
+        sys.stdout = QueueStream(self.output_queue, self.job_id, 'stdout')
+        sys.stderr = QueueStream(self.output_queue, self.job_id, 'stderr')
+        self.handler = QueueLogHandler(self.output_queue, self.job_id, level=self.level)
+        root_logger = logging.getLogger()
+        self._root_level = root_logger.level
+        if root_logger.getEffectiveLevel() > self.level:
+            root_logger.setLevel(self.level)
+        root_logger.addHandler(self.handler)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        sys.stdout.flush()
+        sys.stderr.flush()
+        sys.stdout, sys.stderr = self._stdout, self._stderr
+        root_logger = logging.getLogger()
+        root_logger.removeHandler(self.handler)
+        root_logger.setLevel(self._root_level)
+        return False
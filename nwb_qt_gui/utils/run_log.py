@@ -0,0 +1,122 @@
+"""
+Structured conversion run records
+
+Each conversion run produces one JSON record, appended as a line to a JSONL
+file stored next to the output NWB file, so runs can be aggregated later.
+Stage events are also emitted on the 'nwb_qt_gui.conversion' logger.
+"""
+from nwb_qt_gui.utils.configs import run_log_filename
+
+import contextlib
+import datetime
+import logging
+import json
+import time
+import sys
+import os
+import psutil
+
+
+logger = logging.getLogger('nwb_qt_gui.conversion')
+
+
+def path_size(path):
+    """Returns the size in bytes of a file or of all files in a directory tree."""
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    if os.path.isdir(path):
+        total = 0
+        for root, dirs, files in os.walk(path):
+            for fname in files:
+                try:
+                    total += os.path.getsize(os.path.join(root, fname))
+                except OSError:
+                    pass
+        return total
+    return None
+
+
+def source_sizes(source_paths):
+    """Returns the size in bytes of each entry of a source_paths dictionary."""
+    sizes = {}
+    if not source_paths:
+        return sizes
+    for k, v in source_paths.items():
+        # Multiple files are stored as a comma-separated string
+        paths = [p.strip() for p in str(v['path']).split(',') if p.strip()]
+        entry_sizes = [path_size(p) for p in paths]
+        if len(entry_sizes) and None not in entry_sizes:
+            sizes[k] = sum(entry_sizes)
+        else:
+            sizes[k] = None
+    return sizes
+
+
+def peak_memory():
+    """Returns the peak resident memory of this process in bytes."""
+    try:
+        import resource
+    except ImportError:
+        mem = psutil.Process().memory_info()
+        return getattr(mem, 'peak_wset', mem.rss)
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is given in bytes on macOS and in kilobytes on Linux
+    if sys.platform == 'darwin':
+        return maxrss
+    return maxrss * 1024
+
+
+class RunRecord:
+    def __init__(self, job_id, metafile, output, source_paths):
+        """Collects timings and results of one conversion run."""
+        self.output = output
+        self.record = {
+            'job_id': job_id,
+            'start_time': None,
+            'end_time': None,
+            'metafile': str(metafile) if metafile else None,
+            'output': output,
+            'source_sizes': source_sizes(source_paths),
+            'stages': {},
+            'duration': None,
+            'peak_memory': None,
+            'output_size': None,
+            'error': None,
+        }
+        self._t0 = None
+
+    def start(self):
+        self.record['start_time'] = datetime.datetime.now().isoformat()
+        self._t0 = time.perf_counter()
+        logger.info('run %s started', self.record['job_id'])
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        """Times the enclosed block and stores its duration (in seconds) as a stage."""
+        logger.info('%s started', name)
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - t0
+            self.record['stages'][name] = round(duration, 6)
+            logger.info('%s finished in %.3f s', name, duration)
+
+    def finish(self, error=None):
+        self.record['end_time'] = datetime.datetime.now().isoformat()
+        if self._t0 is not None:
+            self.record['duration'] = round(time.perf_counter() - self._t0, 6)
+        self.record['peak_memory'] = peak_memory()
+        if self.output and os.path.isfile(self.output):
+            self.record['output_size'] = os.path.getsize(self.output)
+        self.record['error'] = error
+        logger.info('run %s finished in %.3f s', self.record['job_id'], self.record['duration'] or 0.)
+
+    def write(self):
+        """Appends the record to the runs log next to the output file. Returns the log path."""
+        if not self.output:
+            return None
+        log_path = os.path.join(os.path.dirname(os.path.abspath(self.output)), run_log_filename)
+        with open(log_path, 'a') as f:
+            f.write(json.dumps(self.record) + '\n')
+        return log_path
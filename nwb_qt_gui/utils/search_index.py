@@ -0,0 +1,155 @@
+"""
+Search index of the metadata forms groups
+
+Each group is indexed by its name, type and fields values, split in lower
+case words (tokens). The index maps each token to the groups holding it
+(inverted index) and keeps the tokens sorted, so groups with words starting
+with a query word are found by binary search. A query of several words
+matches groups holding all of them.
+
+Groups are updated one at a time, removing their previous tokens, so edits
+cost the size of the group edited, not of the index.
+"""
+import bisect
+import re
+
+
+_word = re.compile(r'\w+')
+
+
+def tokenize(text):
+    """Returns the set of lower case words of text."""
+    return set(_word.findall(str(text).lower()))
+
+
+def flatten_fields(data, field=''):
+    """Returns [(field, text)] of the values of nested dictionaries and lists, repeated values once."""
+    fields = []
+    seen = set()
+
+    def visit(value, field):
+        if isinstance(value, dict):
+            for k, v in value.items():
+                visit(v, field + '.' + str(k) if field else str(k))
+        elif isinstance(value, (list, tuple)):
+            for v in value:
+                visit(v, field)
+        elif value is not None and value != '':
+            text = str(value)
+            if (field, text) not in seen:
+                seen.add((field, text))
+                fields.append((field, text))
+
+    visit(data, field)
+    return fields
+
+
+def _matches(text_tokens, words):
+    """True if each word starts a token of text."""
+    return all(any(t.startswith(word) for t in text_tokens) for word in words)
+
+
+class SearchIndex:
+    def __init__(self):
+        """Inverted index of groups by the words of their name, type and fields."""
+        # Groups by token, and tokens sorted for prefix search
+        self.postings = {}
+        self.tokens = []
+        # Name, type, [(field, text)] and tokens by group
+        self.entries = {}
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def __len__(self):
+        return len(self.entries)
+
+    def keys(self):
+        return list(self.entries)
+
+    def update(self, key, name, group_type, fields):
+        """Indexes a group, replacing its previous entry."""
+        self.remove(key)
+        name_tokens = tokenize(name)
+        type_tokens = tokenize(group_type)
+        tokens = name_tokens | type_tokens
+        for field, text in fields:
+            tokens |= tokenize(text)
+        self.entries[key] = {'name': str(name), 'group_type': group_type, 'fields': fields, 'tokens': tokens,
+                             'name_tokens': name_tokens, 'type_tokens': type_tokens}
+        for token in tokens:
+            keys = self.postings.get(token)
+            if keys is None:
+                self.postings[token] = keys = set()
+                bisect.insort(self.tokens, token)
+            keys.add(key)
+
+    def remove(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return
+        for token in entry['tokens']:
+            keys = self.postings[token]
+            keys.discard(key)
+            if not keys:
+                del self.postings[token]
+                del self.tokens[bisect.bisect_left(self.tokens, token)]
+
+    def clear(self):
+        self.postings = {}
+        self.tokens = []
+        self.entries = {}
+
+    def prefix_keys(self, prefix):
+        """Returns the groups holding a word starting with prefix."""
+        keys = set()
+        i = bisect.bisect_left(self.tokens, prefix)
+        while i < len(self.tokens) and self.tokens[i].startswith(prefix):
+            keys |= self.postings[self.tokens[i]]
+            i += 1
+        return keys
+
+    def _ranked(self, words):
+        """Returns [(rank, name, key)] of the groups matching all words, sorted by rank and name."""
+        keys = None
+        for word in words:
+            keys = self.prefix_keys(word) if keys is None else keys & self.prefix_keys(word)
+            if not keys:
+                return []
+        if keys is None:
+            return []
+        # Ranked on name and type for all groups, first field matching only for those returned
+        ranked = []
+        for key in keys:
+            entry = self.entries[key]
+            if _matches(entry['name_tokens'], words):
+                rank = 0
+            elif _matches(entry['type_tokens'], words):
+                rank = 1
+            else:
+                rank = 2
+            ranked.append((rank, entry['name'], key))
+        ranked.sort(key=lambda r: r[:2])
+        return ranked
+
+    def matching_keys(self, query):
+        """Returns all groups matching all words of query, in the order of search, without limit."""
+        return [key for rank, name, key in self._ranked(tokenize(query))]
+
+    def search(self, query, limit=100):
+        """
+        Returns up to limit (key, field, text) of the groups matching all words of
+        query, matches on name first, then on type, then on fields. field and text
+        are those of the first field matching, empty for matches on name or type.
+        """
+        words = sorted(tokenize(query), key=len, reverse=True)
+        if not words:
+            return []
+        results = []
+        for rank, name, key in self._ranked(words)[:limit]:
+            field, text = '', ''
+            if rank == 2:
+                field, text = next(((f, t) for f, t in self.entries[key]['fields']
+                                    if _matches(tokenize(t), words)), ('', ''))
+            results.append((key, field, text))
+        return results
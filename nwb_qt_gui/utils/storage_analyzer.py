@@ -0,0 +1,158 @@
+"""
+Storage layout analyzer for HDF5/NWB files
+
+For every dataset, reports logical versus stored bytes, compression ratio,
+chunk shape, number of allocated chunks and filters, plus totals per group.
+Only metadata is queried (storage size, chunk index and filter pipeline of
+the dataset creation property list), no data is read, so the cost does not
+depend on the size of the datasets.
+
+Usage from the command line:
+    nwbstorage file.nwb [--groups] [--sort stored] [--csv out.csv]
+"""
+import argparse
+import csv
+import sys
+import h5py
+import numpy as np
+
+
+dataset_columns = ['path', 'shape', 'dtype', 'logical', 'stored', 'ratio', 'chunks',
+                   'n_chunks', 'max_chunks', 'filters']
+group_columns = ['group', 'n_datasets', 'logical', 'stored', 'ratio']
+
+_filter_names = {
+    h5py.h5z.FILTER_DEFLATE: 'gzip',
+    h5py.h5z.FILTER_SHUFFLE: 'shuffle',
+    h5py.h5z.FILTER_FLETCHER32: 'fletcher32',
+    h5py.h5z.FILTER_SZIP: 'szip',
+    h5py.h5z.FILTER_NBIT: 'nbit',
+    h5py.h5z.FILTER_SCALEOFFSET: 'scaleoffset',
+    32001: 'blosc',
+    32004: 'lz4',
+    32008: 'bitshuffle',
+    32015: 'zstd',
+}
+
+
+def dataset_filters(dsid):
+    """Returns the filter pipeline of a dataset as strings like 'gzip(4)'."""
+    dcpl = dsid.get_create_plist()
+    filters = []
+    for n in range(dcpl.get_nfilters()):
+        code, flags, values, name = dcpl.get_filter(n)
+        label = _filter_names.get(code) or (name.decode(errors='replace') if name else str(code))
+        if code == h5py.h5z.FILTER_DEFLATE and values:
+            label += '(' + str(values[0]) + ')'
+        filters.append(label)
+    return filters
+
+
+def analyze_dataset(name, dset):
+    """Returns the storage row of one dataset, see dataset_columns."""
+    dsid = dset.id
+    itemsize = dset.dtype.itemsize
+    # Variable length data is stored on the heap, the logical size counts the references only
+    logical = int(np.prod(dset.shape, dtype=np.int64)) * itemsize if dset.shape is not None else 0
+    stored = dsid.get_storage_size()
+    chunks = dset.chunks
+    if chunks is not None:
+        n_chunks = dsid.get_num_chunks()
+        max_chunks = int(np.prod([-(-s // c) for s, c in zip(dset.shape, chunks)], dtype=np.int64))
+    else:
+        n_chunks = None
+        max_chunks = None
+    return {
+        'path': '/' + name,
+        'shape': dset.shape,
+        'dtype': str(dset.dtype),
+        'logical': logical,
+        'stored': stored,
+        'ratio': logical / stored if stored else None,
+        'chunks': chunks,
+        'n_chunks': n_chunks,
+        'max_chunks': max_chunks,
+        'filters': dataset_filters(dsid),
+    }
+
+
+def analyze_storage(path):
+    """Returns the storage rows of all datasets of a file."""
+    rows = []
+    with h5py.File(path, 'r') as f:
+        def visit(name, obj):
+            if isinstance(obj, h5py.Dataset):
+                rows.append(analyze_dataset(name, obj))
+        f.visititems(visit)
+    return rows
+
+
+def rollup(rows):
+    """Returns totals per group, each group including all its descendants, see group_columns."""
+    totals = {}
+    for row in rows:
+        parts = row['path'].strip('/').split('/')[:-1]
+        for n in range(len(parts) + 1):
+            group = '/' + '/'.join(parts[:n])
+            total = totals.setdefault(group, {'group': group, 'n_datasets': 0, 'logical': 0, 'stored': 0})
+            total['n_datasets'] += 1
+            total['logical'] += row['logical']
+            total['stored'] += row['stored']
+    for total in totals.values():
+        total['ratio'] = total['logical'] / total['stored'] if total['stored'] else None
+    return sorted(totals.values(), key=lambda t: t['group'])
+
+
+def format_value(column, value):
+    """Returns the text shown for a value of a storage table."""
+    if value is None:
+        return ''
+    if column == 'ratio':
+        return '{:.2f}'.format(value)
+    if column == 'filters':
+        return ', '.join(value)
+    if column in ('shape', 'chunks'):
+        return 'x'.join(str(v) for v in value) if len(value) else 'scalar'
+    return str(value)
+
+
+def main(argv=None):
+    """Prints the storage table of a file, or writes it as csv."""
+    parser = argparse.ArgumentParser(description='Storage layout of the datasets of an HDF5/NWB file.')
+    parser.add_argument('path', help='HDF5/NWB file')
+    parser.add_argument('--groups', action='store_true', help='totals per group instead of datasets')
+    parser.add_argument('--sort', default='stored', help='column to sort by, numeric columns largest first')
+    parser.add_argument('--csv', default=None, help='writes the table to this csv file')
+    args = parser.parse_args(argv)
+
+    rows = analyze_storage(args.path)
+    columns = dataset_columns
+    if args.groups:
+        rows = rollup(rows)
+        columns = group_columns
+    if args.sort not in columns:
+        parser.error('--sort must be one of ' + ', '.join(columns))
+    # Numeric columns largest first, missing values last
+    present = [r for r in rows if r[args.sort] is not None]
+    if args.sort in ('path', 'group', 'dtype', 'filters', 'shape', 'chunks'):
+        present.sort(key=lambda r: str(r[args.sort]))
+    else:
+        present.sort(key=lambda r: r[args.sort], reverse=True)
+    rows = present + [r for r in rows if r[args.sort] is None]
+
+    table = [[format_value(c, r[c]) for c in columns] for r in rows]
+    if args.csv:
+        with open(args.csv, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(columns)
+            writer.writerows(table)
+        return
+    widths = [max([len(c)] + [len(r[n]) for r in table]) for n, c in enumerate(columns)]
+    out = sys.stdout
+    out.write('  '.join(c.ljust(w) for c, w in zip(columns, widths)) + '\n')
+    for r in table:
+        out.write('  '.join(v.ljust(w) for v, w in zip(r, widths)) + '\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,217 @@
+"""
+Persistent index of NWB file summaries
+
+A summary (object tree, neurodata types, dataset shapes, dtypes and storage
+sizes, session metadata) is computed from the file metadata with h5py, no
+dataset values other than small session fields are read. Summaries are
+stored in a SQLite database keyed by path, and are valid as long as the file
+size and modification time are unchanged. Summaries without the object
+tree are also stored separately, so listing many files stays cheap.
+"""
+from PySide2 import QtCore
+
+import contextlib
+import sqlite3
+import datetime
+import json
+import os
+import h5py
+import numpy as np
+
+
+session_fields = ['identifier', 'session_description', 'session_start_time', 'timestamps_reference_time',
+                  'general/lab', 'general/institution', 'general/experimenter',
+                  'general/experiment_description', 'general/session_id',
+                  'general/subject/subject_id', 'general/subject/species', 'general/subject/sex',
+                  'general/subject/age', 'general/subject/genotype']
+top_groups = ['acquisition', 'processing', 'analysis', 'stimulus/presentation',
+              'stimulus/templates', 'intervals', 'units', 'general/devices']
+
+
+def _value(value):
+    """Converts a small dataset value to a JSON serializable value."""
+    if isinstance(value, bytes):
+        return value.decode(errors='replace')
+    if isinstance(value, np.ndarray):
+        return [_value(v) for v in value.tolist()]
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def compute_summary(path):
+    """Returns the summary of an NWB file, as a JSON serializable dictionary."""
+    objects = []
+    storage = 0
+    with h5py.File(path, 'r') as f:
+        def visit(name, obj):
+            nonlocal storage
+            neurodata_type = _value(obj.attrs.get('neurodata_type', ''))
+            if isinstance(obj, h5py.Dataset):
+                size = obj.id.get_storage_size()
+                storage += size
+                objects.append([name, 'dataset', neurodata_type, list(obj.shape), str(obj.dtype), size])
+            else:
+                objects.append([name, 'group', neurodata_type, None, None, None])
+        f.visititems(visit)
+        session = {}
+        for name in session_fields:
+            obj = f.get(name)
+            if isinstance(obj, h5py.Dataset) and obj.size <= 100:
+                session[name.split('/')[-1]] = _value(obj[()])
+        groups = {}
+        for group_name in top_groups:
+            group = f.get(group_name)
+            if isinstance(group, h5py.Group):
+                groups[group_name] = {}
+                for name in group:
+                    try:
+                        groups[group_name][name] = _value(group[name].attrs.get('neurodata_type', ''))
+                    except KeyError:
+                        # Broken soft or external link
+                        groups[group_name][name] = ''
+            elif isinstance(group, h5py.Dataset):
+                groups[group_name] = {}
+    return {
+        'size': os.path.getsize(path),
+        'storage_size': storage,
+        'n_objects': len(objects),
+        'session': session,
+        'groups': groups,
+        'objects': objects,
+    }
+
+
+class SummaryIndex:
+    def __init__(self, db_path):
+        """SQLite index of NWB file summaries. Connections are opened per call, so it can be used from any thread."""
+        self.db_path = os.path.expanduser(db_path)
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('CREATE TABLE IF NOT EXISTS summaries ('
+                         'path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, '
+                         'indexed_at TEXT, summary TEXT, metadata TEXT)')
+            columns = [row[1] for row in conn.execute('PRAGMA table_info(summaries)').fetchall()]
+            if 'metadata' not in columns:
+                conn.execute('ALTER TABLE summaries ADD COLUMN metadata TEXT')
+
+    @contextlib.contextmanager
+    def _connect(self):
+        """Yields a connection, committed and closed on exit."""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _stat(path):
+        st = os.stat(path)
+        return st.st_size, st.st_mtime_ns
+
+    def get(self, path):
+        """Returns the stored summary of a file, or None if missing or stale."""
+        path = os.path.abspath(path)
+        try:
+            size, mtime_ns = self._stat(path)
+        except OSError:
+            return None
+        with self._connect() as conn:
+            row = conn.execute('SELECT size, mtime_ns, summary FROM summaries WHERE path = ?',
+                               (path,)).fetchone()
+        if row is None or row[0] != size or row[1] != mtime_ns:
+            return None
+        return json.loads(row[2])
+
+    def put(self, path, summary, size, mtime_ns):
+        metadata = {k: v for k, v in summary.items() if k != 'objects'}
+        with self._connect() as conn:
+            conn.execute('INSERT OR REPLACE INTO summaries '
+                         '(path, size, mtime_ns, indexed_at, summary, metadata) VALUES (?, ?, ?, ?, ?, ?)',
+                         (os.path.abspath(path), size, mtime_ns, datetime.datetime.now().isoformat(),
+                          json.dumps(summary), json.dumps(metadata)))
+
+    def refresh(self, path):
+        """Computes and stores the summary of a file. Returns it."""
+        path = os.path.abspath(path)
+        size, mtime_ns = self._stat(path)
+        summary = compute_summary(path)
+        self.put(path, summary, size, mtime_ns)
+        return summary
+
+    def get_or_compute(self, path):
+        summary = self.get(path)
+        if summary is None:
+            summary = self.refresh(path)
+        return summary
+
+    def remove(self, path):
+        with self._connect() as conn:
+            conn.execute('DELETE FROM summaries WHERE path = ?', (os.path.abspath(path),))
+
+    def get_metadata(self, path):
+        """Returns the stored summary of a file without object tree, even if stale, or None."""
+        with self._connect() as conn:
+            row = conn.execute('SELECT metadata FROM summaries WHERE path = ?',
+                               (os.path.abspath(path),)).fetchone()
+        if row is None or row[0] is None:
+            return None
+        return json.loads(row[0])
+
+    def metadata_under(self, root):
+        """Returns {path: summary without object tree} of all indexed files under a directory."""
+        root = os.path.join(os.path.abspath(root), '')
+        with self._connect() as conn:
+            rows = conn.execute('SELECT path, metadata FROM summaries WHERE substr(path, 1, ?) = ? '
+                                'AND metadata IS NOT NULL', (len(root), root)).fetchall()
+        return {path: json.loads(metadata) for path, metadata in rows}
+
+    def paths(self):
+        with self._connect() as conn:
+            return [row[0] for row in conn.execute('SELECT path FROM summaries').fetchall()]
+
+    def stale_paths(self, paths=None):
+        """Returns the paths, by default all indexed paths, whose summary is missing or outdated."""
+        if paths is None:
+            paths = self.paths()
+        paths = [os.path.abspath(p) for p in paths]
+        with self._connect() as conn:
+            stored = {row[0]: (row[1], row[2]) for row in
+                      conn.execute('SELECT path, size, mtime_ns FROM summaries')}
+        stale = []
+        for path in paths:
+            try:
+                stat = self._stat(path)
+            except OSError:
+                # Deleted files are dropped from the index
+                if path in stored:
+                    self.remove(path)
+                continue
+            if stored.get(path) != stat:
+                stale.append(path)
+        return stale
+
+
+class SummaryRefreshThread(QtCore.QThread):
+    refreshed = QtCore.Signal(str)
+    failed = QtCore.Signal(str, str)
+
+    def __init__(self, index, paths=None):
+        """Refreshes stale summaries of paths (by default, of all indexed files) in background."""
+        super().__init__()
+        self.index = index
+        self.paths = paths
+
+    def run(self):
+        for path in self.index.stale_paths(self.paths):
+            if self.isInterruptionRequested():
+                return
+            try:
+                self.index.refresh(path)
+            except Exception as error:
+                # A file failing to be read (h5py may raise anything) must not stop the others
+                self.failed.emit(path, str(error))
+            else:
+                self.refreshed.emit(path)
@@ -0,0 +1,192 @@
+"""
+Undo history of the metadata forms
+
+Each step is a snapshot of the metadata tree read from the forms. Subtrees
+unchanged from the previous snapshot are the same objects, not copies, so
+memory grows with the edits rather than with the number of groups. Snapshots
+are never modified once stored. Subtrees that are the same objects are not
+compared, so adding a step read mostly from cached groups costs the groups
+read again, not the whole tree.
+
+Moving between steps applies the difference of the two snapshots, a list of
+patches (op, path, value) with op 'add', 'remove' or 'modify'. Lists of
+dictionaries with unique names (e.g. the ElectrodeGroups of Ecephys) are
+compared by name, so the path of a group is (module, group type, name).
+"""
+from nwb_qt_gui.utils.configs import undo_max_steps
+
+
+_missing = object()
+
+
+def _named(items):
+    """Returns {name: item} if items is a list of dictionaries with unique names, None otherwise."""
+    if not isinstance(items, list) or not all(isinstance(item, dict) and 'name' in item for item in items):
+        return None
+    by_name = {item['name']: item for item in items}
+    return by_name if len(by_name) == len(items) else None
+
+
+def _same_name(a, b):
+    return isinstance(a, dict) and isinstance(b, dict) and 'name' in a and 'name' in b and a['name'] == b['name']
+
+
+def share(old, new):
+    """
+    Returns new with the subtrees equal to those of old replaced by them: old if
+    they are equal, new itself if none of its subtrees was replaced.
+    """
+    if old is new:
+        return old
+    if isinstance(old, dict) and isinstance(new, dict):
+        shared = {k: share(old.get(k, _missing), v) for k, v in new.items()}
+        if len(shared) == len(old) and all(k in old and v is old[k] for k, v in shared.items()):
+            return old
+        if all(v is new[k] for k, v in shared.items()):
+            return new
+        return shared
+    if isinstance(old, list) and isinstance(new, list):
+        if len(old) == len(new) and all(a is b or _same_name(a, b) for a, b in zip(old, new)):
+            # Same items in the same order, the usual case, matched without indexing names
+            shared = [share(a, b) for a, b in zip(old, new)]
+            if all(a is b for a, b in zip(shared, old)):
+                return old
+            return new if all(a is b for a, b in zip(shared, new)) else shared
+        old_by_name = _named(old)
+        if old_by_name is not None and _named(new) is not None:
+            shared = [share(old_by_name.get(item['name'], _missing), item) for item in new]
+        else:
+            shared = [share(old[n] if n < len(old) else _missing, item) for n, item in enumerate(new)]
+        if len(shared) == len(old) and all(a is b for a, b in zip(shared, old)):
+            return old
+        if all(a is b for a, b in zip(shared, new)):
+            return new
+        return shared
+    if type(old) is type(new) and old == new:
+        return old
+    return new
+
+
+def diff(old, new, path=()):
+    """Returns the patches turning old into new, a list of (op, path, value)."""
+    if old is new:
+        return []
+    if isinstance(old, dict) and isinstance(new, dict):
+        patches = []
+        for k, v in old.items():
+            if k not in new:
+                patches.append(('remove', path + (k,), None))
+            else:
+                patches.extend(diff(v, new[k], path + (k,)))
+        for k, v in new.items():
+            if k not in old:
+                patches.append(('add', path + (k,), v))
+        return patches
+    old_by_name, new_by_name = _named(old), _named(new)
+    if old_by_name is not None and new_by_name is not None:
+        return diff(old_by_name, new_by_name, path)
+    if type(old) is type(new) and old == new:
+        return []
+    return [('modify', path, new)]
+
+
+def _by_name(items):
+    """Returns {name: item} of a list of groups metadata or of a single group metadata."""
+    if items is None:
+        return {}
+    if not isinstance(items, list):
+        items = [items]
+    return {item.get('name'): item for item in items}
+
+
+def plan_group_patches(old_items, new_items, names=None):
+    """
+    Returns the operations turning the groups old_items into new_items (lists of
+    groups metadata or single groups metadata), only for the groups named in names
+    if given. Operations are (op, old name, new metadata) with op:
+    'replace': the group named old name becomes new metadata, in place
+    'remove': the group named old name is removed
+    'add': a group with new metadata is added
+    Groups removed and added are paired, in order, as renames replaced in place.
+    """
+    old_by_name, new_by_name = _by_name(old_items), _by_name(new_items)
+    if names is None:
+        names = set(old_by_name) | set(new_by_name)
+    old_order = {name: n for n, name in enumerate(old_by_name)}
+    new_order = {name: n for n, name in enumerate(new_by_name)}
+    removed = sorted((name for name in names if name in old_by_name and name not in new_by_name),
+                     key=old_order.get)
+    added = sorted((name for name in names if name in new_by_name and name not in old_by_name),
+                   key=new_order.get)
+    operations = []
+    for name in sorted((name for name in names if name in old_by_name and name in new_by_name),
+                       key=old_order.get):
+        if old_by_name[name] != new_by_name[name]:
+            operations.append(('replace', name, new_by_name[name]))
+    for old_name, new_name in zip(removed, added):
+        operations.append(('replace', old_name, new_by_name[new_name]))
+    for old_name in removed[len(added):]:
+        operations.append(('remove', old_name, None))
+    for new_name in added[len(removed):]:
+        operations.append(('add', None, new_by_name[new_name]))
+    return operations
+
+
+class UndoHistory:
+    def __init__(self, max_steps=undo_max_steps):
+        """Snapshots of the metadata, sharing unchanged subtrees, and the current step."""
+        self.max_steps = max_steps
+        self.snapshots = []
+        self.index = -1
+
+    @property
+    def current(self):
+        return self.snapshots[self.index] if self.snapshots else None
+
+    def can_undo(self):
+        return self.index > 0
+
+    def can_redo(self):
+        return self.index < len(self.snapshots) - 1
+
+    def push(self, metadata):
+        """
+        Adds a step after the current one, discarding the steps undone. Returns
+        False, adding nothing, if metadata is the same as the current step.
+        """
+        current = self.current
+        # Equal to the current step if shared as a whole, without comparing identical subtrees
+        snapshot = share(current, metadata)
+        if current is not None and snapshot is current:
+            return False
+        del self.snapshots[self.index + 1:]
+        self.snapshots.append(snapshot)
+        if len(self.snapshots) > self.max_steps:
+            del self.snapshots[:len(self.snapshots) - self.max_steps]
+        self.index = len(self.snapshots) - 1
+        return True
+
+    def replace(self, metadata):
+        """Replaces the current step, e.g. with the metadata read back after undo."""
+        if not self.snapshots:
+            self.push(metadata)
+        else:
+            self.snapshots[self.index] = share(self.current, metadata)
+
+    def undo(self):
+        """Moves to the previous step and returns its metadata, None if there is none."""
+        if not self.can_undo():
+            return None
+        self.index -= 1
+        return self.current
+
+    def redo(self):
+        """Moves to the next step and returns its metadata, None if there is none."""
+        if not self.can_redo():
+            return None
+        self.index += 1
+        return self.current
+
+    def clear(self):
+        self.snapshots = []
+        self.index = -1
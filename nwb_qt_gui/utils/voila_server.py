@@ -0,0 +1,212 @@
+"""
+Voila server process used by the NWB explorer
+
+The server runs as a tracked subprocess in its own process group. Readiness
+is probed (port open plus HTTP 200) with a bounded timeout, and shutdown
+targets only this process and its descendants.
+
+Ports are assigned by the OS. If the assigned port is taken by another
+process before the server binds it, Voila moves to the next free port; the
+port it actually listens to is read back from its output.
+"""
+from PySide2 import QtCore
+
+import subprocess
+import urllib.request
+import threading
+import atexit
+import re
+import signal
+import socket
+import time
+import sys
+import os
+import psutil
+
+
+_url_port_pattern = re.compile(r'https?://(?:localhost|127\.0\.0\.1|\[::1\]):(\d+)/')
+
+
+def get_free_port():
+    """Returns a free port number, assigned by the OS."""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(('localhost', 0))
+        return sock.getsockname()[1]
+
+
+class VoilaServer:
+    def __init__(self, path, port, pool_size=0, log_file=None):
+        """
+        Voila server serving a notebook or a directory of notebooks.
+
+        Parameters
+        ----------
+        path : str
+            Notebook file, or directory of notebooks rendered at /voila/render/<name>.
+        port : int
+            Port requested for the server. Updated with the port reported by the server.
+        pool_size : int
+            Number of pre-warmed kernels kept per notebook.
+        log_file : str
+            Path to file receiving the server output. Output is discarded if None.
+        """
+        self.path = path
+        self.port = port
+        self.pool_size = pool_size
+        self.log_file = log_file
+        self.process = None
+        self._log = None
+        self.port_reported = threading.Event()
+
+    @property
+    def url(self):
+        return 'http://localhost:' + str(self.port)
+
+    def start(self):
+        """Launches the server process in a new process group."""
+        command = [sys.executable, '-m', 'voila', str(self.path), '--no-browser',
+                   '--port=' + str(self.port)]
+        if self.pool_size > 0:
+            command += ['--preheat_kernel=True', '--pool_size=' + str(self.pool_size)]
+        if sys.platform == 'win32':
+            kwargs = {'creationflags': subprocess.CREATE_NEW_PROCESS_GROUP}
+        else:
+            kwargs = {'start_new_session': True}
+        if self.log_file:
+            self._log = open(self.log_file, 'ab')
+        self.process = subprocess.Popen(command, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE,
+                                        stderr=subprocess.STDOUT, **kwargs)
+        # Output is continuously drained, so the server never blocks on a full pipe
+        self._reader = threading.Thread(target=self._read_output, args=(self.process, self._log),
+                                        daemon=True)
+        self._reader.start()
+        # Makes sure the server does not outlive the GUI
+        atexit.register(self.stop)
+
+    def _read_output(self, process, log):
+        """Copies server output to the log file and reads back the port it listens to."""
+        for line in iter(process.stdout.readline, b''):
+            if log is not None:
+                log.write(line)
+                log.flush()
+            if not self.port_reported.is_set():
+                match = _url_port_pattern.search(line.decode(errors='replace'))
+                if match:
+                    self.port = int(match.group(1))
+                    self.port_reported.set()
+        process.stdout.close()
+        if log is not None:
+            log.close()
+
+    def is_running(self):
+        return self.process is not None and self.process.poll() is None
+
+    def is_ready(self):
+        """Returns True if the server port is open and its root page answers with HTTP 200."""
+        try:
+            with socket.create_connection(('localhost', self.port), timeout=0.5):
+                pass
+            with urllib.request.urlopen(self.url, timeout=2) as response:
+                return response.status == 200
+        except (OSError, ValueError):
+            return False
+
+    def kernel_memory(self, connection_files):
+        """
+        Returns {connection file: resident memory in bytes} of the kernels started with
+        the given connection files. Other kernels, e.g. idle pre-warmed ones, are not counted.
+        """
+        if not connection_files or not self.is_running():
+            return {}
+        # Kernels are started with their connection file path on the command line
+        by_name = {os.path.basename(path): path for path in connection_files}
+        try:
+            processes = psutil.Process(self.process.pid).children(recursive=True)
+        except psutil.Error:
+            return {}
+        memory = {}
+        for proc in processes:
+            try:
+                names = by_name.keys() & {os.path.basename(arg) for arg in proc.cmdline()}
+                if names:
+                    memory[by_name[names.pop()]] = proc.memory_info().rss
+            except psutil.Error:
+                pass
+        return memory
+
+    def wait_until_ready(self, timeout, interval=0.1):
+        """
+        Blocks until the server is ready. Raises RuntimeError on exit or timeout.
+        The port is probed once the server reported it or, if it never does, after
+        half the timeout.
+        """
+        process = self.process
+        start = time.monotonic()
+        while time.monotonic() - start < timeout:
+            if process is None or process.poll() is not None or process is not self.process:
+                raise RuntimeError('Voila server stopped before being ready')
+            probe = self.port_reported.is_set() or time.monotonic() - start > timeout / 2
+            if probe and self.is_ready():
+                return
+            time.sleep(interval)
+        raise RuntimeError('Voila server not ready after ' + str(timeout) + ' seconds')
+
+    def stop(self, timeout=5):
+        """Terminates the server process group, killing any remaining descendant."""
+        if self.process is None:
+            return
+        process, self.process = self.process, None
+        atexit.unregister(self.stop)
+        if process.poll() is None:
+            # Kernels may run in their own sessions, so descendants are tracked explicitly
+            try:
+                descendants = psutil.Process(process.pid).children(recursive=True)
+            except psutil.Error:
+                descendants = []
+            self._signal_group(process, terminate=True)
+            try:
+                process.wait(timeout=timeout)
+            except subprocess.TimeoutExpired:
+                self._signal_group(process, terminate=False)
+                process.wait()
+            gone, alive = psutil.wait_procs(descendants, timeout=timeout)
+            for proc in alive:
+                try:
+                    proc.kill()
+                except psutil.Error:
+                    pass
+        # Log file is closed by the output reader when the pipe closes
+        self._reader.join(timeout=timeout)
+
+    @staticmethod
+    def _signal_group(process, terminate):
+        """Sends a termination (or kill) signal to the process group of process."""
+        try:
+            if sys.platform == 'win32':
+                if terminate:
+                    process.send_signal(signal.CTRL_BREAK_EVENT)
+                else:
+                    process.kill()
+            else:
+                os.killpg(process.pid, signal.SIGTERM if terminate else signal.SIGKILL)
+        except (ProcessLookupError, PermissionError, OSError):
+            pass
+
+
+class VoilaReadyThread(QtCore.QThread):
+    ready = QtCore.Signal()
+    failed = QtCore.Signal(str)
+
+    def __init__(self, server, timeout):
+        """Waits for a VoilaServer to become ready without blocking the GUI."""
+        super().__init__()
+        self.server = server
+        self.timeout = timeout
+
+    def run(self):
+        try:
+            self.server.wait_until_ready(timeout=self.timeout)
+        except RuntimeError as error:
+            self.failed.emit(str(error))
+        else:
+            self.ready.emit()
@@ -0,0 +1,121 @@
+"""
+Pool of detached group widgets, reused across metafile loads
+
+Group forms removed from the GUI are reset to the state they had right after
+construction and kept per GUI class, up to a maximum memory of all kept groups.
+The next forms building takes them from the pool instead of constructing new
+ones, and binds them to their new values with write_fields.
+
+A group is reset from a snapshot of its line edits, checkboxes and comboboxes
+(attributes of the group, as forms are stored by the GUI classes) taken after
+construction. Groups whose forms changed since (e.g. built on expand, expanded,
+with child groups or nested group forms) can not be reset and are not pooled.
+"""
+from PySide2.QtWidgets import QLineEdit, QCheckBox, QComboBox, QWidget
+
+from nwb_qt_gui.utils.configs import widget_pool_max_mb
+
+# Memory (KB) of a detached group, as measured for groups of the ecephys, ophys,
+# ogen and general forms (59 to 84 KB each)
+group_kb = 80
+
+
+def _forms(widget):
+    """Returns the line edits, checkboxes and comboboxes of a group, by attribute name."""
+    return {k: v for k, v in vars(widget).items() if isinstance(v, (QLineEdit, QCheckBox, QComboBox))}
+
+
+def snapshot(widget):
+    """Returns the state of a group forms, or None if the group can not be reset."""
+    for k, v in vars(widget).items():
+        # Nested group forms and child groups are not reset
+        if k != 'parent' and isinstance(v, QWidget) and hasattr(v, 'read_fields'):
+            return None
+    if getattr(widget, 'groups_list', None):
+        return None
+    state = {'metadata': getattr(widget, 'metadata', None), 'forms': {},
+             'content_built': getattr(widget, 'content_built', True)}
+    for k, form in _forms(widget).items():
+        if isinstance(form, QLineEdit):
+            state['forms'][k] = form.text()
+        elif isinstance(form, QCheckBox):
+            state['forms'][k] = form.isChecked()
+        else:
+            state['forms'][k] = ([form.itemText(i) for i in range(form.count())], form.currentIndex())
+    return state
+
+
+def reset(widget, state):
+    """Restores the state of a group forms. Returns False if the group changed too much."""
+    forms = _forms(widget)
+    if state is None or set(forms) != set(state['forms']) or getattr(widget, 'groups_list', None):
+        return False
+    if getattr(widget, 'content_built', True) != state['content_built']:
+        return False
+    toggle_button = getattr(widget, 'toggle_button', None)
+    if toggle_button is not None and toggle_button.isChecked():
+        return False
+    for k, value in state['forms'].items():
+        form = forms[k]
+        if isinstance(form, QLineEdit):
+            form.setText(value)
+        elif isinstance(form, QCheckBox):
+            form.setChecked(value)
+        else:
+            form.clear()
+            form.addItems(value[0])
+            form.setCurrentIndex(value[1])
+    if hasattr(widget, 'metadata'):
+        widget.metadata = state['metadata']
+    return True
+
+
+class WidgetPool:
+    def __init__(self, max_mb=widget_pool_max_mb):
+        """Detached group widgets, reset and ready for reuse, by GUI class."""
+        self.max_size = max_mb * 1024 // group_kb
+        self.size = 0
+        self.pools = {}
+        # Number of groups taken from the pool and newly constructed
+        self.reused = 0
+        self.created = 0
+
+    def acquire(self, gui_class, parent):
+        """Returns a group of gui_class bound to parent, from the pool if available."""
+        pool = self.pools.get(gui_class)
+        if pool:
+            widget = pool.pop()
+            self.size -= 1
+            widget.parent = parent
+            self.reused += 1
+            return widget
+        widget = gui_class(parent=parent)
+        # Without reuse, groups are not reset and the snapshot is not taken
+        widget.pool_state = snapshot(widget) if self.max_size else None
+        self.created += 1
+        return widget
+
+    def release(self, widget):
+        """
+        Detaches a group from its parent, resets it and keeps it for reuse.
+        Returns False if the group was not pooled, it is only detached then.
+        """
+        widget.setParent(None)
+        # Disconnects the parent group from the name form. Signal.disconnect() is
+        # not used: it drops a reference to True/False on each call under PySide6,
+        # until the interpreter frees them and crashes (seen at ~1000 groups)
+        if hasattr(widget, 'form_name'):
+            try:
+                widget.form_name.disconnect(widget.parent)
+            except (RuntimeError, TypeError):
+                pass
+        pool = self.pools.setdefault(type(widget), [])
+        if self.size >= self.max_size or not reset(widget, getattr(widget, 'pool_state', None)):
+            return False
+        pool.append(widget)
+        self.size += 1
+        return True
+
+    def clear(self):
+        self.pools = {}
+        self.size = 0
@@ -25,10 +25,11 @@ setup(
     include_package_data=True,
     install_requires=[
         'pynwb', 'nwb-conversion-tools', 'numpy', 'PySide2', 'nwbwidgets',
-        'psutil', 'voila', 'pandas', 'jupyter', 'matplotlib', 'h5py', 'pyyaml',
-        'jupyter-client'
+        'psutil', 'voila>=0.3', 'pandas', 'jupyter', 'matplotlib', 'h5py', 'pyyaml',
+        'jupyter-client', 'msgpack'
     ],
     entry_points={
-        'console_scripts': ['nwbgui=nwb_qt_gui.gui:command_line_shortcut'],
+        'console_scripts': ['nwbgui=nwb_qt_gui.gui:command_line_shortcut',
+                            'nwbstorage=nwb_qt_gui.utils.storage_analyzer:main'],
     }
 )
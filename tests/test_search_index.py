@@ -0,0 +1,24 @@
+from nwb_qt_gui.utils.search_index import SearchIndex
+
+
+def make_index(n):
+    index = SearchIndex()
+    for i in range(n):
+        index.update(i, 'shank' + str(i), 'ElectrodeGroup', [('location', 'CA1 area ' + str(i % 3))])
+    return index
+
+
+def test_matching_keys_not_limited():
+    index = make_index(250)
+    assert len(index.search('area', limit=100)) == 100
+    keys = index.matching_keys('area')
+    assert sorted(keys) == list(range(250))
+    # Same order as search results
+    assert keys[:100] == [key for key, field, text in index.search('area', limit=100)]
+
+
+def test_matching_keys_all_words():
+    index = make_index(9)
+    assert sorted(index.matching_keys('ca1 area 2')) == [2, 5, 8]
+    assert index.matching_keys('') == []
+    assert index.matching_keys('hippocampus') == []
@@ -0,0 +1,63 @@
+import copy
+
+from nwb_qt_gui.utils.undo_history import UndoHistory, diff, plan_group_patches
+
+
+def test_rename_single_group_then_undo():
+    before = {'Ecephys': {'Device': [{'name': 'probe'}]}}
+    after = {'Ecephys': {'Device': [{'name': 'probe_v2'}]}}
+    history = UndoHistory()
+    history.push(copy.deepcopy(before))
+    history.push(copy.deepcopy(after))
+    current = history.current
+    target = history.undo()
+    assert target == before
+    patches = diff(current, target)
+    assert sorted(op for op, path, value in patches) == ['add', 'remove']
+    names = {path[2] for op, path, value in patches}
+    operations = plan_group_patches(current['Ecephys']['Device'], target['Ecephys']['Device'], names)
+    # The renamed group is replaced in place, each widget is taken once
+    assert operations == [('replace', 'probe_v2', {'name': 'probe'})]
+
+
+def test_rename_among_many_keeps_others():
+    old = [{'name': 'a'}, {'name': 'b', 'x': 1}, {'name': 'c'}]
+    new = [{'name': 'a'}, {'name': 'b2', 'x': 1}, {'name': 'c', 'x': 2}]
+    operations = plan_group_patches(old, new)
+    assert sorted(operations, key=str) == sorted([('replace', 'b', {'name': 'b2', 'x': 1}),
+                                                  ('replace', 'c', {'name': 'c', 'x': 2})], key=str)
+
+
+def test_add_and_remove():
+    old = [{'name': 'a'}, {'name': 'b'}]
+    assert plan_group_patches(old, [{'name': 'a'}]) == [('remove', 'b', None)]
+    assert plan_group_patches([{'name': 'a'}], old) == [('add', None, {'name': 'b'})]
+
+
+def test_single_unnamed_group():
+    assert plan_group_patches({'rate': 1.0}, {'rate': 2.0}) == [('replace', None, {'rate': 2.0})]
+
+
+def test_snapshots_share_unchanged_subtrees():
+    history = UndoHistory()
+    first = {'Ecephys': {'Device': [{'name': 'a'}, {'name': 'b'}]}, 'NWBFile': {'identifier': 'x'}}
+    second = copy.deepcopy(first)
+    second['Ecephys']['Device'][1]['description'] = 'changed'
+    history.push(first)
+    assert history.push(second)
+    assert not history.push(copy.deepcopy(second))
+    a, b = history.snapshots
+    assert a['NWBFile'] is b['NWBFile']
+    assert a['Ecephys']['Device'][0] is b['Ecephys']['Device'][0]
+
+
+def test_snapshots_keep_groups_read_again():
+    history = UndoHistory()
+    groups = [{'name': 'g' + str(i), 'location': 'CA1'} for i in range(5)]
+    history.push({'Ecephys': {'ElectrodeGroup': list(groups)}})
+    groups[3] = dict(groups[3], location='CA3')
+    assert history.push({'Ecephys': {'ElectrodeGroup': list(groups)}})
+    # The group read again is stored as is, so the next step finds it unchanged by identity
+    stored = history.current['Ecephys']['ElectrodeGroup']
+    assert all(a is b for a, b in zip(stored, groups))
+    assert not history.push({'Ecephys': {'ElectrodeGroup': list(groups)}})